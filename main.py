@@ -1,80 +1,107 @@
 # main.py
 
-import argparse
-import subprocess
+import os
 import sys
+import argparse
+
+from src.shared.constants import FORMAT_EXTENSIONS
+from src.shared.logs import setup_logging
+
+# Each step runs in this interpreter; heavy modules are imported by the step
+# that needs them, so `main.py --help` stays cheap.
 
 def run_generate(args):
-    cmd = [
-        sys.executable,
-        "src/generate/main.py",
-        "--num_assets", str(args.num_assets),
-        "--seed", str(args.seed),
-        "--raw_dir", args.raw_dir,
-        "--config", args.config # Added config argument
-    ]
-    subprocess.run(cmd, check=True)
+    from src.generate.main import run
+    run(args)
 
 def run_prepare(args):
-    cmd = [
-        sys.executable,
-        "src/prepare/main.py",
-        "--raw_dir", args.raw_dir,
-        "--processed_dir", args.processed_dir
-    ]
-    subprocess.run(cmd, check=True)
+    from src.prepare.generate_lightspeed_assets import enrich_assets
+    enrich_assets(args.raw_dir, args.processed_dir, args.format, args.subnets)
+
+def run_reconcile(args):
+    from src.reconcile.reconcile import reconcile_from_config
+    reconcile_from_config(args.config, args.raw_dir, args.format, args.report)
+
+def run_reconcile_fixtures(args):
+    from src.reconcile.fixtures import write_fixtures
+    write_fixtures(args.input, args.output_dir, args.seed)
 
 
 def run_train_inventory(args):
-    cmd = [
-        sys.executable,
-        "src/train/main.py",
-        "inventory",          # <--- Subcommand!
-        "--config", args.config
-    ]
-    subprocess.run(cmd, check=True)
+    from src.train.train_from_config import train_from_config
+    train_from_config(args.config, args.input, args.cv, args.cv_budget)
 
 def run_train_ipam(args):
-    cmd = [
-        sys.executable,
-        "src/train/main.py",
-        "ipam",               # <--- Subcommand!
-        "--config", args.config
-    ]
-    subprocess.run(cmd, check=True)
+    from src.train.train_from_config import train_from_config
+    train_from_config(args.config, args.input, args.cv, args.cv_budget)
     
 def run_train_both(args):
-    cmd = [
-        sys.executable,
-        "src/train/main.py",
-        "both",
-        "--inventory_config", args.inventory_config,
-        "--ipam_config", args.ipam_config
-    ]
-    subprocess.run(cmd, check=True)
+    from src.train.train_from_config import train_many
+    train_many([args.inventory_config, args.ipam_config], args.input, args.n_jobs, args.cv, args.cv_budget)
+
+def run_train_update(args):
+    from src.train.incremental import update_from_config
+    update_from_config(args.config, args.delta, args.version, args.n_jobs)
+
+def run_search(args):
+    from src.train.search import search_from_config
+    search_from_config(args.config, args.input, args.workers, bool(args.mlflow), bool(args.refit))
+
+def run_score(args):
+    from src.score.score_assets import score_assets
+    score_assets(args.input, args.output, [args.inventory_config, args.ipam_config], args.chunk_size, args.workers)
+
+def run_compile(args):
+    from src.score.compile_model import compile_from_config
+    for config in [args.inventory_config, args.ipam_config]:
+        compile_from_config(config, args.check_input)
+
+def run_serve(args):
+    from src.serve.server import serve
+    serve(args.host, args.port, [args.inventory_config, args.ipam_config], args.max_batch, args.max_wait_ms)
+
+def run_load_test(args):
+    from src.serve.load_test import load_test
+    load_test(args.host, args.port, args.input, args.concurrency, args.requests, args.batch, args.seed)
 
 def run_pipeline(args):
+    from src.pipeline.runner import run_pipeline as run_in_process
     print(f"[DEBUG] Pipeline received config: {args.config}")
-    # Generate
-    generate_args = argparse.Namespace(
-        num_assets=args.num_assets,
-        seed=args.seed,
-        raw_dir=args.raw_dir,
-        config=args.config  # Pass the config file for generation
-    )
-    run_generate(generate_args)
-    # Prepare
-    prepare_args = argparse.Namespace(
-        raw_dir=args.raw_dir,
-        processed_dir=args.processed_dir
-    )
-    run_prepare(prepare_args)
-    # Train both
-    train_both_args = argparse.Namespace(
-        inventory_config=args.inventory_config,
-        ipam_config=args.ipam_config
-    )
-    run_train_both(train_both_args)
+    cache = None
+    if args.cache:
+        from src.pipeline.cache import StageCache
+        cache = StageCache(args.cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3),
+                           max_age_days=args.cache_max_age_days, force=args.force)
+    run_in_process(args, spill=bool(args.spill), cache=cache, fused=bool(args.fused))
+
+def run_sweep(args):
+    from src.pipeline.sweep import sweep
+    cache = None
+    if args.cache and args.seed is not None:
+        from src.pipeline.cache import StageCache
+        cache = StageCache(args.cache_dir, force=args.force)
+    sweep(args, args.scenarios, [args.inventory_config, args.ipam_config], args.output_dir, cache)
+
+def run_bench(args):
+    from src.bench.benchmark import bench
+    failed = bench(args.tiers, args.stages, args.mode, args.format, args.seed, args.repeat, args.output,
+                   args.baseline, args.threshold, args.memory_threshold, args.timeout)
+    sys.exit(1 if failed else 0)
+
+def run_bench_compare(args):
+    from src.bench.benchmark import compare, load_results, report_regressions
+    regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold,
+                          args.memory_threshold)
+    sys.exit(1 if report_regressions(regressions, args.baseline) else 0)
+
+def run_import_time(args):
+    from src.bench.importtime import import_time
+    failed = import_time(args.entries, args.repeat, args.budget, args.output)
+    sys.exit(1 if failed else 0)
+
+def run_memory(args):
+    from src.bench.memory import asset_memory
+    asset_memory(args.input, args.output)
 
 def main():
     parser = argparse.ArgumentParser(description="D502 Lightspeed ML Pipeline Orchestrator")
@@ -86,24 +113,111 @@ def main():
     generate_parser.add_argument("--seed", type=int, default=42)
     generate_parser.add_argument("--raw_dir", type=str, default="data/raw")
     generate_parser.add_argument("--config", type=str, default="config/generation_params.json")
+    generate_parser.add_argument("--mode", type=str, choices=["rowwise", "batch", "sharded"], default="rowwise")
+    generate_parser.add_argument("--num_width", type=int, default=2)
+    generate_parser.add_argument("--chunk_size", type=int, default=0,
+                                 help="Generate in chunks of this many rows; label in them with --labeling hashed")
+    generate_parser.add_argument("--labeling", type=str, choices=["exact", "hashed"], default="exact",
+                                 help="exact: per-group failure counts, in memory; hashed: per-row hash, streams "
+                                      "(different labels)")
+    generate_parser.add_argument("--workers", type=int, default=0)
+    generate_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
+
+    # reconcile against inventory and IPAM exports
+    reconcile_parser = subparsers.add_parser("reconcile", help="Label discovered assets from inventory and IPAM exports")
+    reconcile_parser.add_argument("--config", type=str, default="config/reconcile.json")
+    reconcile_parser.add_argument("--raw_dir", type=str, default="data/raw")
+    reconcile_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
+    reconcile_parser.add_argument("--report", type=str, default=None)
+
+    fixtures_parser = subparsers.add_parser("reconcile-fixtures", help="Write local stand-ins for the source exports")
+    fixtures_parser.add_argument("--input", type=str, default="data/raw/labeled_asset_dataset.csv")
+    fixtures_parser.add_argument("--output_dir", type=str, default="data/fixtures")
+    fixtures_parser.add_argument("--seed", type=int, default=42)
 
     # prepare
     prepare_parser = subparsers.add_parser("prepare", help="Run the prepare step")
     prepare_parser.add_argument("--raw_dir", type=str, default="data/raw")
     prepare_parser.add_argument("--processed_dir", type=str, default="data/processed")
+    prepare_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
+    prepare_parser.add_argument("--subnets", type=str, default=None,
+                                help="IPAM prefix table (prefix, region columns); default REGION_SUBNET_MAP")
 
     # train inventory
     train_inventory_parser = subparsers.add_parser("train-inventory", help="Train inventory model")
     train_inventory_parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    train_inventory_parser.add_argument("--input", type=str, default=None)
 
     # train ipam
     train_ipam_parser = subparsers.add_parser("train-ipam", help="Train ipam model")
     train_ipam_parser.add_argument("--config", type=str, default="config/ipam_full.json")
+    train_ipam_parser.add_argument("--input", type=str, default=None)
 
     # train both models
     train_both_parser = subparsers.add_parser("train-both", help="Train both inventory and ipam models")
     train_both_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
     train_both_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    train_both_parser.add_argument("--input", type=str, default=None)
+    train_both_parser.add_argument("--n_jobs", type=int, default=-1,
+                                   help="Cores shared by the concurrent fits (-1 = all)")
+    for train_parser in [train_inventory_parser, train_ipam_parser, train_both_parser]:
+        train_parser.add_argument("--cv", action="store_true",
+                                  help="Add stratified k-fold metrics and permutation importance to the report")
+        train_parser.add_argument("--cv_budget", type=float, default=None,
+                                  help="Wall-clock seconds per model that cap CV folds and repeats")
+
+    # incremental update
+    train_update_parser = subparsers.add_parser("train-update", help="Grow a saved model on new or changed assets")
+    train_update_parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    train_update_parser.add_argument("--delta", type=str, required=True,
+                                     help="Table of only the new or changed assets since the last update")
+    train_update_parser.add_argument("--version", type=str, default=None,
+                                     help="Data version label (default: digest of the delta file)")
+    train_update_parser.add_argument("--n_jobs", type=int, default=None)
+
+    # hyperparameter search
+    search_parser = subparsers.add_parser("search", help="Tune a model over its config's search space")
+    search_parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    search_parser.add_argument("--input", type=str, default=None)
+    search_parser.add_argument("--workers", type=int, default=0, help="Trial processes (0 = all cores)")
+    search_parser.add_argument("--mlflow", type=int, choices=[0, 1], default=0, help="Log every trial to MLflow")
+    search_parser.add_argument("--refit", type=int, choices=[0, 1], default=1,
+                               help="Retrain and save the model with the best parameters")
+
+    # score
+    score_parser = subparsers.add_parser("score", help="Score an asset table with both trained models")
+    score_parser.add_argument("--input", type=str, default="data/processed/labeled_asset_dataset_enriched.csv")
+    score_parser.add_argument("--output", type=str, default="data/scored/asset_risk_scores.csv")
+    score_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    score_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    score_parser.add_argument("--chunk_size", type=int, default=200_000)
+    score_parser.add_argument("--workers", type=int, default=0, help="Scoring processes (0 = all cores)")
+
+    # compile
+    compile_parser = subparsers.add_parser("compile", help="Compile trained models into lookup tables")
+    compile_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    compile_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    compile_parser.add_argument("--check_input", type=str, default=None,
+                                help="Table to verify the compiled models against (default: each config's input)")
+
+    # serve
+    serve_parser = subparsers.add_parser("serve", help="Serve risk scores over HTTP with warm models")
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    serve_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    serve_parser.add_argument("--max_batch", type=int, default=256)
+    serve_parser.add_argument("--max_wait_ms", type=float, default=2.0)
+
+    # load generator for the scoring service
+    load_test_parser = subparsers.add_parser("load-test", help="Load-test a running scoring service")
+    load_test_parser.add_argument("--host", type=str, default="127.0.0.1")
+    load_test_parser.add_argument("--port", type=int, default=8080)
+    load_test_parser.add_argument("--input", type=str, default="data/processed/labeled_asset_dataset_enriched.csv")
+    load_test_parser.add_argument("--concurrency", type=int, default=32)
+    load_test_parser.add_argument("--requests", type=int, default=2000)
+    load_test_parser.add_argument("--batch", type=int, default=1, help="Asset records per request")
+    load_test_parser.add_argument("--seed", type=int, default=42)
 
     # pipeline
     pipeline_parser = subparsers.add_parser("pipeline", help="Run the full ML pipeline")
@@ -111,26 +225,140 @@ def main():
     pipeline_parser.add_argument("--seed", type=int, default=42)
     pipeline_parser.add_argument("--raw_dir", type=str, default="data/raw")
     pipeline_parser.add_argument("--config", type=str, default="config/generation_params.json")
+    pipeline_parser.add_argument("--mode", type=str, choices=["rowwise", "batch", "sharded"], default="rowwise")
+    pipeline_parser.add_argument("--num_width", type=int, default=2)
+    pipeline_parser.add_argument("--chunk_size", type=int, default=0)
+    pipeline_parser.add_argument("--workers", type=int, default=0)
+    pipeline_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
     pipeline_parser.add_argument("--processed_dir", type=str, default="data/processed")
     pipeline_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
     pipeline_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    pipeline_parser.add_argument("--spill", type=int, choices=[0, 1], default=1,
+                                 help="Also write each intermediate dataset to raw_dir/processed_dir")
+    pipeline_parser.add_argument("--fused", type=int, choices=[0, 1], default=0,
+                                 help="Generate, label and enrich in one pass (no hostname parsing)")
+    pipeline_parser.add_argument("--cache", type=int, choices=[0, 1], default=1,
+                                 help="Skip stages whose inputs, configs and code are unchanged since a cached run")
+    pipeline_parser.add_argument("--cache_dir", type=str, default=".cache/pipeline")
+    pipeline_parser.add_argument("--cache_max_gb", type=float, default=5.0)
+    pipeline_parser.add_argument("--cache_max_age_days", type=float, default=30.0)
+    pipeline_parser.add_argument("--force", action="store_true", help="Re-run every stage and refresh the cache")
+
+    # scenario sweep
+    sweep_parser = subparsers.add_parser("sweep", help="Label and train many noise configs over one base dataset")
+    sweep_parser.add_argument("--scenarios", nargs="+",
+                              default=["config/generation_params.json", "config/alt_scenario_generation_params.json"],
+                              help="Probability config files, or directories of them")
+    sweep_parser.add_argument("--num_assets", type=int, default=11246)
+    sweep_parser.add_argument("--seed", type=int, default=42)
+    sweep_parser.add_argument("--mode", type=str, choices=["rowwise", "batch", "sharded"], default="batch")
+    sweep_parser.add_argument("--num_width", type=int, default=2)
+    sweep_parser.add_argument("--chunk_size", type=int, default=0)
+    sweep_parser.add_argument("--workers", type=int, default=0, help="Processes (0 = all cores)")
+    sweep_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="feather",
+                              help="Part file format for sharded generation")
+    sweep_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    sweep_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    sweep_parser.add_argument("--output_dir", type=str, default="reports/scenarios")
+    sweep_parser.add_argument("--cache", type=int, choices=[0, 1], default=1,
+                              help="Reuse the base dataset from the stage cache")
+    sweep_parser.add_argument("--cache_dir", type=str, default=".cache/pipeline")
+    sweep_parser.add_argument("--force", action="store_true", help="Regenerate the base dataset")
+
+    # benchmarks
+    bench_parser = subparsers.add_parser("bench", help="Benchmark every stage at 10k/100k/1M assets")
+    bench_parser.add_argument("--tiers", nargs="+", choices=["10k", "100k", "1m"], default=["10k", "100k"])
+    bench_parser.add_argument("--stages", nargs="+", choices=["generate", "inject_noise", "enrich", "train"],
+                              default=["generate", "inject_noise", "enrich", "train"])
+    bench_parser.add_argument("--mode", type=str, choices=["rowwise", "batch", "sharded"], default="batch")
+    bench_parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
+    bench_parser.add_argument("--seed", type=int, default=42)
+    bench_parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept")
+    bench_parser.add_argument("--output", type=str, default=None, help="Results file (default: reports/benchmarks/)")
+    bench_parser.add_argument("--baseline", type=str, default="benchmarks/baseline.json",
+                              help="Compare against this baseline if it exists")
+    bench_parser.add_argument("--threshold", type=float, default=0.15, help="Allowed wall time increase (0.15 = 15%%)")
+    bench_parser.add_argument("--memory_threshold", type=float, default=None,
+                              help="Allowed peak RSS increase (default: --threshold)")
+    bench_parser.add_argument("--timeout", type=float, default=3600,
+                              help="Seconds before a stage is stopped and recorded as failed")
+
+    bench_compare_parser = subparsers.add_parser("bench-compare", help="Compare benchmark results to a baseline")
+    bench_compare_parser.add_argument("--baseline", type=str, default="benchmarks/baseline.json")
+    bench_compare_parser.add_argument("--current", type=str, required=True)
+    bench_compare_parser.add_argument("--threshold", type=float, default=0.15)
+    bench_compare_parser.add_argument("--memory_threshold", type=float, default=None)
+
+    # memory
+    memory_parser = subparsers.add_parser("memory", help="Report bytes per asset before and after compaction")
+    memory_parser.add_argument("--input", type=str, default="data/processed/labeled_asset_dataset_enriched.csv")
+    memory_parser.add_argument("--output", type=str, default="reports/memory/asset_memory.json")
+
+    import_time_parser = subparsers.add_parser("import-time", help="Report cold-start import time per entry point")
+    import_time_parser.add_argument("--entries", nargs="+", default=None, help="Entry points to measure (default: all)")
+    import_time_parser.add_argument("--repeat", type=int, default=3, help="Cold starts per entry point; the fastest is kept")
+    import_time_parser.add_argument("--budget", type=str, default="config/import_budget.json",
+                                    help="Per-entry import-time budgets in ms")
+    import_time_parser.add_argument("--output", type=str, default="reports/benchmarks/import_time.json")
 
+    # instrumentation, shared by every command
+    for command_parser in subparsers.choices.values():
+        command_parser.add_argument("--trace", type=str, default=None,
+                                    help="JSON trace of timed spans (default: reports/traces/<command>_trace.json)")
+        command_parser.add_argument("--profile", action="store_true", help="Write a cProfile file per stage")
+        command_parser.add_argument("--profile_dir", type=str, default="reports/profiles")
     args = parser.parse_args()
+    setup_logging()
 
-    if args.command == "generate":
-        run_generate(args)
-    elif args.command == "prepare":
-        run_prepare(args)
-    elif args.command == "train-inventory":
-        run_train_inventory(args)
-    elif args.command == "train-ipam":
-        run_train_ipam(args)
-    elif args.command == "train-both":
-        run_train_both(args)
-    elif args.command == "pipeline":
-        run_pipeline(args)
-    else:
-        raise ValueError(f"Unknown command: {args.command}")
+    from src.shared import instrument
+    instrument.configure(args.profile_dir if args.profile else None)
+    try:
+        with instrument.span(args.command, profile=True):
+            if args.command == "generate":
+                run_generate(args)
+            elif args.command == "reconcile":
+                run_reconcile(args)
+            elif args.command == "reconcile-fixtures":
+                run_reconcile_fixtures(args)
+            elif args.command == "prepare":
+                run_prepare(args)
+            elif args.command == "train-inventory":
+                run_train_inventory(args)
+            elif args.command == "train-ipam":
+                run_train_ipam(args)
+            elif args.command == "train-both":
+                run_train_both(args)
+            elif args.command == "train-update":
+                run_train_update(args)
+            elif args.command == "search":
+                run_search(args)
+            elif args.command == "score":
+                run_score(args)
+            elif args.command == "compile":
+                run_compile(args)
+            elif args.command == "serve":
+                run_serve(args)
+            elif args.command == "load-test":
+                run_load_test(args)
+            elif args.command == "sweep":
+                run_sweep(args)
+            elif args.command == "bench":
+                run_bench(args)
+            elif args.command == "bench-compare":
+                run_bench_compare(args)
+            elif args.command == "import-time":
+                run_import_time(args)
+            elif args.command == "memory":
+                run_memory(args)
+            elif args.command == "pipeline":
+                run_pipeline(args)
+            else:
+                raise ValueError(f"Unknown command: {args.command}")
+    finally:
+        trace = args.trace or os.path.join("reports", "traces", f"{args.command}_trace.json")
+        instrument.log_summary()
+        instrument.write_trace(trace)
+        instrument.log_to_mlflow(trace, enabled=bool(getattr(args, "mlflow", 0)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,301 @@
+# src/bench/benchmark.py
+
+import os
+import sys
+import json
+import logging
+import argparse
+import time
+import platform
+import tempfile
+import multiprocessing
+from queue import Empty
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.logs import setup_logging
+
+
+TIERS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+STAGES = ["generate", "inject_noise", "enrich", "train"]
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# Smaller absolute changes are timer and allocator noise, whatever their percentage
+NOISE_FLOOR = {"wall_s": 0.05, "peak_rss_mb": 5.0}
+# A stage that has not reported by then is stopped and recorded as failed
+STAGE_TIMEOUT_S = 3600
+
+
+# --- Stages ---
+def generation_plan(num_assets: int) -> tuple:
+    """``(num_width, unique_rows)``: the narrowest hostname width that fits the tier.
+
+    The region subnets hold fewer unique IPs than the largest tier, so there
+    ``unique_rows`` is the subnet capacity and the base table is tiled up to
+    ``num_assets`` rows for the later stages.
+    """
+    import numpy as np
+    from src.generate.generate_base_assets import new_allocators, region_capacity
+    best = (2, 0)
+    for num_width in range(2, 7):
+        capacity = int(region_capacity(*new_allocators(np.random.default_rng(0), num_width)).sum())
+        if capacity >= num_assets:
+            return num_width, num_assets
+        if capacity > best[1]:
+            best = (num_width, capacity)
+    return best
+
+
+def tile_table(path: str, num_assets: int):
+    import numpy as np
+    from src.shared.storage import read_table, write_table
+    df = read_table(path, compact=True)
+    write_table(df.iloc[np.resize(np.arange(len(df)), num_assets)].reset_index(drop=True), path)
+
+
+def _run_stage(stage: str, workdir: str, num_assets: int, mode: str, fmt: str, seed: int):
+    from src.shared.storage import table_path
+    raw_dir, processed_dir = os.path.join(workdir, "raw"), os.path.join(workdir, "processed")
+    base_file = table_path(raw_dir, "base_asset_dataset", fmt)
+
+    if stage == "generate":
+        from src.generate.generate_base_assets import generate_assets
+        os.makedirs(raw_dir, exist_ok=True)
+        num_width, rows = generation_plan(num_assets)
+        return lambda: generate_assets(rows, base_file, mode=mode, seed=seed, num_width=num_width)
+    if stage == "inject_noise":
+        from src.generate.inject_presence_noise import inject_noise
+        labeled_file = table_path(raw_dir, "labeled_asset_dataset", fmt)
+        return lambda: inject_noise(base_file, labeled_file, seed, "config/generation_params.json")
+    if stage == "enrich":
+        from src.prepare.generate_lightspeed_assets import enrich_assets
+        return lambda: enrich_assets(raw_dir, processed_dir, fmt)
+    if stage == "train":
+        from src.train.train_from_config import load_config, train_from_config
+        config = load_config("config/inventory_full.json")
+        config = {
+            **config,
+            "input": table_path(processed_dir, "labeled_asset_dataset_enriched", fmt),
+            **{key: os.path.join(workdir, "train", os.path.basename(config[key]))
+               for key in ["output_model", "output_encoder", "output_plot", "output_report"] if key in config},
+        }
+        config_path = os.path.join(workdir, "train_config.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        return lambda: train_from_config(config_path)
+    raise ValueError(f"Unknown stage '{stage}' (expected one of {STAGES})")
+
+
+def _measure(stage, workdir, num_assets, mode, fmt, seed, queue):
+    # Runs in a fresh interpreter: peak RSS belongs to this stage alone
+    sys.stdout = open(os.devnull, "w")
+    logging.disable(logging.WARNING)
+    try:
+        from src.shared.instrument import peak_rss_mb, span
+        fn = _run_stage(stage, workdir, num_assets, mode, fmt, seed)
+        baseline = peak_rss_mb()
+        # The stage's own spans reset the peak; the enclosing span keeps the maximum across them
+        with span(stage) as current:
+            fn()
+        wall, peak = current.wall_s, current.peak_mb
+        rows = generation_plan(num_assets)[1] if stage == "generate" else num_assets
+        if rows < num_assets:
+            # Not measured: repeat the unique rows up to the tier size for the later stages
+            from src.shared.storage import table_path
+            tile_table(table_path(os.path.join(workdir, "raw"), "base_asset_dataset", fmt), num_assets)
+        queue.put({"rows": rows, "wall_s": wall, "peak_rss_mb": peak, "rss_delta_mb": peak - baseline})
+    except BaseException as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure_stage(stage: str, workdir: str, num_assets: int, mode: str, fmt: str, seed: int,
+                  timeout: float = STAGE_TIMEOUT_S) -> dict:
+    """Measure one stage in a fresh process.
+
+    A stage that raises, dies without reporting (e.g. killed for memory) or
+    runs past ``timeout`` seconds comes back as ``{"error", "exitcode"}``.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(stage, workdir, num_assets, mode, fmt, seed, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=max(min(1.0, deadline - time.monotonic()), 0.01))
+        except Empty:
+            if not proc.is_alive() and queue.empty():
+                result = {"error": "exited without reporting"}
+            elif time.monotonic() >= deadline:
+                proc.terminate()
+                result = {"error": f"timed out after {timeout:g}s"}
+    proc.join()
+    if "error" in result:
+        result["exitcode"] = proc.exitcode
+    return result
+
+
+# --- Suite ---
+def environment() -> dict:
+    import numpy, pandas, sklearn
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def run_benchmarks(tiers=("10k", "100k"), stages=STAGES, mode: str = "batch", fmt: str = "csv",
+                   seed: int = 42, repeat: int = 1, timeout: float = STAGE_TIMEOUT_S) -> dict:
+    """Run each stage at each tier in its own process; the fastest of ``repeat`` runs is kept.
+
+    Stages run in pipeline order on files in a scratch directory, so each one
+    reads what the previous one wrote, exactly as ``main.py`` chains them.
+    ``rows`` records how many rows a stage actually processed; a stage that
+    fails is recorded with its error and exit code and ends its tier.
+    """
+    results = {}
+    for tier in tiers:
+        num_assets = TIERS[tier]
+        results[tier] = {}
+        with tempfile.TemporaryDirectory(prefix=f"bench_{tier}_") as workdir:
+            # Unselected stages still run once when a later selected stage needs their output
+            last = max(STAGES.index(stage) for stage in stages)
+            for stage in STAGES[:last + 1]:
+                runs = [measure_stage(stage, workdir, num_assets, mode, fmt, seed, timeout)
+                        for _ in range(repeat if stage in stages else 1)]
+                failed = next((r for r in runs if "error" in r), None)
+                if failed:
+                    # Later stages read this stage's output, so the rest of the tier cannot run
+                    logging.error(f"❌ {tier:>4} {stage:<12} failed (exit code {failed['exitcode']}): {failed['error']}")
+                    results[tier][stage] = failed
+                    break
+                if stage not in stages:
+                    continue
+                best = min(runs, key=lambda r: r["wall_s"])
+                best["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+                results[tier][stage] = {**best, "rows_per_s": best["rows"] / best["wall_s"]}
+                logging.info(
+                    f"⏱️ {tier:>4} {stage:<12} {best['wall_s']:8.2f}s {results[tier][stage]['rows_per_s']:>12,.0f} rows/s "
+                    f"peak {best['peak_rss_mb']:8.1f} MB (+{best['rss_delta_mb']:.1f} MB)"
+                )
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"mode": mode, "format": fmt, "seed": seed, "repeat": repeat},
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.15, memory_threshold: float = None) -> list:
+    """Return the (tier, stage, metric) cells where ``current`` is worse than ``baseline`` by more than the threshold."""
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    if baseline.get("environment") != current.get("environment"):
+        logging.warning("⚠️ Baseline was recorded in a different environment; timings may not be comparable")
+    if baseline.get("settings") != current.get("settings"):
+        logging.warning(f"⚠️ Settings differ: baseline {baseline.get('settings')}, current {current.get('settings')}")
+
+    regressions = []
+    for tier, stages in current["results"].items():
+        for stage, now in stages.items():
+            before = baseline["results"].get(tier, {}).get(stage)
+            if before is None or "error" in before or "error" in now:
+                continue
+            for metric, limit in [("wall_s", threshold), ("peak_rss_mb", memory_threshold)]:
+                change = now[metric] / before[metric] - 1
+                if abs(now[metric] - before[metric]) < NOISE_FLOOR[metric]:
+                    change = 0.0
+                flag = "❌" if change > limit else ("🚀" if change < -limit else "  ")
+                logging.info(f"{flag} {tier:>4} {stage:<12} {metric:<12} {before[metric]:10.2f} -> {now[metric]:10.2f} "
+                             f"({change:+.1%})")
+                if change > limit:
+                    regressions.append({"tier": tier, "stage": stage, "metric": metric,
+                                        "baseline": before[metric], "current": now[metric], "change": change})
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    logging.info(f"📁 Benchmark results saved to: {path}")
+
+
+def failures(results: dict) -> list:
+    return [(tier, stage) for tier, stages in results["results"].items()
+            for stage, result in stages.items() if "error" in result]
+
+
+def bench(tiers, stages, mode, fmt, seed, repeat, output=None, baseline=None, threshold=0.15,
+          memory_threshold=None, timeout=STAGE_TIMEOUT_S) -> int:
+    """Run the suite, save it and, if a baseline exists, compare against it.
+
+    Returns the number of failed stages plus the number of regressions.
+    """
+    results = run_benchmarks(tiers, stages, mode, fmt, seed, repeat, timeout)
+    output = output or os.path.join("reports", "benchmarks", f"bench_{results['created'][:19].replace(':', '')}.json")
+    save_results(results, output)
+    failed = len(failures(results))
+    if failed:
+        logging.error(f"❌ {failed} stage(s) failed: {failures(results)}")
+    if baseline and os.path.exists(baseline):
+        return failed + report_regressions(compare(load_results(baseline), results, threshold, memory_threshold), baseline)
+    return failed
+
+
+def report_regressions(regressions: list, baseline_path: str) -> int:
+    if regressions:
+        logging.error(f"❌ {len(regressions)} regression(s) against {baseline_path}")
+    else:
+        logging.info(f"✅ No regressions against {baseline_path}")
+    return len(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages at scale tiers")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmark suite")
+    run_parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=["10k", "100k"])
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    run_parser.add_argument("--mode", type=str, choices=["rowwise", "batch", "sharded"], default="batch")
+    run_parser.add_argument("--format", type=str, choices=["csv", "parquet", "feather"], default="csv")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept")
+    run_parser.add_argument("--output", type=str, default=None, help="Results file (default: reports/benchmarks/)")
+    run_parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Compare against this baseline")
+    run_parser.add_argument("--threshold", type=float, default=0.15, help="Allowed wall time increase (0.15 = 15%%)")
+    run_parser.add_argument("--memory_threshold", type=float, default=None, help="Allowed peak RSS increase")
+    run_parser.add_argument("--timeout", type=float, default=STAGE_TIMEOUT_S,
+                            help="Seconds before a stage is stopped and recorded as failed")
+
+    compare_parser = sub.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE)
+    compare_parser.add_argument("--current", type=str, required=True)
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.add_argument("--memory_threshold", type=float, default=None)
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.action == "run":
+        failed = bench(args.tiers, args.stages, args.mode, args.format, args.seed, args.repeat, args.output,
+                       args.baseline, args.threshold, args.memory_threshold, args.timeout)
+    else:
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold,
+                              args.memory_threshold)
+        failed = report_regressions(regressions, args.baseline)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# src/bench/importtime.py
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.logs import setup_logging
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DEFAULT_BUDGET = "config/import_budget.json"
+
+# How each entry point starts: its --help parses arguments after every
+# module-level import has run, so this is the cold start before any work
+ENTRY_POINTS = {
+    "main": ["main.py", "--help"],
+    "generate": ["-m", "src.generate.main", "--help"],
+    "generate_base_assets": ["-m", "src.generate.generate_base_assets", "--help"],
+    "inject_noise": ["-m", "src.generate.inject_presence_noise", "--help"],
+    "prepare": ["-m", "src.prepare.main", "--help"],
+    "reconcile": ["-m", "src.reconcile.reconcile", "--help"],
+    "train": ["-m", "src.train.main", "--help"],
+    "train_from_config": ["-m", "src.train.train_from_config", "--help"],
+    "search": ["-m", "src.train.search", "--help"],
+    "score": ["-m", "src.score.score_assets", "--help"],
+    "compile": ["-m", "src.score.compile_model", "--help"],
+    "serve": ["-m", "src.serve.server", "--help"],
+    "load_test": ["-m", "src.serve.load_test", "--help"],
+    "bench": ["-m", "src.bench.benchmark", "--help"],
+    "memory": ["-m", "src.bench.memory", "--help"],
+}
+
+# Third-party packages worth naming when an entry point pulls them in
+HEAVY_PACKAGES = ["pandas", "numpy", "scipy", "sklearn", "joblib", "pyarrow", "matplotlib", "mlflow", "faker"]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> list:
+    """``(module, self_us, cumulative_us, depth)`` per line of ``-X importtime`` output; depth 0 is top level."""
+    imports = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return imports
+
+
+def measure_entry(argv: list) -> dict:
+    """Run one cold start under ``-X importtime``; import time is the sum of the top-level imports."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"{' '.join(argv)} exited with {proc.returncode}: {errors[-1] if errors else ''}")
+    imports = parse_importtime(proc.stderr)
+    top = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])
+    loaded = {module.split(".")[0] for module, *_ in imports}
+    return {
+        "import_ms": sum(i[2] for i in top) / 1000,
+        "wall_ms": wall * 1000,
+        "modules": len(imports),
+        "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in loaded],
+        "slowest": [{"module": module, "cumulative_ms": cumulative / 1000} for module, _, cumulative, _ in top[:5]],
+    }
+
+
+def import_report(entries=None, repeat: int = 3) -> dict:
+    """Measure every entry point ``repeat`` times and keep the fastest run (the others are cache noise)."""
+    unknown = [name for name in entries or [] if name not in ENTRY_POINTS]
+    if unknown:
+        raise ValueError(f"Unknown entry points {unknown} (expected some of {list(ENTRY_POINTS)})")
+    results = {}
+    for name in entries or ENTRY_POINTS:
+        runs = [measure_entry(ENTRY_POINTS[name]) for _ in range(repeat)]
+        results[name] = min(runs, key=lambda r: r["import_ms"])
+        r = results[name]
+        logging.info(f"⏱️ {name:<22} {r['import_ms']:8.1f} ms imports {r['wall_ms']:8.1f} ms wall "
+                     f"{r['modules']:5d} modules  {', '.join(r['heavy']) or '-'}")
+    return {"python": sys.version.split()[0], "repeat": repeat, "entries": results}
+
+
+def check_budget(report: dict, budget: dict) -> list:
+    """Entry points whose import time exceeds their budget in ``budget`` (ms; entries without one are not checked)."""
+    over = []
+    for name, result in report["entries"].items():
+        limit = budget.get(name)
+        if limit is None:
+            continue
+        if result["import_ms"] > limit:
+            slowest = ", ".join(f"{s['module']} {s['cumulative_ms']:.0f} ms" for s in result["slowest"][:3])
+            logging.error(f"❌ {name}: {result['import_ms']:.0f} ms over its {limit} ms budget ({slowest})")
+            over.append({"entry": name, "import_ms": result["import_ms"], "budget_ms": limit})
+        else:
+            logging.info(f"✅ {name}: {result['import_ms']:.0f} ms within its {limit} ms budget")
+    return over
+
+
+def import_time(entries=None, repeat: int = 3, budget_path: str = DEFAULT_BUDGET, output: str = None) -> int:
+    """Write the import-time report and return the number of entry points over budget."""
+    report = import_report(entries, repeat)
+    over = []
+    if budget_path and os.path.exists(budget_path):
+        with open(budget_path, "r") as f:
+            budget = json.load(f)
+        over = check_budget(report, budget)
+        report["budget"] = budget
+        report["over_budget"] = over
+    if output:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"📁 Import-time report saved to: {output}")
+    return len(over)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time per entry point against a budget")
+    parser.add_argument("--entries", nargs="+", choices=list(ENTRY_POINTS), default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="Cold starts per entry point; the fastest is kept")
+    parser.add_argument("--budget", type=str, default=DEFAULT_BUDGET, help="JSON of per-entry budgets in ms")
+    parser.add_argument("--output", type=str, default="reports/benchmarks/import_time.json")
+    args = parser.parse_args()
+    setup_logging()
+    sys.exit(1 if import_time(args.entries, args.repeat, args.budget, args.output) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# src/bench/memory.py
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.compact import memory_report
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
+from src.shared.storage import read_table
+
+
+DEFAULT_INPUT = "data/processed/labeled_asset_dataset_enriched.csv"
+DEFAULT_OUTPUT = "reports/memory/asset_memory.json"
+
+
+def asset_memory(input_path: str = DEFAULT_INPUT, output_path: str = DEFAULT_OUTPUT) -> dict:
+    """Bytes per asset of a table loaded as plain Python objects (before) and compact (after).
+
+    The compact load runs first, so its peak RSS is not inflated by the plain frame.
+    """
+    with span("load_compact") as compact_load:
+        compact = read_table(input_path, compact=True)
+        compact_load.rows = len(compact)
+    with span("load_plain") as plain_load:
+        plain = read_table(input_path, categorical=False)
+        plain_load.rows = len(plain)
+
+    report = {
+        "input": input_path,
+        **memory_report(plain, compact),
+        "load_peak_rss_mb_before": plain_load.peak_mb,
+        "load_peak_rss_mb_after": compact_load.peak_mb,
+    }
+    for col, sizes in report["columns"].items():
+        logging.info(f"🧮 {col:<22} {sizes['before']:7.1f} B -> {sizes['after']:6.1f} B  ({sizes['dtype']})")
+    logging.info(f"✅ {report['rows']} assets: {report['bytes_per_asset_before']:.0f} B/asset -> "
+                 f"{report['bytes_per_asset_after']:.0f} B/asset ({report['reduction']:.1f}x smaller)")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"📁 Memory report saved to: {output_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report in-memory bytes per asset before and after compaction")
+    parser.add_argument("--input", type=str, default=DEFAULT_INPUT, help="Asset table (.csv, .parquet or .feather)")
+    parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    setup_logging()
+    asset_memory(args.input, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# src/generate/allocators.py
+
+import ipaddress
+
+import numpy as np
+
+from src.shared.compact import format_ipv4
+
+FEISTEL_ROUNDS = 4
+MAX_HOST_OFFSETS = 1 << 32
+_HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+
+
+class CapacityError(RuntimeError):
+    """Raised when a request does not fit in the remaining hostname/IP keyspace."""
+
+
+# --- Keyed Permutation ---
+def _feistel(x, half, keys):
+    mask = (np.uint64(1) << half) - np.uint64(1)
+    left = x >> half
+    right = x & mask
+    for r in range(keys.shape[1]):
+        h = (right ^ keys[:, r]) * _HASH_MULT
+        h ^= h >> np.uint64(29)
+        left, right = right, left ^ (h & mask)
+    return (left << half) | right
+
+
+def _feistel_scalar(x: int, half: int, keys) -> int:
+    mask = (1 << half) - 1
+    left, right = x >> half, x & mask
+    for key in keys:
+        h = ((right ^ key) * int(_HASH_MULT)) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 29
+        left, right = right, left ^ (h & mask)
+    return (left << half) | right
+
+
+def keyed_permutation(x, size, keys):
+    """Map ranks ``x`` (each < ``size``) to distinct offsets in ``[0, size)``.
+
+    A balanced Feistel network over the next even power of two, with cycle
+    walking to stay inside ``size``. ``size`` and ``keys`` are per row, so rows
+    from different buckets are permuted in one vectorized call.
+    """
+    x = np.asarray(x, dtype=np.uint64)
+    size = np.asarray(size, dtype=np.uint64)
+    bits = np.frexp(np.maximum(size, 2).astype(np.float64) - 1)[1].astype(np.uint64)
+    half = (bits + np.uint64(1)) // np.uint64(2)
+
+    y = _feistel(x, half, keys)
+    outside = np.flatnonzero(y >= size)
+    while len(outside):
+        y[outside] = _feistel(y[outside], half[outside], keys[outside])
+        outside = outside[y[outside] >= size[outside]]
+    return y
+
+
+def capped_multinomial(n: int, p, caps, rng: np.random.Generator) -> np.ndarray:
+    """Multinomial counts for ``n`` draws where bucket ``i`` holds at most ``caps[i]``.
+
+    Overflow from full buckets is redrawn across the buckets that still have
+    room, in proportion to their weights.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    caps = np.asarray(caps, dtype=np.int64)
+    counts = np.zeros(len(p), dtype=np.int64)
+    while n > 0:
+        weights = p * (caps > counts)
+        if weights.sum() == 0:
+            raise CapacityError(f"{n} draws left but every weighted bucket is full")
+        take = np.minimum(rng.multinomial(n, weights / weights.sum()), caps - counts)
+        counts += take
+        n -= int(take.sum())
+    return counts
+
+
+# --- Allocators ---
+class KeyspaceAllocator:
+    """Hands out distinct offsets from fixed-size buckets without replacement.
+
+    Each bucket keeps only a counter: the k-th allocation is the k-th element
+    of a keyed pseudo-random permutation of that bucket, so a draw is O(1),
+    never collides, and state does not grow as the keyspace fills up.
+    """
+
+    kind = "keyspace"
+
+    def __init__(self, labels, capacities, rng: np.random.Generator):
+        self.labels = list(labels)
+        self.capacity = np.asarray(capacities, dtype=np.int64)
+        self.used = np.zeros(len(self.capacity), dtype=np.int64)
+        self.keys = rng.integers(
+            0, np.iinfo(np.uint64).max, size=(len(self.capacity), FEISTEL_ROUNDS),
+            dtype=np.uint64, endpoint=True
+        )
+
+    @property
+    def remaining(self) -> np.ndarray:
+        return self.capacity - self.used
+
+    def _exhausted(self, i: int, requested: int) -> CapacityError:
+        return CapacityError(
+            f"{self.kind} keyspace exhausted for {self.labels[i]}: "
+            f"{requested} requested, capacity {self.capacity[i]}"
+        )
+
+    def allocate_one(self, bucket: int) -> int:
+        """Scalar fast path for the row-wise generator; same sequence as ``allocate``."""
+        rank = int(self.used[bucket])
+        size = int(self.capacity[bucket])
+        if rank >= size:
+            raise self._exhausted(bucket, rank + 1)
+        self.used[bucket] += 1
+        half = (max(size - 1, 1).bit_length() + 1) // 2
+        keys = [int(k) for k in self.keys[bucket]]
+        y = _feistel_scalar(rank, half, keys)
+        while y >= size:
+            y = _feistel_scalar(y, half, keys)
+        return y
+
+    def allocate(self, buckets) -> np.ndarray:
+        """Allocate one offset per entry of ``buckets`` (bucket indices)."""
+        buckets = np.asarray(buckets, dtype=np.int64)
+        counts = np.bincount(buckets, minlength=len(self.capacity))
+        over = np.flatnonzero(self.used + counts > self.capacity)
+        if len(over):
+            raise self._exhausted(over[0], self.used[over[0]] + counts[over[0]])
+
+        order = np.argsort(buckets, kind="stable")
+        rank = np.empty(len(buckets), dtype=np.int64)
+        rank[order] = np.arange(len(buckets)) - np.repeat(np.cumsum(counts) - counts, counts)
+        rank += self.used[buckets]
+        self.used += counts
+        return keyed_permutation(rank, self.capacity[buckets], self.keys[buckets]).astype(np.int64)
+
+
+class HostnameAllocator(KeyspaceAllocator):
+    """Host numbers ``1 .. 10**num_width - 1`` per (site, role) cell."""
+
+    kind = "hostname"
+
+    def __init__(self, cell_labels, rng: np.random.Generator, num_width: int = 2):
+        if num_width < 1:
+            raise ValueError(f"num_width must be >= 1, got {num_width}")
+        self.num_width = num_width
+        super().__init__(cell_labels, [10 ** num_width - 1] * len(cell_labels), rng)
+
+    def allocate_one(self, cell: int) -> int:
+        return super().allocate_one(cell) + 1
+
+    def allocate(self, cells) -> np.ndarray:
+        return super().allocate(cells) + 1
+
+
+# --- IP Addresses ---
+def host_range(network) -> tuple:
+    """First usable host address (as an int) and usable host count, matching ``network.hosts()``."""
+    first = int(network.network_address)
+    if network.num_addresses <= 2:
+        return first, network.num_addresses
+    if network.version == 4:
+        return first + 1, network.num_addresses - 2
+    return first + 1, network.num_addresses - 1
+
+
+def partition_capacity(window: int, phase: int, stride: int) -> int:
+    """Offsets ``o < window`` with ``o % stride == phase``."""
+    return max(0, -(-(window - phase) // stride))
+
+
+def _sorted_member(values: np.ndarray, sorted_set: np.ndarray) -> np.ndarray:
+    pos = np.minimum(np.searchsorted(sorted_set, values), len(sorted_set) - 1)
+    return sorted_set[pos] == values
+
+
+class IPAllocator(KeyspaceAllocator):
+    """Host addresses inside each region's subnet, as uint32 offsets from its first host.
+
+    Nothing proportional to the subnet is materialized: a /8 or an IPv6 prefix
+    costs the same as a /16 (the allocation window is capped at 2**32 hosts),
+    and offsets only become address strings in ``format``. Addresses already in
+    use elsewhere can be excluded with ``reserve``; they are kept per region as
+    a sorted uint32 array and skipped during allocation.
+
+    ``partition=(phase, stride)`` restricts the allocator to offsets congruent
+    to ``phase`` modulo ``stride``, so independent shards never collide.
+    """
+
+    kind = "IP"
+
+    def __init__(self, labels, subnets, rng: np.random.Generator, partition: tuple = (0, 1)):
+        self.networks = [ipaddress.ip_network(subnet) for subnet in subnets]
+        self.phase, self.stride = partition
+        ranges = [host_range(net) for net in self.networks]
+        self.first_host = [first for first, _ in ranges]
+        capacities = [
+            partition_capacity(min(count, MAX_HOST_OFFSETS), self.phase, self.stride) for _, count in ranges
+        ]
+        super().__init__(labels, capacities, rng)
+        self.reserved = [np.empty(0, dtype=np.uint32) for _ in self.networks]
+        self.skipped = np.zeros(len(self.networks), dtype=np.int64)
+        self._ipv4 = all(net.version == 4 for net in self.networks)
+        if self._ipv4:
+            self._first_host_u32 = np.array(self.first_host, dtype=np.uint32)
+
+    @property
+    def remaining(self) -> np.ndarray:
+        reserved = np.array([len(r) for r in self.reserved], dtype=np.int64)
+        return self.capacity - self.used - (reserved - self.skipped)
+
+    def reserve(self, bucket: int, addresses):
+        """Exclude ``addresses`` (strings or ints) from future allocation in ``bucket``."""
+        if self.used[bucket]:
+            raise ValueError(f"Cannot reserve addresses in {self.labels[bucket]} after allocation started")
+        first = self.first_host[bucket]
+        window = self.phase + int(self.capacity[bucket]) * self.stride
+        offsets = [int(ipaddress.ip_address(a)) - first for a in addresses]
+        offsets = np.array([o for o in offsets if 0 <= o < window and o % self.stride == self.phase], dtype=np.uint32)
+        self.reserved[bucket] = np.union1d(self.reserved[bucket], offsets)
+
+    def allocate_one(self, bucket: int) -> int:
+        if self.remaining[bucket] <= 0:
+            raise self._exhausted(bucket, int(self.capacity[bucket] - self.remaining[bucket]) + 1)
+        reserved = self.reserved[bucket]
+        offset = self.phase + super().allocate_one(bucket) * self.stride
+        while len(reserved) and _sorted_member(np.array([offset], dtype=np.uint32), reserved)[0]:
+            self.skipped[bucket] += 1
+            offset = self.phase + super().allocate_one(bucket) * self.stride
+        return offset
+
+    def _draw(self, buckets) -> np.ndarray:
+        return (self.phase + super().allocate(buckets).astype(np.uint64) * self.stride).astype(np.uint32)
+
+    def allocate(self, buckets) -> np.ndarray:
+        buckets = np.asarray(buckets, dtype=np.int64)
+        counts = np.bincount(buckets, minlength=len(self.capacity))
+        over = np.flatnonzero(counts > self.remaining)
+        if len(over):
+            i = over[0]
+            raise self._exhausted(i, int(self.capacity[i] - self.remaining[i] + counts[i]))
+
+        offsets = self._draw(buckets)
+        for b in np.flatnonzero([len(r) > 0 for r in self.reserved]):
+            rows = np.flatnonzero(buckets == b)
+            while len(rows):
+                rows = rows[_sorted_member(offsets[rows], self.reserved[b])]
+                self.skipped[b] += len(rows)
+                offsets[rows] = self._draw(buckets[rows])
+        return offsets
+
+    def addresses(self, buckets, offsets):
+        """IPv4 addresses for ``offsets`` within ``buckets`` as uint32, or ``None`` for IPv6 subnets."""
+        if not self._ipv4:
+            return None
+        return self._first_host_u32[np.asarray(buckets, dtype=np.int64)] + np.asarray(offsets, dtype=np.uint32)
+
+    def format(self, buckets, offsets) -> np.ndarray:
+        """Address strings for ``offsets`` within ``buckets``; the only place strings are built."""
+        buckets = np.asarray(buckets, dtype=np.int64)
+        if self._ipv4:
+            return format_ipv4(self.addresses(buckets, offsets))
+        return np.array([
+            str(ipaddress.ip_address(self.first_host[b] + int(o))) for b, o in zip(buckets, offsets)
+        ])
+
+    def format_one(self, bucket: int, offset: int) -> str:
+        return str(ipaddress.ip_address(self.first_host[bucket] + offset))
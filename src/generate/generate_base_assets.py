@@ -2,12 +2,10 @@
 
 import os
 import random
+import numpy as np
 import pandas as pd
-from faker import Faker
-import ipaddress
 import logging
 import time
-from functools import lru_cache
 import argparse
 
 from src.shared.constants import (
@@ -20,86 +18,324 @@ from src.shared.constants import (
     SITE_STATE_MAP,
     REGION_SUBNET_MAP
 )
-
-# --- Logging Setup ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%H:%M:%S'
+from src.shared.compact import DERIVED_ATTR, coded, compact_frame, string_column
+from src.shared.instrument import span, traced
+from src.shared.logs import setup_logging
+from src.shared.storage import ENRICHED_COLUMNS, TableWriter
+from src.generate.allocators import (
+    CapacityError,
+    HostnameAllocator,
+    IPAllocator,
+    capped_multinomial
 )
 
-fake = Faker()
-
 
 # --- Utilities ---
-@lru_cache(maxsize=None)
-def get_region_hosts(region):
-    subnet = ipaddress.IPv4Network(REGION_SUBNET_MAP[region])
-    return list(subnet.hosts())
-
-def weighted_choice(choices_dict):
+def weighted_choice(choices_dict, rng=random):
     values, weights = zip(*choices_dict.items())
-    return random.choices(values, weights=weights, k=1)[0]
+    return rng.choices(values, weights=weights, k=1)[0]
 
-def generate_hostname(region: str, role: str) -> str:
-    site_code = random.choice(REGION_SITE_MAP[region])
+def format_hostname(site_code: str, role: str, num: int, num_width: int = 2) -> str:
     state_code = SITE_STATE_MAP[site_code]
     role_code = DEVICE_ROLE_CODES[role]
-    num = str(random.randint(1, 99)).zfill(2)
-    return f"{site_code}{state_code}{role_code}{num}"
+    return f"{site_code}{state_code}{role_code}{str(num).zfill(num_width)}"
 
-def generate_private_ip(region: str) -> str:
-    return str(random.choice(get_region_hosts(region)))
 
+# --- Batch Engine Tables ---
+# Every categorical is sampled as an integer index into these arrays, so a
+# whole batch of rows is a handful of NumPy draws plus table lookups.
+REGIONS = np.array(list(REGION_WEIGHTS))
+REGION_P = np.array(list(REGION_WEIGHTS.values())) / sum(REGION_WEIGHTS.values())
+ROLES = np.array(list(ROLE_WEIGHTS))
+ROLE_P = np.array(list(ROLE_WEIGHTS.values())) / sum(ROLE_WEIGHTS.values())
+STATUSES = np.array([status for status, _ in OBS_STATUS_WEIGHTED])
+STATUS_P = np.array([w for _, w in OBS_STATUS_WEIGHTED]) / sum(w for _, w in OBS_STATUS_WEIGHTED)
+STATUS_CDF = np.cumsum(STATUS_P)
+
+SITES = np.array([site for region in REGIONS for site in REGION_SITE_MAP[region]])
+SITE_COUNT = np.array([len(REGION_SITE_MAP[r]) for r in REGIONS])
+SITE_REGION = np.repeat(np.arange(len(REGIONS)), SITE_COUNT)
+
+VENDOR_MODELS = [pair for role in ROLES for pair in ROLE_VENDOR_MODEL_MAP[role]]
+VENDORS = np.array([vendor for vendor, _ in VENDOR_MODELS])
+MODELS = np.array([model for _, model in VENDOR_MODELS])
+OPTION_START = np.cumsum([0] + [len(ROLE_VENDOR_MODEL_MAP[r]) for r in ROLES])[:-1]
+OPTION_COUNT = np.array([len(ROLE_VENDOR_MODEL_MAP[r]) for r in ROLES])
+
+# (site, role) cells: the unit of hostname uniqueness. Cell i is site
+# i // len(ROLES) with role i % len(ROLES).
+HOST_PREFIXES = np.array([
+    f"{site}{SITE_STATE_MAP[site]}{DEVICE_ROLE_CODES[role]}"
+    for site in SITES for role in ROLES
+])
+CELL_REGION = np.repeat(SITE_REGION, len(ROLES))
+CELL_P = np.tile(ROLE_P, len(SITES)) / np.repeat(SITE_COUNT[SITE_REGION], len(ROLES))
+REGION_CELLS = [np.flatnonzero(CELL_REGION == r) for r in range(len(REGIONS))]
+
+# Lookup tables for the structured columns ``prepare`` would otherwise parse
+# back out of the hostname (see ``structured_columns``)
+ROLE_CODES = np.array([DEVICE_ROLE_CODES[role] for role in ROLES])
+SITE_STATE_CODE, STATE_CODES = pd.factorize(np.array([SITE_STATE_MAP[site] for site in SITES]))
+
+# Rows whose cell order is drawn at once in batch mode; fixed so output does not depend on --chunk_size
+ORDER_BLOCK = 1 << 16
+BASE_COLUMNS = ["ip_address", "hostname", "fqdn", "region", "status", "vendor", "model", "role"]
+
+
+def new_allocators(rng: np.random.Generator, num_width: int = 2):
+    hosts = HostnameAllocator(list(HOST_PREFIXES), rng, num_width)
+    ips = IPAllocator(list(REGIONS), [REGION_SUBNET_MAP[r] for r in REGIONS], rng)
+    return hosts, ips
+
+
+def region_capacity(hosts: HostnameAllocator, ips: IPAllocator) -> np.ndarray:
+    """Assets each region can still take: bounded by free hostnames and free IPs."""
+    free_hosts = np.bincount(CELL_REGION, weights=hosts.remaining, minlength=len(REGIONS))
+    return np.minimum(free_hosts.astype(np.int64), ips.remaining)
+
+
+def check_capacity(num_assets: int, hosts: HostnameAllocator, ips: IPAllocator):
+    available = int(region_capacity(hosts, ips).sum())
+    if num_assets > available:
+        free_hosts, free_ips = int(hosts.remaining.sum()), int(ips.remaining.sum())
+        hint = "Increase --num_width." if free_hosts <= free_ips else "Widen REGION_SUBNET_MAP."
+        raise CapacityError(
+            f"Cannot generate {num_assets} unique assets: only {available} fit. "
+            f"Hostnames: {free_hosts} free ({len(SITES)} sites x {len(ROLES)} role codes x "
+            f"{10 ** hosts.num_width - 1} host numbers); IPs: {free_ips} free in region subnets. {hint}"
+        )
+
+
+def plan_cells(num_assets: int, rng: np.random.Generator, hosts: HostnameAllocator, ips: IPAllocator) -> np.ndarray:
+    """Rows per (site, role) cell: spread over regions and cells by weight, capped by what each still has free."""
+    check_capacity(num_assets, hosts, ips)
+    region_counts = capped_multinomial(num_assets, REGION_P, region_capacity(hosts, ips), rng)
+    cell_counts = np.zeros(len(HOST_PREFIXES), dtype=np.int64)
+    for r, cells in enumerate(REGION_CELLS):
+        cell_counts[cells] = capped_multinomial(region_counts[r], CELL_P[cells], hosts.remaining[cells], rng)
+    return cell_counts
+
+
+def iter_cell_order(cell_counts: np.ndarray, rng: np.random.Generator, block: int = ORDER_BLOCK):
+    """The cell of every planned row in random order, ``block`` rows at a time.
+
+    Each block is a without-replacement draw from the rows still unplaced,
+    shuffled, so the order is fixed by ``rng`` alone and not by how the
+    caller chunks it, and only one block of cells is in memory.
+    """
+    remaining = np.array(cell_counts, dtype=np.int64)
+    left = int(remaining.sum())
+    while left:
+        take = rng.multivariate_hypergeometric(remaining, min(block, left))
+        remaining -= take
+        left -= int(take.sum())
+        yield rng.permutation(np.repeat(np.arange(len(remaining)), take))
+
+
+def rechunk(arrays, size: int):
+    """Regroup a stream of arrays into arrays of ``size`` elements (the last may be shorter)."""
+    buffer, buffered = [], 0
+    for array in arrays:
+        buffer.append(array)
+        buffered += len(array)
+        while buffered >= size:
+            joined = np.concatenate(buffer)
+            yield joined[:size]
+            buffer, buffered = [joined[size:]], buffered - size
+    if buffered:
+        yield np.concatenate(buffer)
+
+
+def sample_cell_assets(cell: np.ndarray, rng: np.random.Generator,
+                       hosts: HostnameAllocator, ips: IPAllocator) -> dict:
+    """Allocate hostname/IP and draw status and vendor/model for rows in ``cell``.
+
+    Each row takes the next two uniforms of ``rng``, so drawing a run's rows
+    in one call or in chunks gives the same values.
+    """
+    num_assets = len(cell)
+    role = cell % len(ROLES)
+    region = CELL_REGION[cell]
+    u = rng.random((num_assets, 2))
+    return {
+        "region": region,
+        "role": role,
+        "cell": cell,
+        "num": hosts.allocate(cell),
+        "ip": ips.allocate(region),
+        "status": np.minimum(np.searchsorted(STATUS_CDF, u[:, 0], side="right"), len(STATUSES) - 1),
+        "option": OPTION_START[role] + (u[:, 1] * OPTION_COUNT[role]).astype(np.int64),
+    }
+
+
+def structured_columns(batch: dict) -> dict:
+    """The enrichment columns for an integer-coded batch, as categoricals over the full code tables."""
+    site = batch["cell"] // len(ROLES)
+    return {
+        "site_code": pd.Categorical.from_codes(site, categories=SITES),
+        "state_code": pd.Categorical.from_codes(SITE_STATE_CODE[site], categories=STATE_CODES),
+        "role_code": pd.Categorical.from_codes(batch["role"], categories=ROLE_CODES),
+        "parsed_role": pd.Categorical.from_codes(batch["role"], categories=ROLES),
+        "parsed_region": pd.Categorical.from_codes(batch["region"], categories=REGIONS),
+    }
+
+
+def build_asset_frame(batch: dict, ips: IPAllocator, num_width: int = 2, enrich: bool = False) -> pd.DataFrame:
+    """Turn an integer-coded batch into the base asset schema, in its compact form.
+
+    ``batch["ip"]`` holds uint32 offsets into each region's subnet; the
+    addresses stay uint32 and the categoricals are built from their codes, so
+    no per-row strings exist except hostnames. ``fqdn`` is derived when the
+    frame is written. ``enrich`` appends the structured columns straight from
+    the codes instead of leaving them to ``prepare``.
+    """
+    addresses = ips.addresses(batch["region"], batch["ip"])
+    hostname = np.char.add(HOST_PREFIXES[batch["cell"]], np.char.zfill(batch["num"].astype(str), num_width))
+    df = pd.DataFrame({
+        "ip_address": addresses if addresses is not None else ips.format(batch["region"], batch["ip"]),
+        "hostname": string_column(pd.Series(hostname, dtype=object)),
+        "region": coded("region", REGIONS, batch["region"]),
+        "status": coded("status", STATUSES, batch["status"]),
+        "vendor": coded("vendor", VENDORS, batch["option"]),
+        "model": coded("model", MODELS, batch["option"]),
+        "role": coded("role", ROLES, batch["role"]),
+    })
+    df.attrs[DERIVED_ATTR] = {"fqdn": 2}
+    if enrich:
+        df = compact_frame(df.assign(**structured_columns(batch)))
+    return df
+
+
+def iter_batch_chunks(num_assets: int, chunk_size: int, seed: int = None, num_width: int = 2,
+                      enrich: bool = False):
+    """Batch-engine chunks. Cell counts are planned once for the whole run, and the
+    plan, the row order and the per-row draws each have their own stream, so a
+    seed gives the same rows for any ``chunk_size``.
+    """
+    plan_seq, order_seq, draw_seq = np.random.SeedSequence(seed).spawn(3)
+    rng = np.random.default_rng(plan_seq)
+    hosts, ips = new_allocators(rng, num_width)
+    cell_counts = plan_cells(num_assets, rng, hosts, ips)
+    draw_rng = np.random.default_rng(draw_seq)
+    order = iter_cell_order(cell_counts, np.random.default_rng(order_seq))
+    for cell in rechunk(order, chunk_size) if num_assets else [np.empty(0, dtype=np.int64)]:
+        yield build_asset_frame(sample_cell_assets(cell, draw_rng, hosts, ips), ips, num_width, enrich)
 
-# --- Core Function ---
-def generate_assets(num_assets: int, output_file: str):
-    seen_ips = set()
-    seen_hostnames = set()
+
+def iter_rowwise_chunks(num_assets: int, chunk_size: int, seed: int = None, num_width: int = 2,
+                        enrich: bool = False):
+    py_rng = random.Random(seed)
+    hosts, ips = new_allocators(np.random.default_rng(seed), num_width)
+    check_capacity(num_assets, hosts, ips)
+    site_index = {site: i for i, site in enumerate(SITES)}
+    role_index = {role: i for i, role in enumerate(ROLES)}
+    region_index = {region: i for i, region in enumerate(REGIONS)}
 
     def generate_unique_asset_row():
-        while True:
-            region = weighted_choice(REGION_WEIGHTS)
-            role = weighted_choice(ROLE_WEIGHTS)
-            hostname = generate_hostname(region, role)
-            ip_address = generate_private_ip(region)
-
-            if hostname in seen_hostnames or ip_address in seen_ips:
-                continue
-
-            seen_hostnames.add(hostname)
-            seen_ips.add(ip_address)
-
-            fqdn = f"{hostname}.{region}.lightspeed.net"
-            status = weighted_choice(dict(OBS_STATUS_WEIGHTED))
-            vendor, model = random.choice(ROLE_VENDOR_MODEL_MAP[role])
-
-            return {
-                "ip_address": ip_address,
-                "hostname": hostname,
-                "fqdn": fqdn,
-                "region": region,
-                "status": status,
-                "vendor": vendor,
-                "model": model,
-                "role": role
-            }
+        # Only regions/roles/sites with free keyspace are eligible, so every
+        # draw succeeds and the allocators never hand out a duplicate.
+        free = region_capacity(hosts, ips)
+        region = weighted_choice({r: w for i, (r, w) in enumerate(REGION_WEIGHTS.items()) if free[i] > 0}, py_rng)
+        sites = REGION_SITE_MAP[region]
+        remaining = hosts.remaining
+        cell_free = {
+            (s, role): remaining[site_index[s] * len(ROLES) + role_index[role]] > 0
+            for s in sites for role in ROLE_WEIGHTS
+        }
+        role = weighted_choice(
+            {ro: w for ro, w in ROLE_WEIGHTS.items() if any(cell_free[s, ro] for s in sites)}, py_rng
+        )
+        site_code = py_rng.choice([s for s in sites if cell_free[s, role]])
 
-    start_time = time.time()
+        num = hosts.allocate_one(site_index[site_code] * len(ROLES) + role_index[role])
+        hostname = format_hostname(site_code, role, num, num_width)
+        region_i = region_index[region]
+        ip_address = ips.format_one(region_i, ips.allocate_one(region_i))
+
+        fqdn = f"{hostname}.{region}.lightspeed.net"
+        status = weighted_choice(dict(OBS_STATUS_WEIGHTED), py_rng)
+        vendor, model = py_rng.choice(ROLE_VENDOR_MODEL_MAP[role])
+
+        row = {
+            "ip_address": ip_address,
+            "hostname": hostname,
+            "fqdn": fqdn,
+            "region": region,
+            "status": status,
+            "vendor": vendor,
+            "model": model,
+            "role": role
+        }
+        if enrich:
+            row.update({
+                "site_code": site_code,
+                "state_code": SITE_STATE_MAP[site_code],
+                "role_code": DEVICE_ROLE_CODES[role],
+                "parsed_role": role,
+                "parsed_region": region
+            })
+        return row
+
+    def frame(rows):
+        return compact_frame(pd.DataFrame(rows, columns=BASE_COLUMNS + (ENRICHED_COLUMNS if enrich else [])))
 
     rows = []
     for i in range(num_assets):
         rows.append(generate_unique_asset_row())
         if (i + 1) % 1000 == 0:
             logging.info(f"{i + 1} assets generated...")
+        if len(rows) == chunk_size:
+            yield frame(rows)
+            rows = []
+    if rows or not num_assets:
+        yield frame(rows)
+
+
+def iter_asset_chunks(num_assets: int, chunk_size: int = 0, mode: str = "rowwise", seed: int = None,
+                      num_width: int = 2, enrich: bool = False):
+    """Yield the dataset as DataFrames of at most ``chunk_size`` rows (0 = one chunk).
+
+    Uniqueness lives entirely in the allocators (a counter per site/role cell
+    and per region), so memory is bounded by the chunk, not by ``num_assets``.
+    ``enrich`` adds the structured site/state/role columns as categoricals.
+    """
+    chunk_size = chunk_size or max(num_assets, 1)
+    if mode == "batch":
+        return iter_batch_chunks(num_assets, chunk_size, seed, num_width, enrich)
+    if mode == "rowwise":
+        return iter_rowwise_chunks(num_assets, chunk_size, seed, num_width, enrich)
+    raise ValueError(f"Unknown generation mode: {mode}")
 
-    df = pd.DataFrame(rows)
-    df.to_csv(output_file, index=False)
+
+def generate_asset_frame(num_assets: int, mode: str = "rowwise", seed: int = None, num_width: int = 2,
+                         enrich: bool = False) -> pd.DataFrame:
+    """The whole base dataset as one in-memory DataFrame."""
+    return pd.concat(list(iter_asset_chunks(num_assets, 0, mode, seed, num_width, enrich)), ignore_index=True)
+
+
+# --- Core Function ---
+def generate_assets(num_assets: int, output_file: str, mode: str = "rowwise", seed: int = None,
+                    num_width: int = 2, chunk_size: int = 0, workers: int = 0, merge: bool = True,
+                    enrich: bool = False):
+    if mode == "sharded":
+        from src.generate.sharded import generate_assets_sharded
+        with span("sharded", rows=num_assets, workers=workers):
+            return generate_assets_sharded(num_assets, output_file, seed, num_width, chunk_size, workers, merge,
+                                           enrich)
+
+    start_time = time.time()
+
+    with TableWriter(output_file) as writer:
+        for chunk in traced(iter_asset_chunks(num_assets, chunk_size, mode, seed, num_width, enrich), "build"):
+            with span("save", rows=len(chunk)):
+                writer.write(chunk)
+            if chunk_size:
+                logging.info(f"💾 {writer.rows}/{num_assets} assets written...")
 
     elapsed = time.time() - start_time
-    logging.info(f"✅ Generated {num_assets} assets in {elapsed:.2f}s")
+    logging.info(f"✅ Generated {num_assets} assets in {elapsed:.2f}s ({num_assets / max(elapsed, 1e-9):,.0f} rows/s)")
     logging.info(f"📁 Output saved to: {output_file}")
-    logging.info(f"🧮 Dataset shape: {df.shape}")
+    logging.info(f"🧮 Dataset shape: {(writer.rows, len(writer.columns))}")
 
 
 # --- Entry Point ---
@@ -115,12 +351,50 @@ def main():
         "--output",
         type=str,
         default="data/raw/base_asset_dataset.csv",
-        help="Path to output CSV file"
+        help="Path to output table (.csv, .parquet or .feather)"
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["rowwise", "batch", "sharded"],
+        default="rowwise",
+        help="Row-by-row generator, vectorized NumPy batch engine, or multi-process sharded batch engine"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed; the same seed always reproduces the same dataset"
+    )
+    parser.add_argument(
+        "--num_width",
+        type=int,
+        default=2,
+        help="Digits in the hostname host number (capacity per site/role is 10**width - 1)"
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=0,
+        help="Stream the dataset to disk in chunks of this many rows (0 = single write)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for --mode sharded (0 = all cores)"
+    )
+    parser.add_argument(
+        "--no_merge",
+        action="store_true",
+        help="With --mode sharded, keep one part file per shard instead of merging"
     )
     args = parser.parse_args()
+    setup_logging()
 
     os.makedirs(os.path.dirname(args.output), exist_ok=True)
-    generate_assets(args.num_assets, args.output)
+    generate_assets(args.num_assets, args.output, args.mode, args.seed, args.num_width, args.chunk_size,
+                    args.workers, not args.no_merge)
 
 
 if __name__ == "__main__":
@@ -10,6 +10,14 @@ import json
 from src.shared.constants import (
     ROLE_VENDOR_MODEL_MAP,
 )
+from src.shared.compact import expand_frame
+from src.shared.instrument import span, traced
+from src.shared.logs import setup_logging
+from src.shared.storage import TableWriter, iter_table, read_table, write_table
+
+IDENTITY_COLUMNS = ["hostname", "ip_address"]
+# exact: per-group failure counts, needs the whole table; hashed: per-row, can stream in chunks
+LABELING_MODES = ["exact", "hashed"]
 
 # --- Load probability config ---
 def load_prob_config(config_path="config/generation_params.json"):
@@ -17,61 +25,123 @@ def load_prob_config(config_path="config/generation_params.json"):
         params = json.load(f)
     return params
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%H:%M:%S'
-)
-
-def inject_noise(input_path: str, output_path: str, seed: int = 42, config_path="config/generation_params.json"):
-    logging.info(f"INJECTING NOISE USING CONFIG: {config_path}")
-    logging.info("🔄 Loading base dataset...")
-    df = pd.read_csv(input_path)
-
-    # Load probabilities from config
-    params = load_prob_config(config_path)
-    INVENTORY_MODEL_MISSING_PROBS = params["INVENTORY_MODEL_MISSING_PROBS"]
-    IPAM_REGION_MISSING_PROBS = params["IPAM_REGION_MISSING_PROBS"]
-    DEFAULT_MODEL_FAILURE_PROB = params["DEFAULT_MODEL_FAILURE_PROB"]
-
-    # --- Inventory Presence Flags ---
-    df["missing_in_inventory"] = 0
-
-    for model, failure_rate in INVENTORY_MODEL_MISSING_PROBS.items():
-        idx = df["model"] == model
-        n = idx.sum()
-        n_fail = int(n * failure_rate)
 
-        if n_fail > 0:
-            fail_indices = df[idx].sample(n=n_fail, random_state=seed).index
-            df.loc[fail_indices, "missing_in_inventory"] = 1
+def missing_prob_tables(params: dict):
+    """Per-model and per-region missing probabilities, with config defaults for anything unlisted."""
+    model_probs = dict(params["INVENTORY_MODEL_MISSING_PROBS"])
+    region_probs = dict(params["IPAM_REGION_MISSING_PROBS"])
+    default_model = params["DEFAULT_MODEL_FAILURE_PROB"]
+    default_region = params.get("DEFAULT_REGION_FAILURE_PROB", 0.0)
 
-    # Fallback for unlisted models
     reference_models = set(model for models in ROLE_VENDOR_MODEL_MAP.values() for _, model in models)
-    for model in reference_models:
-        if model not in INVENTORY_MODEL_MISSING_PROBS:
-            logging.warning(f"⚠️ Model {model} not in INVENTORY_MODEL_MISSING_PROBS — using default {DEFAULT_MODEL_FAILURE_PROB}")
-            idx = df["model"] == model
-            n = idx.sum()
-            n_fail = int(n * DEFAULT_MODEL_FAILURE_PROB)
-            if n_fail > 0:
-                fail_indices = df[idx].sample(n=n_fail, random_state=seed).index
-                df.loc[fail_indices, "missing_in_inventory"] = 1
-
-    # --- IPAM Presence Flags ---
-    df["missing_in_ipam"] = 0
-
-    for region, failure_rate in IPAM_REGION_MISSING_PROBS.items():
-        idx = df["region"] == region
-        n = idx.sum()
-        n_fail = int(n * failure_rate)
-
-        if n_fail > 0:
-            fail_indices = df[idx].sample(n=n_fail, random_state=seed).index
-            df.loc[fail_indices, "missing_in_ipam"] = 1
-
+    for model in sorted(reference_models - set(model_probs)):
+        logging.warning(f"⚠️ Model {model} not in INVENTORY_MODEL_MISSING_PROBS — using default {default_model}")
+    return model_probs, default_model, region_probs, default_region
+
+
+def _group_rates(groups: pd.Series, probs: dict, default: float) -> pd.Series:
+    return groups.astype(object).map(probs).fillna(default).astype(float)
+
+
+def _exact_group_labels(groups: pd.Series, rates: pd.Series, u: np.ndarray) -> np.ndarray:
+    # Within each group, the int(n * rate) rows with the smallest random key
+    # fail: an exact-count sample without replacement for every group at once.
+    codes, uniques = pd.factorize(groups, use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    group_rate = np.zeros(len(uniques))
+    group_rate[codes] = rates.to_numpy()
+    n_fail = (sizes * group_rate).astype(np.int64)
+
+    order = np.lexsort((u, codes))
+    rank = np.empty(len(codes), dtype=np.int64)
+    rank[order] = np.arange(len(codes)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return (rank < n_fail[codes]).astype(np.int8)
+
+
+def label_presence(df: pd.DataFrame, params: dict, seed: int = 42) -> pd.DataFrame:
+    """Assign ``missing_in_inventory`` and ``missing_in_ipam`` in one grouped pass.
+
+    Each model (inventory) and region (IPAM) group gets exactly
+    ``int(n * rate)`` failures, like sampling each group separately.
+    """
+    model_probs, default_model, region_probs, default_region = missing_prob_tables(params)
+    rng = np.random.default_rng(seed)
+    inv_rate = _group_rates(df["model"], model_probs, default_model)
+    ipam_rate = _group_rates(df["region"], region_probs, default_region)
+    df["missing_in_inventory"] = _exact_group_labels(df["model"], inv_rate, rng.random(len(df)))
+    df["missing_in_ipam"] = _exact_group_labels(df["region"], ipam_rate, rng.random(len(df)))
+    return df
+
+
+def _row_uniforms(df: pd.DataFrame, seed: int, salt: str) -> np.ndarray:
+    # Seed-keyed hash of the row identity, mapped to [0, 1). The same row gets
+    # the same value in any chunking or file order. Identities are hashed as
+    # the strings written to file, so compact and plain frames agree.
+    key = f"{seed & 0xFFFFFFFF:08x}{salt}"[:16]
+    identity = expand_frame(df[IDENTITY_COLUMNS]).astype(object)
+    h = pd.util.hash_pandas_object(identity, index=False, hash_key=key).to_numpy()
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def resolve_seed(seed: int = None) -> int:
+    """``seed``, or fresh OS entropy when it is ``None``; hash keys need a concrete value."""
+    return np.random.SeedSequence().entropy if seed is None else seed
+
+
+def label_presence_hashed(df: pd.DataFrame, params: dict, seed: int = 42) -> pd.DataFrame:
+    """Streaming-safe labels: a row fails when its keyed hash falls below its group's rate.
+
+    Depends only on the row itself, so files of any size can be labeled chunk
+    by chunk; failure counts match the configured rates in expectation.
+    A ``None`` seed draws fresh entropy per call: resolve it once with
+    ``resolve_seed`` to label a file's chunks consistently.
+    """
+    seed = resolve_seed(seed)
+    model_probs, default_model, region_probs, default_region = missing_prob_tables(params)
+    inv_rate = _group_rates(df["model"], model_probs, default_model).to_numpy()
+    ipam_rate = _group_rates(df["region"], region_probs, default_region).to_numpy()
+    df["missing_in_inventory"] = (_row_uniforms(df, seed, "inventry") < inv_rate).astype(np.int8)
+    df["missing_in_ipam"] = (_row_uniforms(df, seed, "ipamregn") < ipam_rate).astype(np.int8)
+    return df
+
+
+def inject_noise(input_path: str, output_path: str, seed: int = 42, config_path="config/generation_params.json",
+                 chunk_size: int = 0, labeling: str = "exact"):
+    """Label the base table with ``label_presence`` (``exact``) or ``label_presence_hashed`` (``hashed``).
+
+    Only hashed labels can be streamed in ``chunk_size`` rows; the two modes give different labels.
+    """
+    if labeling not in LABELING_MODES:
+        raise ValueError(f"Unknown labeling mode '{labeling}' (expected one of {LABELING_MODES})")
+    if chunk_size and labeling == "exact":
+        raise ValueError("Exact labeling needs the whole table; use labeling='hashed' to stream in chunks")
+    logging.info(f"INJECTING NOISE USING CONFIG: {config_path}")
+    params = load_prob_config(config_path)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+    if labeling == "hashed" and seed is None:
+        seed = resolve_seed()
+        logging.info(f"🎲 No seed given; labeling with seed {seed}")
+
+    if chunk_size:
+        logging.info(f"🔄 Streaming base dataset in chunks of {chunk_size}...")
+        with TableWriter(output_path) as writer:
+            for chunk in traced(iter_table(input_path, chunk_size, compact=True), "load"):
+                with span("transform", rows=len(chunk)):
+                    labeled = label_presence_hashed(chunk, params, seed)
+                with span("save", rows=len(chunk)):
+                    writer.write(labeled)
+        logging.info(f"✅ Labeled dataset saved to: {output_path}")
+        logging.info(f"🧮 Final shape: {(writer.rows, len(writer.columns))}")
+        return
+
+    logging.info("🔄 Loading base dataset...")
+    with span("load") as load:
+        df = read_table(input_path, compact=True)
+        load.rows = len(df)
+    with span("transform", rows=len(df)):
+        (label_presence_hashed if labeling == "hashed" else label_presence)(df, params, seed)
+    with span("save", rows=len(df)):
+        write_table(df, output_path)
     logging.info(f"✅ Labeled dataset saved to: {output_path}")
     logging.info(f"🧮 Final shape: {df.shape}")
 
@@ -79,7 +149,7 @@ def main():
     parser = argparse.ArgumentParser(description="Inject missing labels into asset dataset")
     parser.add_argument(
         "--input", type=str, default="data/raw/base_asset_dataset.csv",
-        help="Path to base asset CSV file"
+        help="Path to base asset table (.csv, .parquet or .feather)"
     )
     parser.add_argument(
         "--output", type=str, default="data/raw/labeled_asset_dataset.csv",
@@ -93,9 +163,19 @@ def main():
         "--config", type=str, default="config/generation_params.json",
         help="Path to probability config JSON"
     )
+    parser.add_argument(
+        "--labeling", type=str, choices=LABELING_MODES, default="exact",
+        help="exact: int(n * rate) failures per model/region group, in memory; "
+             "hashed: a per-row keyed hash against the group's rate, which can stream (different labels)"
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, default=0,
+        help="Label the file in streaming chunks of this many rows; needs --labeling hashed (0 = one pass)"
+    )
     args = parser.parse_args()
+    setup_logging()
 
-    inject_noise(args.input, args.output, args.seed, args.config)
+    inject_noise(args.input, args.output, args.seed, args.config, args.chunk_size, args.labeling)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
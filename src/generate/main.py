@@ -7,16 +7,12 @@ import logging
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.generate.generate_base_assets import generate_assets
-from src.generate.inject_presence_noise import inject_noise
+from src.shared.constants import FORMAT_EXTENSIONS
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%H:%M:%S"
-)
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description="Generate synthetic asset data.")
     parser.add_argument("--num_assets", type=int, default=11246)
     parser.add_argument("--seed", type=int, default=42)
@@ -25,17 +21,59 @@ def main():
         "--config", type=str, default="config/generation_params.json",
         help="Path to probability config JSON"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--mode", type=str, choices=["rowwise", "batch", "sharded"], default="rowwise",
+        help="Row-by-row generator, vectorized NumPy batch engine, or multi-process sharded batch engine"
+    )
+    parser.add_argument(
+        "--num_width", type=int, default=2,
+        help="Digits in the hostname host number (capacity per site/role is 10**width - 1)"
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, default=0,
+        help="Generate in streaming chunks of this many rows, and label in them with --labeling hashed "
+             "(0 = single in-memory pass)"
+    )
+    parser.add_argument(
+        "--labeling", type=str, choices=["exact", "hashed"], default="exact",
+        help="exact: int(n * rate) failures per model/region group, labeled in memory; "
+             "hashed: a per-row keyed hash against the group's rate, labeled in --chunk_size chunks (different labels)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Worker processes for --mode sharded (0 = all cores)"
+    )
+    parser.add_argument(
+        "--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv",
+        help="Storage format for the base and labeled datasets"
+    )
+    return parser
+
+def run(args):
+    # Imported here so --help does not pay for numpy and pandas
+    from src.generate.generate_base_assets import generate_assets
+    from src.generate.inject_presence_noise import inject_noise
+    from src.shared.storage import table_path
 
     os.makedirs(args.raw_dir, exist_ok=True)
-    base_file = os.path.join(args.raw_dir, "base_asset_dataset.csv")
-    labeled_file = os.path.join(args.raw_dir, "labeled_asset_dataset.csv")
+    base_file = table_path(args.raw_dir, "base_asset_dataset", args.format)
+    labeled_file = table_path(args.raw_dir, "labeled_asset_dataset", args.format)
 
     logging.info("🚀 Starting data generation pipeline...")
-    generate_assets(args.num_assets, base_file)
+    with span("generate_assets", rows=args.num_assets):
+        generate_assets(args.num_assets, base_file, mode=args.mode, seed=args.seed, num_width=args.num_width,
+                        chunk_size=args.chunk_size, workers=args.workers)
     logging.info(f"CALLING inject_noise with config: {args.config}")
-    inject_noise(base_file, labeled_file, args.seed, args.config)
+    with span("inject_noise", rows=args.num_assets):
+        # Exact labels need the whole table, so only hashed labeling streams
+        inject_noise(base_file, labeled_file, args.seed, args.config,
+                     chunk_size=args.chunk_size if args.labeling == "hashed" else 0, labeling=args.labeling)
     logging.info("🏁 Data generation pipeline completed.")
 
+def main():
+    args = build_parser().parse_args()
+    setup_logging()
+    run(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
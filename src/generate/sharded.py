@@ -0,0 +1,150 @@
+# src/generate/sharded.py
+
+import os
+import shutil
+import logging
+import time
+import ipaddress
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.shared.constants import REGION_SUBNET_MAP
+from src.shared.storage import TableWriter, iter_table, read_table, table_format
+from src.generate.allocators import (
+    MAX_HOST_OFFSETS,
+    CapacityError,
+    HostnameAllocator,
+    IPAllocator,
+    capped_multinomial,
+    host_range,
+    partition_capacity
+)
+from src.generate.generate_base_assets import (
+    REGIONS,
+    REGION_P,
+    HOST_PREFIXES,
+    CELL_REGION,
+    CELL_P,
+    REGION_CELLS,
+    build_asset_frame,
+    sample_cell_assets
+)
+
+# One shard per (site, role) cell. Hostnames are unique per cell already; a
+# region's IP offsets are split by stride, so cell j of a region only ever
+# hands out offsets with offset % IP_STRIDE == j and shards never coordinate.
+IP_STRIDE = max(len(cells) for cells in REGION_CELLS)
+CELL_PHASE = np.zeros(len(HOST_PREFIXES), dtype=np.int64)
+for _cells in REGION_CELLS:
+    CELL_PHASE[_cells] = np.arange(len(_cells))
+
+
+def shard_capacity(num_width: int) -> np.ndarray:
+    windows = [
+        min(host_range(ipaddress.ip_network(REGION_SUBNET_MAP[r]))[1], MAX_HOST_OFFSETS) for r in REGIONS
+    ]
+    ip_cap = np.array([
+        partition_capacity(windows[CELL_REGION[c]], CELL_PHASE[c], IP_STRIDE) for c in range(len(HOST_PREFIXES))
+    ])
+    return np.minimum(ip_cap, 10 ** num_width - 1)
+
+
+def plan_shards(num_assets: int, seed: int = None, num_width: int = 2):
+    """Row count and seed for every shard.
+
+    Both depend only on ``seed``: the plan uses the first child of the run's
+    SeedSequence and shard ``i`` gets child ``i + 1``, so output is identical
+    for any number of workers.
+    """
+    plan_seq, *shard_seqs = np.random.SeedSequence(seed).spawn(len(HOST_PREFIXES) + 1)
+    rng = np.random.default_rng(plan_seq)
+
+    cell_cap = shard_capacity(num_width)
+    region_cap = np.bincount(CELL_REGION, weights=cell_cap, minlength=len(REGIONS)).astype(np.int64)
+    if num_assets > region_cap.sum():
+        raise CapacityError(
+            f"Cannot generate {num_assets} unique assets across shards: only {region_cap.sum()} fit "
+            f"with --num_width {num_width}."
+        )
+
+    region_counts = capped_multinomial(num_assets, REGION_P, region_cap, rng)
+    counts = np.zeros(len(HOST_PREFIXES), dtype=np.int64)
+    for r, cells in enumerate(REGION_CELLS):
+        counts[cells] = capped_multinomial(region_counts[r], CELL_P[cells], cell_cap[cells], rng)
+    return counts, shard_seqs
+
+
+def generate_shard(cell: int, count: int, seed_seq, num_width: int, chunk_size: int, part_file: str,
+                   enrich: bool = False) -> int:
+    rng = np.random.default_rng(seed_seq)
+    hosts = HostnameAllocator(list(HOST_PREFIXES), rng, num_width)
+    ips = IPAllocator(list(REGIONS), [REGION_SUBNET_MAP[r] for r in REGIONS], rng,
+                      partition=(int(CELL_PHASE[cell]), IP_STRIDE))
+
+    chunk_size = chunk_size or max(count, 1)
+    with TableWriter(part_file) as writer:
+        # An empty shard still writes one empty chunk, so its file has a header
+        for start in range(0, max(count, 1), chunk_size):
+            cells = np.full(min(chunk_size, count - start), cell)
+            writer.write(build_asset_frame(sample_cell_assets(cells, rng, hosts, ips), ips, num_width, enrich))
+    return count
+
+
+def merge_parts(part_files, output_file: str, chunk_size: int = 1_000_000):
+    """Concatenate part files in shard order.
+
+    CSV parts are byte-copied (keeping only the first header); columnar parts
+    are streamed through a single writer.
+    """
+    if table_format(output_file) != "csv":
+        with TableWriter(output_file) as writer:
+            for part in part_files:
+                for chunk in iter_table(part, chunk_size):
+                    writer.write(chunk)
+            if not writer.columns and part_files:
+                # Only empty parts: keep their schema
+                writer.write(read_table(part_files[0]))
+        return
+
+    with open(output_file, "wb") as out:
+        for i, part in enumerate(part_files):
+            with open(part, "rb") as f:
+                if i:
+                    f.readline()
+                shutil.copyfileobj(f, out)
+
+
+def generate_assets_sharded(num_assets: int, output_file: str, seed: int = None, num_width: int = 2,
+                            chunk_size: int = 0, workers: int = 0, merge: bool = True, enrich: bool = False):
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+
+    counts, shard_seqs = plan_shards(num_assets, seed, num_width)
+    stem, ext = os.path.splitext(output_file)
+    parts_dir = stem + "_parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    shards = [
+        (cell, int(counts[cell]), shard_seqs[cell], num_width, chunk_size,
+         os.path.join(parts_dir, f"part-{cell:05d}{ext}"), enrich)
+        for cell in (np.flatnonzero(counts) if num_assets else [0])
+    ]
+    logging.info(f"🧩 Generating {num_assets} assets in {len(shards)} shards on {workers} worker(s)...")
+
+    if workers == 1:
+        for shard in shards:
+            generate_shard(*shard)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(generate_shard, *zip(*shards)))
+
+    part_files = [shard[5] for shard in shards]
+    if merge:
+        merge_parts(part_files, output_file)
+        shutil.rmtree(parts_dir)
+        logging.info(f"📁 Output saved to: {output_file}")
+    else:
+        logging.info(f"📁 {len(part_files)} part files saved to: {parts_dir}")
+
+    elapsed = time.time() - start_time
+    logging.info(f"✅ Generated {num_assets} assets in {elapsed:.2f}s ({num_assets / max(elapsed, 1e-9):,.0f} rows/s)")
@@ -0,0 +1,163 @@
+# src/pipeline/cache.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import importlib.util
+
+import joblib
+
+ARTIFACT_FILE = "artifact.joblib"
+META_FILE = "meta.json"
+OUTPUTS_DIR = "outputs"
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def code_version(modules) -> str:
+    """Hash of the source files behind ``modules``, without importing them."""
+    h = hashlib.sha256()
+    for module in sorted(modules):
+        h.update(module.encode())
+        h.update(file_digest(importlib.util.find_spec(module).origin).encode())
+    return h.hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+class StageCache:
+    """Content-addressed store of stage artifacts under ``root/<stage>/<fingerprint>``.
+
+    A fingerprint covers the stage's parameters, the contents of the config
+    files it reads, its code version and the artifact hashes of its upstream
+    stages, so a stage is re-run only when something it depends on changed.
+    Files a stage writes itself (models, reports) are kept alongside the
+    artifact and restored on a hit.
+    """
+
+    def __init__(self, root: str = ".cache/pipeline", max_bytes: int = None, max_age_days: float = None,
+                 force: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.force = force
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, stage: str, params: dict, configs, code, upstream) -> str:
+        payload = {
+            "stage": stage,
+            "params": params,
+            "configs": {path: file_digest(path) for path in sorted(configs)},
+            "code": code_version(code),
+            "upstream": list(upstream),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entry(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage, key)
+
+    def load(self, stage: str, key: str):
+        """Return ``(artifact, artifact_hash)`` for a hit, or ``None``."""
+        entry = self._entry(stage, key)
+        meta_path = os.path.join(entry, META_FILE)
+        if self.force or not os.path.exists(meta_path):
+            self.misses += 1
+            logging.info(f"🗃️ Cache miss: {stage} ({key[:12]})")
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        for rel, dest in meta["outputs"].items():
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            shutil.copy2(os.path.join(entry, OUTPUTS_DIR, rel), dest)
+        meta["last_used"] = time.time()
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+        self.hits += 1
+        logging.info(f"🗃️ Cache hit: {stage} ({key[:12]}) — skipping")
+        return joblib.load(os.path.join(entry, ARTIFACT_FILE)), meta["artifact_hash"]
+
+    def store(self, stage: str, key: str, artifact, outputs=()) -> str:
+        """Save an artifact plus the files the stage wrote; returns the artifact hash."""
+        entry = self._entry(stage, key)
+        tmp = entry + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(os.path.join(tmp, OUTPUTS_DIR))
+
+        artifact_path = os.path.join(tmp, ARTIFACT_FILE)
+        joblib.dump(artifact, artifact_path)
+        saved = {}
+        for i, path in enumerate(p for p in outputs if os.path.exists(p)):
+            rel = f"{i}_{os.path.basename(path)}"
+            shutil.copy2(path, os.path.join(tmp, OUTPUTS_DIR, rel))
+            saved[rel] = path
+
+        now = time.time()
+        meta = {
+            "stage": stage,
+            "key": key,
+            "artifact_hash": file_digest(artifact_path),
+            "outputs": saved,
+            "created": now,
+            "last_used": now,
+        }
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return meta["artifact_hash"]
+
+    def evict(self):
+        """Drop entries older than ``max_age_days``, then least recently used ones over ``max_bytes``."""
+        if not os.path.isdir(self.root):
+            return
+        entries = []
+        for stage in os.listdir(self.root):
+            for key in os.listdir(os.path.join(self.root, stage)):
+                entry = os.path.join(self.root, stage, key)
+                meta_path = os.path.join(entry, META_FILE)
+                if not os.path.exists(meta_path):
+                    shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                with open(meta_path) as f:
+                    last_used = json.load(f)["last_used"]
+                entries.append((last_used, _dir_size(entry), entry))
+
+        entries.sort()
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            for entry in [e for e in entries if e[0] < cutoff]:
+                shutil.rmtree(entry[2], ignore_errors=True)
+                entries.remove(entry)
+                removed += 1
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            while entries and total > self.max_bytes:
+                _, size, path = entries.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+        if removed:
+            logging.info(f"🧹 Evicted {removed} cache entries from {self.root}")
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        logging.info(f"🗃️ Cache stats: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)")
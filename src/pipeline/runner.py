@@ -0,0 +1,223 @@
+# src/pipeline/runner.py
+
+import logging
+import tempfile
+import time
+
+import pandas as pd
+
+from src.shared.instrument import span
+from src.shared.storage import ENRICHED_COLUMNS, read_table, table_path, write_table
+
+
+# Every stage reads and writes its tables through these, so a change to them changes its output
+STAGE_CODE = ["src.pipeline.runner", "src.shared.compact", "src.shared.storage"]
+
+
+class Stage:
+    """One pipeline step: ``fn(ctx, *upstream_results)`` returns the stage's artifact.
+
+    ``output(ctx)`` names the file the artifact is spilled to, if any. For the
+    stage cache, ``params(ctx)`` returns the arguments the artifact depends on,
+    ``configs(ctx)`` the config files it reads, ``code`` the modules that
+    implement it and ``writes(ctx)`` any files the stage saves itself.
+    """
+
+    def __init__(self, name, fn, deps=(), output=None, params=None, configs=None, code=(), writes=None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.output = output
+        self.params = params or (lambda ctx: {})
+        self.configs = configs or (lambda ctx: [])
+        self.code = list(dict.fromkeys(STAGE_CODE + list(code)))
+        self.writes = writes or (lambda ctx: [])
+
+
+class PipelineRunner:
+    """Runs stages in dependency order in one process, handing artifacts over in memory.
+
+    With a ``StageCache``, a stage whose fingerprint is already cached is
+    loaded instead of run.
+    """
+
+    def __init__(self, stages, spill: bool = False, cache=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.spill = spill
+        self.cache = cache
+        self.hashes = {}
+
+    def order(self, targets=None):
+        ordered, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            ordered.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return ordered
+
+    def run_stage(self, stage, ctx, inputs):
+        if self.cache is None:
+            return stage.fn(ctx, *inputs)
+
+        key = self.cache.fingerprint(stage.name, stage.params(ctx), stage.configs(ctx), stage.code,
+                                     [self.hashes[dep] for dep in stage.deps])
+        with span("cache_load"):
+            hit = self.cache.load(stage.name, key)
+        if hit is not None:
+            result, self.hashes[stage.name] = hit
+            return result
+
+        result = stage.fn(ctx, *inputs)
+        with span("cache_store"):
+            self.hashes[stage.name] = self.cache.store(stage.name, key, result, stage.writes(ctx))
+        return result
+
+    def run(self, ctx, targets=None) -> dict:
+        results = {}
+        for name in self.order(targets):
+            stage = self.stages[name]
+            start_time = time.time()
+            with span(name, profile=True) as current:
+                results[name] = self.run_stage(stage, ctx, [results[dep] for dep in stage.deps])
+                if isinstance(results[name], pd.DataFrame):
+                    current.rows = len(results[name])
+                if self.spill and stage.output:
+                    with span("spill", rows=current.rows):
+                        write_table(results[name], stage.output(ctx))
+                    logging.info(f"💾 Spilled {name} to: {stage.output(ctx)}")
+            logging.info(f"⏱️ Stage {name} finished in {time.time() - start_time:.2f}s")
+        if self.cache is not None:
+            self.cache.log_stats()
+            self.cache.evict()
+        return results
+
+
+# --- Stages ---
+def generate_stage(ctx, enrich: bool = False):
+    from src.generate.generate_base_assets import generate_assets, generate_asset_frame
+    if ctx.mode != "sharded":
+        return generate_asset_frame(ctx.num_assets, ctx.mode, ctx.seed, ctx.num_width, enrich)
+    # Sharded workers hand their rows back through part files
+    with tempfile.TemporaryDirectory() as tmp:
+        base_file = table_path(tmp, "base_asset_dataset", ctx.format)
+        generate_assets(ctx.num_assets, base_file, mode="sharded", seed=ctx.seed, num_width=ctx.num_width,
+                        chunk_size=ctx.chunk_size, workers=ctx.workers, enrich=enrich)
+        return read_table(base_file, compact=True)
+
+
+def label_stage(ctx, base):
+    from src.generate.inject_presence_noise import label_presence, load_prob_config
+    logging.info(f"INJECTING NOISE USING CONFIG: {ctx.config}")
+    return label_presence(base.copy(deep=False), load_prob_config(ctx.config), ctx.seed)
+
+
+def prepare_stage(ctx, labeled):
+    from src.prepare.generate_lightspeed_assets import enrich_frame
+    return enrich_frame(labeled.copy(deep=False))
+
+
+def fused_stage(ctx):
+    """Generate with the structured columns already filled in, then label: no hostname parsing."""
+    df = label_stage(ctx, generate_stage(ctx, enrich=True))
+    # Same column order as generate -> inject_noise -> prepare; drop categories this run never drew
+    from src.prepare.generate_lightspeed_assets import add_subnet_columns
+    df = df[[c for c in df.columns if c not in ENRICHED_COLUMNS] + ENRICHED_COLUMNS]
+    for col in ENRICHED_COLUMNS:
+        df[col] = df[col].cat.remove_unused_categories()
+    return add_subnet_columns(df)
+
+
+def train_stage(config_attr):
+    def train(ctx, enriched):
+        from src.train.train_from_config import load_config, train_from_frame
+        return train_from_frame(enriched, load_config(getattr(ctx, config_attr)))
+    return train
+
+
+def train_outputs(config_attr):
+    def writes(ctx):
+        from src.train.incremental import versions_path
+        from src.train.train_from_config import load_config
+        config = load_config(getattr(ctx, config_attr))
+        paths = [
+            config.get("output_model", "models/model.joblib"),
+            config.get("output_encoder", "models/encoder.joblib"),
+            config.get("output_report"),
+            config.get("output_plot"),
+            versions_path(config),
+        ]
+        return [p for p in paths if p]
+    return writes
+
+
+GENERATE_CODE = [
+    "src.generate.generate_base_assets", "src.generate.allocators", "src.generate.sharded",
+    "src.shared.constants", "src.shared.compact", "src.shared.storage"
+]
+
+
+def generate_params(ctx) -> dict:
+    # Worker count and storage format do not change the generated rows
+    return {"num_assets": ctx.num_assets, "seed": ctx.seed, "mode": ctx.mode,
+            "num_width": ctx.num_width, "chunk_size": ctx.chunk_size}
+
+
+def build_pipeline(spill: bool = False, cache=None, fused: bool = False) -> PipelineRunner:
+    def train(config_attr):
+        return dict(
+            configs=lambda ctx: [getattr(ctx, config_attr)],
+            code=["src.train.train_from_config", "src.train.incremental", "src.shared.encoder"],
+            writes=train_outputs(config_attr),
+        )
+
+    enriched_output = lambda ctx: table_path(ctx.processed_dir, "labeled_asset_dataset_enriched", ctx.format)
+
+    if fused:
+        data_stages = [
+            Stage("prepare", fused_stage, output=enriched_output,
+                  params=lambda ctx: {**generate_params(ctx), "fused": True},
+                  configs=lambda ctx: [ctx.config],
+                  code=GENERATE_CODE + ["src.generate.inject_presence_noise", "src.prepare.generate_lightspeed_assets",
+                                       "src.shared.subnets"]),
+        ]
+    else:
+        data_stages = [
+            Stage("generate", generate_stage,
+                  output=lambda ctx: table_path(ctx.raw_dir, "base_asset_dataset", ctx.format),
+                  params=generate_params,
+                  code=GENERATE_CODE),
+            Stage("inject_noise", label_stage, deps=["generate"],
+                  output=lambda ctx: table_path(ctx.raw_dir, "labeled_asset_dataset", ctx.format),
+                  params=lambda ctx: {"seed": ctx.seed},
+                  configs=lambda ctx: [ctx.config],
+                  code=["src.generate.inject_presence_noise"]),
+            Stage("prepare", prepare_stage, deps=["inject_noise"], output=enriched_output,
+                  code=["src.prepare.generate_lightspeed_assets", "src.shared.subnets"]),
+        ]
+
+    return PipelineRunner(data_stages + [
+        Stage("train_inventory", train_stage("inventory_config"), deps=["prepare"], **train("inventory_config")),
+        Stage("train_ipam", train_stage("ipam_config"), deps=["prepare"], **train("ipam_config")),
+    ], spill=spill, cache=cache)
+
+
+def run_pipeline(ctx, spill: bool = True, cache=None, fused: bool = False) -> dict:
+    """Generate, label, enrich and train both models in this process.
+
+    ``fused`` replaces generate -> inject_noise -> prepare with one stage that
+    emits the structured columns during generation.
+    """
+    logging.info("🚀 Starting in-process pipeline...")
+    if cache is not None and ctx.seed is None:
+        logging.warning("⚠️ No --seed given; generated data is not reproducible, so the stage cache is off.")
+        cache = None
+    results = build_pipeline(spill, cache, fused).run(ctx)
+    logging.info("🏁 Pipeline completed.")
+    return results
@@ -0,0 +1,186 @@
+# src/pipeline/sweep.py
+
+import os
+import glob
+import json
+import time
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.runner import GENERATE_CODE, PipelineRunner, Stage, generate_params, generate_stage
+from src.shared.instrument import span
+from src.shared.storage import ENRICHED_COLUMNS
+
+
+# Columns the presence labels are drawn from
+LABEL_GROUP_COLUMNS = ["model", "region"]
+TOP_FEATURES = 5
+
+
+def scenario_paths(paths) -> list:
+    """Expand directories to the ``*.json`` files they contain; keep files as given."""
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded += sorted(glob.glob(os.path.join(path, "*.json")))
+        else:
+            expanded.append(path)
+    return list(dict.fromkeys(expanded))
+
+
+def scenario_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# --- Base Dataset ---
+def base_stage(ctx):
+    """Generated assets with the enriched columns filled in; labels are the only per-scenario part."""
+    from src.prepare.generate_lightspeed_assets import add_subnet_columns
+    df = generate_stage(ctx, enrich=True)
+    for col in ENRICHED_COLUMNS:
+        df[col] = df[col].cat.remove_unused_categories()
+    return add_subnet_columns(df)
+
+
+def build_base(ctx, cache=None) -> pd.DataFrame:
+    runner = PipelineRunner([
+        Stage("sweep_base", base_stage, params=generate_params,
+              code=GENERATE_CODE + ["src.pipeline.sweep", "src.prepare.generate_lightspeed_assets", "src.shared.subnets"]),
+    ], cache=cache)
+    return runner.run(ctx)["sweep_base"]
+
+
+# --- Worker Processes ---
+_shared = None
+
+def _init_worker(groups: pd.DataFrame, matrices: dict, seed: int):
+    global _shared
+    _shared = {
+        "groups": groups,
+        "matrices": {key: (np.load(path, mmap_mode="r"), names) for key, (path, names) in matrices.items()},
+        "seed": seed,
+    }
+
+
+def model_metrics(clf, X, y_test, y_pred, feature_names) -> dict:
+    from sklearn.metrics import classification_report, roc_auc_score
+    positive = classification_report(y_test, y_pred, output_dict=True, zero_division=0).get("1", {})
+    metrics = {
+        "precision": positive.get("precision", 0.0),
+        "recall": positive.get("recall", 0.0),
+        "f1": positive.get("f1-score", 0.0),
+        "accuracy": float((y_test.to_numpy() == y_pred).mean()),
+        "roc_auc": None,
+    }
+    if len(clf.classes_) == 2 and y_test.nunique() == 2:
+        proba = clf.predict_proba(X[y_test.index.to_numpy()])[:, list(clf.classes_).index(1)]
+        metrics["roc_auc"] = float(roc_auc_score(y_test, proba))
+    top = np.argsort(clf.feature_importances_)[::-1][:TOP_FEATURES]
+    metrics["top_features"] = [str(feature_names[i]) for i in top]
+    return metrics
+
+
+def run_scenario(path: str, model_configs: list) -> dict:
+    """Label the shared base with one probability config and fit every model on it."""
+    from src.generate.inject_presence_noise import label_presence, load_prob_config
+    from src.train.train_from_config import fit_model
+
+    start_time = time.time()
+    labels = label_presence(_shared["groups"].copy(), load_prob_config(path), _shared["seed"])
+    result = {"scenario": scenario_name(path), "config": path, "models": {}}
+    for config in model_configs:
+        X, feature_names = _shared["matrices"][tuple(config["features"])]
+        y = labels[config["label"]]
+        fit_start = time.time()
+        clf, y_test, y_pred = fit_model(X, y, config, n_jobs=1)
+        result["models"][config["label"]] = {
+            "positive_rate": float(y.mean()),
+            **model_metrics(clf, X, y_test, y_pred, feature_names),
+            "fit_time_s": time.time() - fit_start,
+        }
+    result["wall_time_s"] = time.time() - start_time
+    return result
+
+
+# --- Sweep ---
+def comparison_table(results: list) -> pd.DataFrame:
+    rows = []
+    for result in results:
+        for label, metrics in result["models"].items():
+            rows.append({"scenario": result["scenario"], "label": label,
+                         **{k: v for k, v in metrics.items() if k != "top_features"},
+                         "top_features": ";".join(metrics["top_features"])})
+    return pd.DataFrame(rows)
+
+
+def sweep(ctx, scenario_configs, model_config_paths, output_dir: str = "reports/scenarios", cache=None) -> dict:
+    """Generate one base dataset, then label and train every scenario config against it.
+
+    Every scenario uses ``ctx.seed``, so differences between scenarios come
+    from their probabilities alone. The base is built (or loaded from the
+    stage cache) once and its features encoded once; worker processes share
+    the encoded matrix through a memory map and only label and fit.
+    """
+    from src.train.train_from_config import encode_features, load_config
+
+    paths = scenario_paths(scenario_configs)
+    if not paths:
+        raise ValueError(f"No scenario configs found in {list(scenario_configs)}")
+    names = [scenario_name(p) for p in paths]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Scenario config file names must be unique: {names}")
+    model_configs = [load_config(path) for path in model_config_paths]
+    workers = min(ctx.workers or os.cpu_count() or 1, len(paths))
+
+    start_time = time.time()
+    logging.info(f"🧪 Sweeping {len(paths)} scenarios over one base dataset of {ctx.num_assets} assets...")
+    base = build_base(ctx, cache).reset_index(drop=True)
+    base_time = time.time() - start_time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrices = {}
+        for config in model_configs:
+            key = tuple(config["features"])
+            if key not in matrices:
+                encoder, X = encode_features(base, config["features"])
+                path = os.path.join(tmp, f"X{len(matrices)}.npy")
+                np.save(path, X)
+                matrices[key] = (path, list(encoder.feature_names))
+        groups = base[LABEL_GROUP_COLUMNS].copy()
+        del base
+
+        initargs = (groups, matrices, ctx.seed)
+        with span("scenarios", scenarios=len(paths), workers=workers):
+            if workers == 1:
+                _init_worker(*initargs)
+                results = [run_scenario(path, model_configs) for path in paths]
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                    results = list(pool.map(run_scenario, paths, [model_configs] * len(paths)))
+    elapsed = time.time() - start_time
+
+    for result in results:
+        summary = ", ".join(
+            f"{label} rate {m['positive_rate']:.3f} f1 {m['f1']:.3f}" for label, m in result["models"].items()
+        )
+        logging.info(f"📊 {result['scenario']}: {summary}")
+
+    report = {
+        "num_assets": ctx.num_assets,
+        "seed": ctx.seed,
+        "base_time_s": base_time,
+        "wall_time_s": elapsed,
+        "scenarios": results,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "scenario_comparison.json")
+    with open(json_path, "w") as f:
+        json.dump(report, f, indent=2)
+    comparison_table(results).to_csv(os.path.join(output_dir, "scenario_comparison.csv"), index=False)
+    logging.info(f"✅ {len(paths)} scenarios in {elapsed:.2f}s (base dataset {base_time:.2f}s) on {workers} worker(s)")
+    logging.info(f"📁 Comparison report saved to: {json_path}")
+    return report
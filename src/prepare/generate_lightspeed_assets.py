@@ -1,35 +1,114 @@
 # src/prepare/generate_lightspeed_assets.py
 
 import os
-import pandas as pd
 import argparse
-from src.shared.constants import DEVICE_ROLE_CODES, REGION_SITE_MAP
+import functools
+import numpy as np
+import pandas as pd
+from src.shared.compact import VOCABULARIES, vocab_categorical
+from src.shared.constants import DEVICE_ROLE_CODES, REGION_SITE_MAP, REGION_SUBNET_MAP
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
+from src.shared.storage import ENRICHED_COLUMNS, FORMAT_EXTENSIONS, read_table, table_path, write_table
+from src.shared.subnets import SubnetIndex
 
-def enrich_assets(raw_dir, processed_dir):
-    INPUT_FILE = os.path.join(raw_dir, "labeled_asset_dataset.csv")
-    OUTPUT_FILE = os.path.join(processed_dir, "labeled_asset_dataset_enriched.csv")
-    os.makedirs(processed_dir, exist_ok=True)
+ROLE_CODE_TO_NAME = {v: k for k, v in DEVICE_ROLE_CODES.items()}
+SITE_TO_REGION = {
+    site: region
+    for region, sites in REGION_SITE_MAP.items()
+    for site in sites
+}
+
+# Hostnames are fixed-width: SSS (site) + ST (state) + RC (role code) + host number
+PREFIX_WIDTH = 7
+
+
+def _categorical(values: list, codes: np.ndarray) -> pd.Categorical:
+    # values[i] belongs to prefix i; missing values (and missing prefixes) become NaN
+    value_codes, categories = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    value_codes = np.append(value_codes, -1)
+    return pd.Categorical.from_codes(value_codes[codes], categories=categories)
 
-    ROLE_CODE_TO_NAME = {v: k for k, v in DEVICE_ROLE_CODES.items()}
-    SITE_TO_REGION = {
-        site: region
-        for region, sites in REGION_SITE_MAP.items()
-        for site in sites
+
+def parse_hostnames(hostnames: pd.Series) -> dict:
+    """Structured columns for each hostname, as categoricals.
+
+    Hostnames are cut to their fixed-width prefix in one NumPy cast and
+    factorized; only the few distinct prefixes are sliced and looked up in
+    Python, so no per-row intermediate string columns are built.
+    """
+    missing = hostnames.isna().to_numpy()
+    values = hostnames.fillna("") if missing.any() else hostnames
+    codes, prefixes = pd.factorize(np.asarray(values.to_numpy(), dtype=f"U{PREFIX_WIDTH}"))
+    codes = np.where(missing, len(prefixes), codes)
+
+    sites = [p[0:3] for p in prefixes]
+    role_codes = [p[5:7] for p in prefixes]
+    columns = {
+        "site_code": _categorical(sites, codes),
+        "state_code": _categorical([p[3:5] for p in prefixes], codes),
+        "role_code": _categorical(role_codes, codes),
+        "parsed_role": _categorical([ROLE_CODE_TO_NAME.get(rc) for rc in role_codes], codes),
+        "parsed_region": _categorical([SITE_TO_REGION.get(site) for site in sites], codes),
     }
+    return {col: columns[col] for col in ENRICHED_COLUMNS}
+
+
+@functools.lru_cache(maxsize=None)
+def region_subnets() -> SubnetIndex:
+    return SubnetIndex.from_map(REGION_SUBNET_MAP)
 
-    df = pd.read_csv(INPUT_FILE)
-    df["site_code"] = df["hostname"].str[0:3]
-    df["state_code"] = df["hostname"].str[3:5]
-    df["role_code"] = df["hostname"].str[5:7]
-    df["parsed_role"] = df["role_code"].map(ROLE_CODE_TO_NAME)
-    df["parsed_region"] = df["site_code"].map(SITE_TO_REGION)
-    df.to_csv(OUTPUT_FILE, index=False)
+
+def region_mismatch(a, b) -> np.ndarray:
+    """1 where both region columns are known and disagree, else 0 (compared by code, not string)."""
+    a = vocab_categorical(pd.Series(a, copy=False), VOCABULARIES["region"])
+    b = vocab_categorical(pd.Series(b, copy=False), VOCABULARIES["region"])
+    categories = a.cat.categories.union(b.cat.categories, sort=False)
+    a_codes = a.cat.set_categories(categories).cat.codes.to_numpy()
+    b_codes = b.cat.set_categories(categories).cat.codes.to_numpy()
+    return ((a_codes >= 0) & (b_codes >= 0) & (a_codes != b_codes)).astype(np.int8)
+
+
+def add_subnet_columns(df, subnets: SubnetIndex = None):
+    """``ip_region`` from the subnet index, and whether it disagrees with the recorded region
+    (``ip_region_mismatch``) or the hostname's site (``site_region_mismatch``)."""
+    ip_region = (region_subnets() if subnets is None else subnets).regions(df["ip_address"])
+    df["ip_region"] = ip_region
+    df["ip_region_mismatch"] = region_mismatch(df["region"], ip_region)
+    df["site_region_mismatch"] = region_mismatch(df["parsed_region"], ip_region)
+    return df
+
+
+def enrich_frame(df, subnets: SubnetIndex = None):
+    for col, values in parse_hostnames(df["hostname"]).items():
+        df[col] = values
+    return add_subnet_columns(df, subnets)
+
+def enrich_assets(raw_dir, processed_dir, fmt="csv", subnets_path=None):
+    INPUT_FILE = table_path(raw_dir, "labeled_asset_dataset", fmt)
+    OUTPUT_FILE = table_path(processed_dir, "labeled_asset_dataset_enriched", fmt)
+    os.makedirs(processed_dir, exist_ok=True)
+
+    with span("load") as load:
+        df = read_table(INPUT_FILE, compact=True)
+        load.rows = len(df)
+    subnets = SubnetIndex.from_file(subnets_path) if subnets_path else None
+    with span("transform", rows=len(df)):
+        df = enrich_frame(df, subnets)
+    with span("save", rows=len(df)):
+        write_table(df, OUTPUT_FILE)
     print(f"✅ Enriched dataset written to: {OUTPUT_FILE}")
 
-if __name__ == "__main__":
+def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--raw_dir", type=str, default="data/raw", help="Path to the raw data directory")
     parser.add_argument("--processed_dir", type=str, default="data/processed", help="Path to the processed data directory")
+    parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv", help="Storage format for input and output tables")
+    parser.add_argument("--subnets", type=str, default=None, help="IPAM prefix table (prefix, region columns) for ip_region; default REGION_SUBNET_MAP")
     args = parser.parse_args()
+    setup_logging()
 
-    enrich_assets(args.raw_dir, args.processed_dir)
\ No newline at end of file
+    enrich_assets(args.raw_dir, args.processed_dir, args.format, args.subnets)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,11 +1,11 @@
 # src/prepare/main.py
 
+import os
 import sys
-import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.prepare.generate_lightspeed_assets import main
 
 if __name__ == "__main__":
-    # Forward all CLI arguments to the module
-    subprocess.run(
-        [sys.executable, "-m", "src.prepare.generate_lightspeed_assets", *sys.argv[1:]],
-        check=True
-    )
\ No newline at end of file
+    main()
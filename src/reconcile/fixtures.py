@@ -0,0 +1,124 @@
+# src/reconcile/fixtures.py
+
+import os
+import sys
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.compact import LABEL_COLUMNS, expand_frame, format_ipv4
+from src.shared.constants import REGION_SUBNET_MAP
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
+from src.shared.storage import TableWriter, iter_table
+
+DEFAULT_FIXTURE_DIR = "data/fixtures"
+# Share of export rows that are stale records for assets nobody discovered
+STALE_RATE = 0.02
+# Stale records sit outside every region's subnet and site code, so they never match a discovered asset
+STALE_BASE_IP = 0xAC100000  # 172.16.0.0
+STALE_PREFIX = "ZZZXXST"
+
+
+def stale_assets(start: int, n: int) -> pd.DataFrame:
+    ids = np.arange(start, start + n)
+    hostnames = pd.Series([f"{STALE_PREFIX}{i}" for i in ids], dtype=object)
+    return pd.DataFrame({
+        "ip_address": format_ipv4(STALE_BASE_IP + ids.astype(np.uint32)).astype(object),
+        "hostname": hostnames,
+        "fqdn": hostnames + ".retired.lightspeed.net",
+        "region": None,
+        "status": "retired",
+        "vendor": "Unknown",
+        "model": "Unknown",
+    })
+
+
+def inventory_export(assets: pd.DataFrame, rng) -> pd.DataFrame:
+    """A CMDB-style export: its own column names, mixed-case hostnames, gaps in DNS name and IP.
+
+    Every row keeps at least one usable key, as a record that still
+    identifies its device would.
+    """
+    u = rng.random(len(assets))
+    hostname = assets["hostname"].where(u >= 0.05, "")
+    hostname = hostname.where(rng.random(len(assets)) >= 0.3, hostname.str.lower())
+    dns_name = assets["fqdn"].where(u >= 0.25, "")
+    dns_name = dns_name.where(rng.random(len(assets)) >= 0.2, dns_name + ".")
+    return pd.DataFrame({
+        "device_name": hostname,
+        "dns_name": dns_name,
+        "mgmt_ip": assets["ip_address"].where((u < 0.05) | (u >= 0.15), ""),
+        "manufacturer": assets["vendor"],
+        "model": assets["model"],
+        "lifecycle": assets["status"],
+    })
+
+
+def ipam_export(assets: pd.DataFrame, rng) -> pd.DataFrame:
+    """An IPAM export: one row per address, DNS names blank or upper-cased in places."""
+    u = rng.random(len(assets))
+    dns_name = assets["fqdn"].where(u >= 0.3, "")
+    dns_name = dns_name.where(u < 0.9, dns_name.str.upper())
+    return pd.DataFrame({
+        "address": assets["ip_address"],
+        "dns_name": dns_name,
+        "subnet": assets["region"].astype(object).map(REGION_SUBNET_MAP).fillna(""),
+        "state": "assigned",
+    })
+
+
+EXPORTS = {"inventory": ("missing_in_inventory", inventory_export), "ipam": ("missing_in_ipam", ipam_export)}
+
+
+def write_fixtures(labeled_path: str, output_dir: str = DEFAULT_FIXTURE_DIR, seed: int = 42,
+                   chunk_size: int = 100_000) -> dict:
+    """Stand-ins for the discovery, inventory and IPAM systems, derived from a labeled dataset.
+
+    Assets labeled ``missing_in_inventory`` (``missing_in_ipam``) are left out
+    of that export; the rest appear with the source's column names, key
+    formatting and gaps, shuffled in with stale records. Reconciling the
+    fixtures reproduces the labels exactly.
+    """
+    paths = {"discovered": os.path.join(output_dir, "discovered_assets.csv")}
+    paths.update({name: os.path.join(output_dir, f"{name}_export.csv") for name in EXPORTS})
+    writers = {name: TableWriter(path) for name, path in paths.items()}
+    n_stale = 0
+    try:
+        with span("fixtures") as fixtures:
+            for i, chunk in enumerate(iter_table(labeled_path, chunk_size)):
+                rng = np.random.default_rng([seed, i])
+                chunk = expand_frame(chunk)
+                writers["discovered"].write(chunk.drop(columns=LABEL_COLUMNS))
+                for name, (label, export) in EXPORTS.items():
+                    present = chunk[chunk[label] == 0].reset_index(drop=True)
+                    stale = stale_assets(n_stale, int(len(present) * STALE_RATE))
+                    n_stale += len(stale)
+                    rows = pd.concat([export(present, rng), export(stale, rng)], ignore_index=True)
+                    writers[name].write(rows.iloc[rng.permutation(len(rows))])
+            fixtures.rows = writers["discovered"].rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    for name, path in paths.items():
+        logging.info(f"🧪 {name:<10} {writers[name].rows:>10,} rows: {path}")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write discovery, inventory and IPAM export fixtures")
+    parser.add_argument("--input", type=str, default="data/raw/labeled_asset_dataset.csv",
+                        help="Labeled dataset whose labels the fixtures encode")
+    parser.add_argument("--output_dir", type=str, default=DEFAULT_FIXTURE_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    setup_logging()
+    write_fixtures(args.input, args.output_dir, args.seed)
+
+
+if __name__ == "__main__":
+    main()
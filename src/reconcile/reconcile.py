@@ -0,0 +1,216 @@
+# src/reconcile/reconcile.py
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.compact import fqdn, parse_ipv4_rows, string_column
+from src.shared.constants import FORMAT_EXTENSIONS
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
+from src.shared.storage import TableWriter, iter_table, table_path
+
+DEFAULT_CONFIG = "config/reconcile.json"
+JOIN_KEYS = ["hostname", "fqdn", "ip_address"]
+# Which discovered label each export decides
+SOURCE_LABELS = {"inventory": "missing_in_inventory", "ipam": "missing_in_ipam"}
+# Keys of non-IPv4 addresses are hashes with the top bit set, so they never equal a uint32 address
+_HASHED_IP = np.uint64(1 << 63)
+
+
+def load_config(config_path: str) -> dict:
+    with open(config_path, "r") as f:
+        return json.load(f)
+
+
+# --- Join Keys ---
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_array(values.fillna("").to_numpy(dtype=object))
+
+
+def _present(values: pd.Series) -> np.ndarray:
+    return (values.notna() & (values != "")).to_numpy(dtype=bool)
+
+
+def hostname_keys(values: pd.Series) -> tuple:
+    """``(keys, valid)``: hostnames upper-cased and cut at the first dot, hashed to uint64."""
+    values = string_column(values.astype(object)).str.strip().str.upper().str.replace(r"\..*", "", regex=True)
+    return _hash(values), _present(values)
+
+
+def fqdn_keys(values: pd.Series) -> tuple:
+    """``(keys, valid)``: FQDNs lower-cased without the trailing root dot, hashed to uint64."""
+    values = string_column(values.astype(object)).str.strip().str.lower().str.rstrip(".")
+    return _hash(values), _present(values)
+
+
+def ip_keys(values: pd.Series) -> tuple:
+    """``(keys, valid)``: IPv4 addresses as their uint32 value; other addresses (IPv6) hashed."""
+    ips, ipv4 = parse_ipv4_rows(values)
+    keys = ips.astype(np.uint64)
+    if ipv4.all():
+        return keys, ipv4
+    values = string_column(values.astype(object)).str.strip()
+    valid = ipv4 | _present(values)
+    other = valid & ~ipv4
+    if other.any():
+        keys[other] = _hash(values[other].str.lower()) | _HASHED_IP
+    return keys, valid
+
+
+KEY_FUNCTIONS = {"hostname": hostname_keys, "fqdn": fqdn_keys, "ip_address": ip_keys}
+
+
+class KeyIndex:
+    """Sorted unique uint64 keys of one join column, built a chunk at a time.
+
+    Only the keys are kept (8 bytes per distinct value), never the export's
+    rows, and pending chunks are merged once they pass ``merge_rows`` so
+    duplicates do not pile up. Lookups are a binary search of each
+    discovered chunk against the sorted keys: a sorted-merge join.
+    """
+
+    def __init__(self, merge_rows: int = 1_000_000):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.merge_rows = merge_rows
+        self._pending = []
+        self._pending_rows = 0
+
+    def add(self, keys: np.ndarray):
+        self._pending.append(keys)
+        self._pending_rows += len(keys)
+        if self._pending_rows >= self.merge_rows:
+            self._merge()
+
+    def _merge(self):
+        if self._pending:
+            self.keys = np.unique(np.concatenate([self.keys, *self._pending]))
+            self._pending, self._pending_rows = [], 0
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        self._merge()
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool)
+        idx = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[idx] == keys
+
+    @property
+    def nbytes(self) -> int:
+        self._merge()
+        return self.keys.nbytes
+
+
+# --- Reconciliation ---
+def build_indexes(source: dict, chunk_size: int) -> tuple:
+    """Stream one export into a ``KeyIndex`` per join key; returns ``(indexes, rows)``."""
+    columns = source.get("columns", {})
+    keys = source.get("keys", JOIN_KEYS)
+    names = [columns.get(key, key) for key in keys]
+    indexes = {key: KeyIndex() for key in keys}
+    rows = 0
+    for chunk in iter_table(source["path"], chunk_size, columns=names):
+        for key, name in zip(keys, names):
+            values, valid = KEY_FUNCTIONS[key](chunk[name])
+            indexes[key].add(values[valid])
+        rows += len(chunk)
+    return indexes, rows
+
+
+def discovered_keys(chunk: pd.DataFrame, key: str) -> tuple:
+    if key == "fqdn" and "fqdn" not in chunk.columns:
+        # Compact chunks derive fqdn from hostname and region instead of storing it
+        return fqdn_keys(fqdn(chunk))
+    return KEY_FUNCTIONS[key](chunk[key])
+
+
+def reconcile(config: dict, output_path: str) -> dict:
+    """Label discovered assets by whether the inventory and IPAM exports know them.
+
+    Each export is streamed once into sorted key indexes: the normalized
+    hostname, the FQDN and the IP. Then the discovered assets are streamed,
+    and an asset is ``missing_in_<source>`` when none of its keys appear in
+    that source. Output rows keep the discovered columns and add the two
+    labels, which is the schema ``inject_noise`` writes and ``prepare``
+    reads. Memory is bounded by the key indexes and one chunk.
+    """
+    chunk_size = config.get("chunk_size", 100_000)
+    start_time = time.time()
+    indexes, source_rows = {}, {}
+    for source, label in SOURCE_LABELS.items():
+        with span(f"index_{source}") as index_span:
+            indexes[source], source_rows[source] = build_indexes(config[source], chunk_size)
+            index_span.rows = source_rows[source]
+        logging.info(f"🗂️ Indexed {source_rows[source]:,} {source} rows on {list(indexes[source])} "
+                     f"({sum(i.nbytes for i in indexes[source].values()) / 1e6:.1f} MB of keys)")
+
+    matched = {source: {key: 0 for key in indexes[source]} for source in SOURCE_LABELS}
+    missing = {label: 0 for label in SOURCE_LABELS.values()}
+    rows = 0
+    with span("join") as join, TableWriter(output_path) as writer:
+        for chunk in iter_table(config["discovered"]["path"], chunk_size, compact=True):
+            keys = {key: discovered_keys(chunk, key) for key in JOIN_KEYS}
+            for source, label in SOURCE_LABELS.items():
+                found = np.zeros(len(chunk), dtype=bool)
+                for key, index in indexes[source].items():
+                    values, valid = keys[key]
+                    hit = valid & index.contains(values)
+                    matched[source][key] += int(hit.sum())
+                    found |= hit
+                chunk[label] = (~found).astype(np.int8)
+                missing[label] += int((~found).sum())
+            writer.write(chunk)
+            rows += len(chunk)
+        join.rows = rows
+    elapsed = time.time() - start_time
+
+    for label, count in missing.items():
+        logging.info(f"🔎 {label}: {count:,} of {rows:,} discovered assets ({count / max(rows, 1):.1%})")
+    total_rows = rows + sum(source_rows.values())
+    logging.info(f"✅ Reconciled {total_rows:,} rows in {elapsed:.2f}s ({total_rows / elapsed:,.0f} rows/s): {output_path}")
+    return {
+        "output": output_path,
+        "rows": {"discovered": rows, **source_rows},
+        "missing": missing,
+        "matched_by_key": matched,
+        "index_mb": {s: sum(i.nbytes for i in idx.values()) / 1e6 for s, idx in indexes.items()},
+        "wall_time_s": elapsed,
+        "rows_per_s": total_rows / elapsed,
+        "peak_rss_mb": join.peak_mb,
+    }
+
+
+def reconcile_from_config(config_path: str = DEFAULT_CONFIG, raw_dir: str = "data/raw", fmt: str = "csv",
+                          report_path: str = None) -> dict:
+    config = load_config(config_path)
+    output_path = table_path(raw_dir, "labeled_asset_dataset", fmt)
+    report = reconcile(config, output_path)
+    report_path = report_path or config.get("output_report")
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"📁 Reconciliation report saved to: {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label discovered assets against inventory and IPAM exports")
+    parser.add_argument("--config", type=str, default=DEFAULT_CONFIG, help="Source paths and column mappings")
+    parser.add_argument("--raw_dir", type=str, default="data/raw", help="Where the labeled dataset is written")
+    parser.add_argument("--format", type=str, choices=list(FORMAT_EXTENSIONS), default="csv")
+    parser.add_argument("--report", type=str, default=None, help="Override the config's output_report")
+    args = parser.parse_args()
+    setup_logging()
+    reconcile_from_config(args.config, args.raw_dir, args.format, args.report)
+
+
+if __name__ == "__main__":
+    main()
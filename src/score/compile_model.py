@@ -0,0 +1,150 @@
+# src/score/compile_model.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.pipeline.cache import file_digest
+from src.shared.encoder import load_encoder
+from src.shared.logs import setup_logging
+from src.shared.storage import read_table
+from src.train.train_from_config import load_config
+
+
+# A table over every category combination is only practical for low-cardinality features
+MAX_CELLS = 5_000_000
+PREDICT_BATCH = 100_000
+
+
+def compiled_path(config: dict) -> str:
+    model_path = config.get("output_model", "models/model.joblib")
+    return config.get("output_compiled", os.path.splitext(model_path)[0] + "_compiled.joblib")
+
+
+class CompiledModel:
+    """A classifier's ``predict_proba`` precomputed for every combination of feature codes.
+
+    Axis ``i`` of ``table`` has one slot per training category of feature
+    ``i`` plus a last slot for unseen values, so any encoded row is a single
+    flat index into the table and scoring is integer arithmetic and a gather.
+    A numeric feature's last slot means missing; rows with numeric values not
+    seen in training are not covered (see ``CategoricalEncoder.unseen_values``).
+    """
+
+    def __init__(self, encoder, table: np.ndarray, classes, model_digest: str = None):
+        self.encoder = encoder
+        self.table = table
+        self.classes_ = np.asarray(classes)
+        self.model_digest = model_digest
+        self.dims = np.array(table.shape[:-1], dtype=np.int64)
+        self.strides = np.concatenate([np.cumprod(self.dims[::-1])[::-1][1:], [1]])
+
+    def flat_index(self, codes: np.ndarray) -> np.ndarray:
+        codes = codes.astype(np.int64)
+        codes = np.where(codes < 0, self.dims - 1, codes)
+        return codes @ self.strides
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        return self.table.reshape(-1, len(self.classes_))[self.flat_index(self.encoder.ordinal(df))]
+
+
+def all_codes(dims) -> np.ndarray:
+    """Every code combination in table (C) order; the last code of each axis means unseen (-1)."""
+    grid = np.indices(dims).reshape(len(dims), -1).T
+    return np.where(grid == np.array(dims) - 1, -1, grid)
+
+
+def compile_model(model, encoder, model_digest: str = None, max_cells: int = MAX_CELLS) -> CompiledModel:
+    dims = [int(n) + 1 for n in encoder.sizes]
+    cells = int(np.prod(dims))
+    if cells > max_cells:
+        raise ValueError(
+            f"Cannot compile: {cells:,} feature combinations exceed the {max_cells:,} cell limit "
+            f"(category counts {list(encoder.sizes)})"
+        )
+
+    codes = all_codes(dims)
+    names = getattr(model, "feature_names_in_", None)
+    proba = np.empty((cells, len(model.classes_)))
+    for start in range(0, cells, PREDICT_BATCH):
+        X = encoder.one_hot(codes[start:start + PREDICT_BATCH])
+        if names is not None:
+            X = pd.DataFrame(X, columns=names)
+        proba[start:start + PREDICT_BATCH] = model.predict_proba(X)
+    return CompiledModel(encoder, proba.reshape(dims + [len(model.classes_)]), model.classes_, model_digest)
+
+
+def check_equivalence(compiled: CompiledModel, model, df: pd.DataFrame, tol: float = 1e-12) -> float:
+    """Max |compiled - predict_proba| over ``df`` plus a copy with unseen/missing values; raises above ``tol``."""
+    encoder = compiled.encoder
+    probe = df[encoder.features].astype(object).copy()
+    if len(probe):
+        # Exercise the unseen and missing slots of every feature; numeric ones only take the missing slot exactly
+        categorical = [i for i, col in enumerate(encoder.features) if col not in encoder.numeric]
+        probe.iloc[0::3, categorical] = "__unseen__"
+        probe.iloc[1::3] = np.nan
+    frames = [df[compiled.encoder.features], probe]
+
+    worst = 0.0
+    for frame in frames:
+        X = encoder.transform(frame)
+        if hasattr(model, "feature_names_in_"):
+            X = pd.DataFrame(X, columns=model.feature_names_in_)
+        worst = max(worst, float(np.abs(compiled.predict_proba(frame) - model.predict_proba(X)).max(initial=0.0)))
+    if worst > tol:
+        raise AssertionError(f"Compiled model differs from predict_proba by {worst:.3g} (tolerance {tol:g})")
+    return worst
+
+
+def compile_from_config(config_path: str, check_input: str = None) -> str:
+    config = load_config(config_path)
+    model_path = config.get("output_model", "models/model.joblib")
+    model = joblib.load(model_path)
+    encoder = load_encoder(config.get("output_encoder", "models/encoder.joblib"), config["features"])
+
+    start_time = time.time()
+    compiled = compile_model(model, encoder, file_digest(model_path))
+    logging.info(
+        f"🧱 Compiled {model_path}: {compiled.table.shape[:-1]} table "
+        f"({compiled.table.nbytes / 1024:,.0f} KiB) in {time.time() - start_time:.2f}s"
+    )
+
+    check_input = check_input or config.get("input", config["input_csv"])
+    if os.path.exists(check_input):
+        df = read_table(check_input, columns=config["features"])
+        worst = check_equivalence(compiled, model, df)
+        logging.info(f"✅ Equivalent to predict_proba on {len(df)} rows (+ unseen/missing probes): max diff {worst:.3g}")
+    else:
+        logging.warning(f"⚠️ {check_input} not found; skipped the equivalence check")
+
+    output = compiled_path(config)
+    joblib.dump(compiled, output)
+    logging.info(f"📁 Compiled model saved to: {output}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile trained models into category-code lookup tables")
+    parser.add_argument("--configs", nargs="+", default=["config/inventory_full.json", "config/ipam_full.json"])
+    parser.add_argument("--check_input", type=str, default=None,
+                        help="Table to verify the compiled models against (default: each config's input)")
+    args = parser.parse_args()
+    setup_logging()
+
+    for config_path in args.configs:
+        compile_from_config(config_path, args.check_input)
+
+
+if __name__ == "__main__":
+    # Run through the package module so pickled CompiledModels reference
+    # src.score.compile_model rather than __main__
+    from src.score.compile_model import main
+    main()
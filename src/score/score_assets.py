@@ -0,0 +1,176 @@
+# src/score/score_assets.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.encoder import load_encoder
+from src.shared.instrument import span, traced
+from src.shared.logs import setup_logging
+from src.shared.storage import TableWriter, iter_table, table_format
+from src.train.train_from_config import load_config
+
+
+# Carried from the input to the scores file when present
+ID_COLUMNS = ["hostname", "ip_address"]
+
+# Below this many rows, forests are evaluated tree by tree: predict_proba's
+# per-call dispatch and validation (~12ms) would otherwise dominate
+SMALL_BATCH = 2048
+
+
+class Scorer:
+    """A trained model plus its encoder; ``score(df)`` returns P(label == 1) per row.
+
+    If the model has a compiled lookup table built from this exact model file,
+    scoring uses the table instead of the forest.
+    """
+
+    def __init__(self, config: dict, use_compiled: bool = True):
+        from src.score.compile_model import compiled_path
+        from src.pipeline.cache import file_digest
+
+        self.label = config["label"]
+        self.features = config["features"]
+        model_path = config.get("output_model", "models/model.joblib")
+        self.model = joblib.load(model_path)
+        self.encoder = load_encoder(config.get("output_encoder", "models/encoder.joblib"), self.features)
+        # Chunks are the unit of parallelism; one tree thread per process
+        self.model.n_jobs = 1
+        self.positive = list(self.model.classes_).index(1)
+        # Loading the model has imported sklearn by now
+        from sklearn.ensemble import RandomForestClassifier
+        self.forest = isinstance(self.model, RandomForestClassifier)
+
+        self.compiled = None
+        if use_compiled and os.path.exists(compiled_path(config)):
+            compiled = joblib.load(compiled_path(config))
+            if compiled.model_digest == file_digest(model_path):
+                self.compiled = compiled
+            else:
+                logging.warning(f"⚠️ {compiled_path(config)} was compiled from a different model; ignoring it")
+
+    def _forest_proba(self, X):
+        proba = np.zeros((len(X), len(self.model.classes_)))
+        for tree in self.model.estimators_:
+            counts = tree.tree_.predict(X)
+            proba += counts / counts.sum(axis=1, keepdims=True)
+        return proba / len(self.model.estimators_)
+
+    def score(self, df: pd.DataFrame):
+        if self.compiled is not None:
+            proba = self.compiled.predict_proba(df)[:, self.positive]
+            # Numeric values the table has no slot for go to the model
+            rows = np.flatnonzero(self.encoder.unseen_values(df))
+            if len(rows):
+                proba[rows] = self._model_score(df.iloc[rows])
+            return proba
+        return self._model_score(df)
+
+    def _model_score(self, df: pd.DataFrame):
+        X = self.encoder.transform(df)
+        if len(X) <= SMALL_BATCH and self.forest:
+            return self._forest_proba(X)[:, self.positive]
+        if hasattr(self.model, "feature_names_in_"):
+            # Models trained before the fitted encoder expect named columns
+            X = pd.DataFrame(X, columns=self.model.feature_names_in_)
+        return self.model.predict_proba(X)[:, self.positive]
+
+
+def load_scorers(config_paths, use_compiled: bool = True) -> list:
+    return [Scorer(load_config(path), use_compiled) for path in config_paths]
+
+
+def score_chunk(scorers, chunk: pd.DataFrame) -> pd.DataFrame:
+    out = chunk[[col for col in ID_COLUMNS if col in chunk.columns]].copy()
+    for scorer in scorers:
+        out[f"{scorer.label}_score"] = scorer.score(chunk)
+    return out
+
+
+# --- Worker Processes ---
+_scorers = None
+
+def _init_worker(config_paths):
+    global _scorers
+    _scorers = load_scorers(config_paths)
+
+def _score_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return score_chunk(_scorers, chunk)
+
+
+def iter_scored_chunks(chunks, config_paths, workers: int):
+    """Score chunks in input order, keeping at most ``2 * workers`` in flight."""
+    if workers == 1:
+        scorers = load_scorers(config_paths)
+        for chunk in chunks:
+            yield score_chunk(scorers, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_paths,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_in_worker, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_assets(input_path: str, output_path: str, config_paths, chunk_size: int = 200_000, workers: int = 0):
+    """Stream ``input_path`` in chunks, score it with every model and append the scores to ``output_path``.
+
+    Only the identity and feature columns are read, and memory is bounded by
+    ``chunk_size`` times the number of chunks in flight, not by the file size.
+    """
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+    configs = [load_config(path) for path in config_paths]
+    features = list(dict.fromkeys(col for config in configs for col in config["features"]))
+
+    # CSV can be read for a subset of columns only if they exist; probe the header
+    if table_format(input_path) == "csv":
+        header = pd.read_csv(input_path, nrows=0).columns
+    else:
+        header = next(iter_table(input_path, 1)).columns
+    columns = [col for col in ID_COLUMNS if col in header] + features
+
+    logging.info(f"🎯 Scoring {input_path} with {len(configs)} models on {workers} worker(s)...")
+    with TableWriter(output_path) as writer:
+        chunks = traced(iter_table(input_path, chunk_size, columns), "load")
+        for scored in traced(iter_scored_chunks(chunks, list(config_paths), workers), "score"):
+            with span("save", rows=len(scored)):
+                writer.write(scored)
+            logging.info(f"💾 {writer.rows} assets scored...")
+
+    elapsed = time.time() - start_time
+    logging.info(f"✅ Scored {writer.rows} assets in {elapsed:.2f}s ({writer.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    logging.info(f"📁 Scores saved to: {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score an asset table with the trained inventory and IPAM models")
+    parser.add_argument("--input", type=str, default="data/processed/labeled_asset_dataset_enriched.csv")
+    parser.add_argument("--output", type=str, default="data/scored/asset_risk_scores.csv")
+    parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    parser.add_argument("--chunk_size", type=int, default=200_000, help="Rows per scoring chunk")
+    parser.add_argument("--workers", type=int, default=0, help="Scoring processes (0 = all cores)")
+    args = parser.parse_args()
+    setup_logging()
+
+    score_assets(args.input, args.output, [args.inventory_config, args.ipam_config], args.chunk_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# src/serve/load_test.py
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.serve.server import LatencyHistogram
+from src.shared.logs import setup_logging
+from src.shared.storage import read_table
+
+
+RECORD_COLUMNS = ["hostname", "ip_address", "region", "status", "vendor", "model", "role"]
+
+
+async def _request(reader, writer, host: str, method: str, path: str, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _client(host, port, records, requests: int, batch: int, latency: LatencyHistogram, rng, failures: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            sample = rng.sample(records, batch)
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", "/score", sample[0] if batch == 1 else sample)
+            latency.observe(time.perf_counter() - start)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, records: list, concurrency: int, requests: int, batch: int, seed: int):
+    latency, failures = LatencyHistogram(), []
+    rng = random.Random(seed)
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, records, n, batch, latency, random.Random(rng.random()), failures) for n in per_client
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, host, "GET", "/metrics")
+    writer.close()
+    return {
+        "requests": requests,
+        "failures": len(failures),
+        "concurrency": concurrency,
+        "records_per_request": batch,
+        "elapsed_s": elapsed,
+        "requests_per_s": requests / elapsed,
+        "rows_per_s": requests * batch / elapsed,
+        "client_latency": latency.summary(),
+        "server": server_metrics,
+    }
+
+
+def load_records(path: str, limit: int = 10_000) -> list:
+    df = read_table(path, categorical=False)
+    df = df[[col for col in RECORD_COLUMNS if col in df.columns]].head(limit)
+    return df.to_dict(orient="records")
+
+
+def load_test(host: str = "127.0.0.1", port: int = 8080, input_path: str = "data/processed/labeled_asset_dataset_enriched.csv",
+              concurrency: int = 32, requests: int = 2000, batch: int = 1, seed: int = 42) -> dict:
+    report = asyncio.run(run_load(host, port, load_records(input_path), concurrency, requests, batch, seed))
+    client = report["client_latency"]
+    logging.info(
+        f"📈 {report['requests']} requests ({report['failures']} failed) in {report['elapsed_s']:.2f}s: "
+        f"{report['requests_per_s']:,.0f} req/s, {report['rows_per_s']:,.0f} rows/s, "
+        f"p50 {client['p50_ms']:.2f}ms, p99 {client['p99_ms']:.2f}ms, "
+        f"mean server batch {report['server']['mean_batch_rows']:.1f} rows"
+    )
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the local scoring service")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--input", type=str, default="data/processed/labeled_asset_dataset_enriched.csv",
+                        help="Asset table to sample request records from")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests to send")
+    parser.add_argument("--batch", type=int, default=1, help="Asset records per request")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    setup_logging()
+
+    load_test(args.host, args.port, args.input, args.concurrency, args.requests, args.batch, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# src/serve/server.py
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.score.score_assets import ID_COLUMNS, load_scorers
+from src.shared.logs import setup_logging
+
+
+# Record values a request may carry; anything else (lists, objects) is rejected with a 400
+SCALAR_TYPES = (str, int, float, bool, type(None))
+# Log-spaced latency buckets from 50us to ~50s
+LATENCY_BUCKETS = np.logspace(np.log10(5e-5), np.log10(50.0), 61)
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets; percentiles are reported as the bucket's upper bound."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = np.zeros(len(bounds) + 1, dtype=np.int64)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[np.searchsorted(self.bounds, seconds)] += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> float:
+        n = int(self.counts.sum())
+        if n == 0:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q / 100 * n))
+        return float(self.bounds[min(i, len(self.bounds) - 1)])
+
+    def summary(self) -> dict:
+        n = int(self.counts.sum())
+        return {
+            "count": n,
+            "mean_ms": 1000 * self.total / n if n else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p90_ms": 1000 * self.percentile(90),
+            "p99_ms": 1000 * self.percentile(99),
+        }
+
+
+class MicroBatcher:
+    """Merges records from concurrent requests into one ``predict_proba`` call per model.
+
+    The first waiting request opens a batch; it closes after ``max_wait_ms``
+    or once ``max_batch`` records are queued. Scoring runs on a single worker
+    thread so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, scorers, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.scorers = scorers
+        self.features = list(dict.fromkeys(col for s in scorers for col in s.features))
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.rows = 0
+        self.batch_latency = LatencyHistogram()
+
+    async def score(self, records: list) -> list:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    def _score_batch(self, records: list) -> list:
+        df = pd.DataFrame.from_records(records).reindex(columns=list(dict.fromkeys(ID_COLUMNS + self.features)))
+        scores = {f"{s.label}_score": s.score(df) for s in self.scorers}
+        return [
+            {**{col: rec.get(col) for col in ID_COLUMNS if col in rec},
+             **{name: float(values[i]) for name, values in scores.items()}}
+            for i, rec in enumerate(records)
+        ]
+
+    def _settle(self, future, result=None, error=None):
+        # A client that disconnected leaves its future cancelled
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            records = [rec for recs, _ in pending for rec in recs]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self._score_batch, records)
+            except Exception as e:
+                if len(pending) == 1:
+                    self._settle(pending[0][1], error=e)
+                    continue
+                # One request broke the batch: score them one at a time so only it fails
+                logging.warning(f"⚠️ Batch of {len(pending)} requests failed ({e}); scoring them one at a time")
+                for recs, future in pending:
+                    try:
+                        self._settle(future, await loop.run_in_executor(self.executor, self._score_batch, recs))
+                    except Exception as err:
+                        self._settle(future, error=err)
+                continue
+            self.batch_latency.observe(time.perf_counter() - start)
+            self.batches += 1
+            self.rows += len(records)
+
+            offset = 0
+            for recs, future in pending:
+                self._settle(future, results[offset:offset + len(recs)])
+                offset += len(recs)
+
+
+class ScoringService:
+    """Minimal HTTP/1.1 keep-alive server over asyncio streams.
+
+    ``POST /score`` takes one asset record or a list of them and returns the
+    scores in the same shape; ``GET /metrics`` reports request latency
+    percentiles and throughput; ``GET /health`` reports readiness.
+    """
+
+    def __init__(self, scorers, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.batcher = MicroBatcher(scorers, max_batch, max_wait_ms)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def metrics(self) -> dict:
+        uptime = time.time() - self.started
+        b = self.batcher
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rows_scored": b.rows,
+            "batches": b.batches,
+            "mean_batch_rows": b.rows / b.batches if b.batches else 0.0,
+            "requests_per_s": self.requests / uptime,
+            "rows_per_s": b.rows / uptime,
+            "request_latency": self.latency.summary(),
+            "batch_latency": b.batch_latency.summary(),
+        }
+
+    async def route(self, method: str, path: str, body: bytes):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return 200, self.metrics()
+        if method == "POST" and path == "/score":
+            payload = json.loads(body or b"null")
+            single = isinstance(payload, dict)
+            records = [payload] if single else payload
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                return 400, {"error": "expected an asset record or a list of records"}
+            for i, record in enumerate(records):
+                bad = [key for key, value in record.items() if not isinstance(value, SCALAR_TYPES)]
+                if bad:
+                    return 400, {"error": f"record {i}: {bad} must be scalar values"}
+            if not records:
+                return 200, []
+            results = await self.batcher.score(records)
+            return 200, results[0] if single else results
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, body, headers = await self.read_request(request_line, reader)
+                except ValueError as e:
+                    # The rest of the stream cannot be framed, so answer and close the connection
+                    self.respond(writer, 400, {"error": f"Bad request: {e}"}, keep_alive=False)
+                    await writer.drain()
+                    break
+
+                start = time.perf_counter()
+                try:
+                    status, result = await self.route(method, path, body)
+                except (ValueError, KeyError) as e:
+                    status, result = 400, {"error": str(e)}
+                except Exception as e:
+                    logging.exception(f"❌ {method} {path} failed")
+                    status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+                if path == "/score":
+                    self.requests += 1
+                    self.errors += status != 200
+                    self.latency.observe(time.perf_counter() - start)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.respond(writer, status, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_request(request_line: bytes, reader: asyncio.StreamReader) -> tuple:
+        """``(method, path, body, headers)``; raises ValueError for a malformed request line or Content-Length."""
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError(f"malformed request line {request_line[:80]!r}")
+        method, path, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"negative Content-Length {length}")
+        return method, path, await reader.readexactly(length), headers
+
+    @staticmethod
+    def respond(writer: asyncio.StreamWriter, status: int, result: dict, keep_alive: bool):
+        data = json.dumps(result).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+        )
+
+    async def serve(self, host: str, port: int):
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        logging.info(f"🛰️ Scoring service listening on http://{host}:{port} (POST /score, GET /metrics)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, config_paths=("config/inventory_full.json", "config/ipam_full.json"),
+          max_batch: int = 256, max_wait_ms: float = 2.0):
+    start_time = time.time()
+    scorers = load_scorers(config_paths)
+    logging.info(f"📦 Loaded {len(scorers)} models in {time.time() - start_time:.2f}s")
+    try:
+        asyncio.run(ScoringService(scorers, max_batch, max_wait_ms).serve(host, port))
+    except KeyboardInterrupt:
+        logging.info("🛑 Scoring service stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve inventory/IPAM risk scores over HTTP")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
+    parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    parser.add_argument("--max_batch", type=int, default=256, help="Records per micro-batch")
+    parser.add_argument("--max_wait_ms", type=float, default=2.0, help="Longest a request waits for a batch to fill")
+    args = parser.parse_args()
+    setup_logging()
+
+    serve(args.host, args.port, [args.inventory_config, args.ipam_config], args.max_batch, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# src/shared/compact.py
+
+import numpy as np
+import pandas as pd
+
+from src.shared.constants import (
+    DEVICE_ROLE_CODES,
+    OBS_STATUS_WEIGHTED,
+    REGION_SITE_MAP,
+    REGION_WEIGHTS,
+    ROLE_VENDOR_MODEL_MAP,
+    SITE_STATE_MAP
+)
+
+# Category vocabularies for the structured columns. Fixed vocabularies give
+# every chunk, shard and file the same codes; values outside them (e.g. from
+# a real inventory export) are appended rather than lost.
+_ROLES = list(ROLE_VENDOR_MODEL_MAP)
+_REGIONS = list(REGION_WEIGHTS)
+VOCABULARIES = {
+    "region": _REGIONS,
+    "status": [status for status, _ in OBS_STATUS_WEIGHTED],
+    "vendor": list(dict.fromkeys(vendor for pairs in ROLE_VENDOR_MODEL_MAP.values() for vendor, _ in pairs)),
+    "model": [model for pairs in ROLE_VENDOR_MODEL_MAP.values() for _, model in pairs],
+    "role": _ROLES,
+    "site_code": [site for sites in REGION_SITE_MAP.values() for site in sites],
+    "state_code": list(dict.fromkeys(SITE_STATE_MAP.values())),
+    "role_code": [DEVICE_ROLE_CODES[role] for role in _ROLES],
+    "parsed_role": _ROLES,
+    "parsed_region": _REGIONS,
+    "ip_region": _REGIONS,
+}
+LABEL_COLUMNS = ["missing_in_inventory", "missing_in_ipam"]
+# 0/1 columns from enrichment, kept as int8 like the labels
+FLAG_COLUMNS = ["ip_region_mismatch", "site_region_mismatch"]
+FQDN_DOMAIN = "lightspeed.net"
+
+# Columns dropped from a compact frame because they can be rebuilt, with their original positions
+DERIVED_ATTR = "derived_columns"
+
+
+# --- IP Addresses ---
+OCTETS = np.array([str(n) for n in range(256)])
+
+
+def format_ipv4(ips: np.ndarray) -> np.ndarray:
+    """Render uint32 addresses as dotted-quad strings without per-row Python."""
+    ips = np.asarray(ips, dtype=np.uint32)
+    out = OCTETS[(ips >> 24) & 0xFF]
+    for shift in (16, 8, 0):
+        out = np.char.add(np.char.add(out, "."), OCTETS[(ips >> shift) & 0xFF])
+    return out
+
+
+def parse_ipv4(values: pd.Series):
+    """Dotted-quad strings as uint32, or ``None`` if any value is missing or not an IPv4 address."""
+    if values.isna().any():
+        return None
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        parts = pc.split_pattern(pa.array(values, type=pa.string()), ".")
+        if len(values) and np.asarray(pc.list_value_length(parts)).min(initial=4) != 4:
+            return None
+        octets = np.asarray(pc.cast(pc.list_flatten(parts), pa.int64())).reshape(-1, 4)
+    except ImportError:
+        split = values.str.split(".", expand=True)
+        if split.shape[1] != 4 or split.isna().any(axis=None):
+            return None
+        octets = split.astype(np.int64).to_numpy()
+    except (ValueError, TypeError, NotImplementedError):
+        # pyarrow raises ArrowInvalid (a ValueError) for non-numeric octets
+        return None
+    if octets.size and (octets.min() < 0 or octets.max() > 255):
+        return None
+    return (octets << np.array([24, 16, 8, 0])).sum(axis=1).astype(np.uint32)
+
+
+def parse_ipv4_rows(values: pd.Series) -> tuple:
+    """``(ips, valid)``: uint32 addresses, with ``valid`` False for rows that are missing or not IPv4.
+
+    Unlike ``parse_ipv4``, one bad row does not give up on the whole column.
+    """
+    if values.dtype == np.uint32:
+        return values.to_numpy(), np.ones(len(values), dtype=bool)
+    strings = string_column(values.astype(object)).str.strip()
+    valid = strings.str.fullmatch(r"\d{1,3}(?:\.\d{1,3}){3}").fillna(False).to_numpy(dtype=bool)
+    ips = np.zeros(len(values), dtype=np.uint32)
+    if valid.any():
+        dotted = strings[valid].astype(object)
+        parsed = parse_ipv4(dotted)
+        if parsed is None:
+            # Some octet is above 255: only those rows are invalid
+            octets = dotted.str.split(".", expand=True).astype(np.int64).to_numpy()
+            parsed = (octets << np.array([24, 16, 8, 0])).sum(axis=1).astype(np.uint32)
+            in_range = (octets <= 255).all(axis=1)
+            ips[np.flatnonzero(valid)[in_range]] = parsed[in_range]
+            valid[valid] = in_range
+        else:
+            ips[valid] = parsed
+    return ips, valid
+
+
+# --- Columns ---
+def vocab_categorical(values: pd.Series, vocabulary) -> pd.Series:
+    """``values`` as a categorical over ``vocabulary`` plus any values outside it."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        present = values.cat.categories
+    else:
+        present = pd.Index(values.dropna().unique())
+    known = set(vocabulary)
+    extras = sorted((v for v in present if v not in known), key=str)
+    dtype = pd.CategoricalDtype(list(vocabulary) + extras)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.set_categories(dtype.categories)
+    return values.astype(dtype)
+
+
+def coded(col: str, table: np.ndarray, codes: np.ndarray) -> pd.Categorical:
+    """``table[codes]`` as a categorical over ``col``'s vocabulary, without building the strings."""
+    vocabulary = VOCABULARIES[col]
+    lookup = pd.Index(vocabulary).get_indexer(table)
+    if (lookup < 0).any():
+        return pd.Categorical(vocab_categorical(pd.Series(table[codes]), vocabulary))
+    return pd.Categorical.from_codes(lookup[codes], categories=vocabulary)
+
+
+def string_column(values: pd.Series) -> pd.Series:
+    """Arrow-backed strings (one buffer, no Python object per row) when pyarrow is installed."""
+    try:
+        return values.astype("string[pyarrow]")
+    except ImportError:
+        return values
+
+
+def fqdn(df: pd.DataFrame) -> pd.Series:
+    """``<hostname>.<region>.lightspeed.net``, built from the frame instead of stored; NaN without a hostname."""
+    region = vocab_categorical(df["region"], VOCABULARIES["region"])
+    suffixes = np.array([f".{r}.{FQDN_DOMAIN}" for r in region.cat.categories] + [""], dtype=object)
+    present = df["hostname"].notna().to_numpy()
+    out = np.full(len(df), np.nan, dtype=object)
+    out[present] = df["hostname"].to_numpy(dtype=object)[present] + suffixes[region.cat.codes.to_numpy()[present]]
+    return pd.Series(out, index=df.index, name="fqdn")
+
+
+# --- Frames ---
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The compact in-memory form of an asset table.
+
+    IPv4 addresses become uint32, structured columns categoricals over
+    ``VOCABULARIES`` (one-byte codes), labels and flags int8, hostnames arrow
+    strings, and ``fqdn`` is dropped when it can be rebuilt from hostname and region.
+    Columns that do not fit (IPv6, missing or custom FQDNs) keep their values.
+    ``expand_frame`` reverses it before writing.
+    """
+    out = df.copy(deep=False)
+    derived = dict(df.attrs.get(DERIVED_ATTR, {}))
+    for col, vocabulary in VOCABULARIES.items():
+        if col in out.columns:
+            out[col] = vocab_categorical(out[col], vocabulary)
+    for col in LABEL_COLUMNS + FLAG_COLUMNS:
+        if col in out.columns and out[col].dtype.kind in "iub" and not out[col].isna().any():
+            out[col] = out[col].astype(np.int8)
+    if "ip_address" in out.columns and out["ip_address"].dtype != np.uint32:
+        ips = parse_ipv4(out["ip_address"])
+        if ips is not None:
+            out["ip_address"] = ips
+    if "fqdn" in out.columns and {"hostname", "region"} <= set(out.columns):
+        if out["fqdn"].astype(object).equals(fqdn(out).astype(object)):
+            derived["fqdn"] = list(out.columns).index("fqdn")
+            out = out.drop(columns="fqdn")
+    if "hostname" in out.columns:
+        out["hostname"] = string_column(out["hostname"])
+    out.attrs[DERIVED_ATTR] = derived
+    return out
+
+
+def concat_compact(frames: list) -> pd.DataFrame:
+    """Concatenate compact chunks, unifying their categories.
+
+    A column stays derived only if every chunk could derive it; chunks that
+    dropped one the others kept get it rebuilt, and IPs stay strings if any
+    chunk held a non-IPv4 address.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    derived = {}
+    for frame in frames:
+        derived.update(frame.attrs.get(DERIVED_ATTR, {}))
+    if "fqdn" in derived and any("fqdn" in frame.columns for frame in frames):
+        for frame in frames:
+            if "fqdn" not in frame.columns:
+                frame.insert(derived["fqdn"], "fqdn", fqdn(frame))
+        del derived["fqdn"]
+    if any("ip_address" in frame.columns and frame["ip_address"].dtype != np.uint32 for frame in frames):
+        for frame in frames:
+            if frame["ip_address"].dtype == np.uint32:
+                frame["ip_address"] = format_ipv4(frame["ip_address"].to_numpy()).astype(object)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = list(dict.fromkeys(c for frame in frames for c in frame[col].cat.categories))
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    out = pd.concat(frames, ignore_index=True)
+    out.attrs[DERIVED_ATTR] = derived
+    return out
+
+
+def expand_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The file schema for a compact frame: dotted-quad IPs and derived columns restored; others unchanged."""
+    derived = df.attrs.get(DERIVED_ATTR, {})
+    needs_ip = "ip_address" in df.columns and df["ip_address"].dtype == np.uint32
+    missing = {col: pos for col, pos in derived.items() if col not in df.columns}
+    strings = [col for col in df.columns if isinstance(df[col].dtype, pd.StringDtype)]
+    labels = [col for col in LABEL_COLUMNS if col in df.columns and df[col].dtype == np.int8]
+    if not needs_ip and not missing and not strings and not labels:
+        return df
+    out = df.copy(deep=False)
+    if needs_ip:
+        out["ip_address"] = format_ipv4(out["ip_address"].to_numpy()).astype(object)
+    for col in strings:
+        out[col] = out[col].astype(object)
+    for col in labels:
+        out[col] = out[col].astype(np.int64)
+    if "fqdn" in missing and {"hostname", "region"} <= set(out.columns):
+        out.insert(min(missing["fqdn"], len(out.columns)), "fqdn", fqdn(out))
+    out.attrs = {}
+    return out
+
+
+# --- Memory ---
+def bytes_per_asset(df: pd.DataFrame) -> pd.Series:
+    """Deep memory per row, per column."""
+    return df.memory_usage(deep=True, index=False) / max(len(df), 1)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    per_before, per_after = bytes_per_asset(before), bytes_per_asset(after)
+    columns = {
+        col: {"before": float(per_before[col]), "after": float(per_after.get(col, 0.0)),
+              "dtype": str(after[col].dtype) if col in after.columns else "derived"}
+        for col in per_before.index
+    }
+    total_before, total_after = float(per_before.sum()), float(per_after.sum())
+    return {
+        "rows": len(before),
+        "bytes_per_asset_before": total_before,
+        "bytes_per_asset_after": total_after,
+        "reduction": total_before / total_after if total_after else None,
+        "columns": columns,
+    }
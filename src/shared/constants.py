@@ -98,4 +98,12 @@ REGION_SUBNET_MAP = {
     "southwest":  "10.50.0.0/16",
     "northeast":  "10.60.0.0/16",
     "northwest":  "10.70.0.0/16"
-}
\ No newline at end of file
+}
+
+# Table formats by file extension (see src/shared/storage.py). Kept here so
+# command-line parsers can list them without importing pandas.
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather"
+}
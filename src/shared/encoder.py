@@ -0,0 +1,194 @@
+# src/shared/encoder.py
+
+import numpy as np
+import pandas as pd
+
+# Missing values are encoded as this category when training data had any,
+# matching the old fillna("missing") + get_dummies behaviour
+MISSING = "missing"
+UNKNOWN = -1
+
+
+class CategoricalEncoder:
+    """One-hot/ordinal encoder fitted once at training time and saved with the model.
+
+    Each feature keeps a ``pd.Index`` of the categories seen in training, and
+    output column ``offsets[i] + code`` is named ``<feature>_<category>`` like
+    ``pd.get_dummies``. Transforming is a hash lookup per column (or, for
+    pandas categoricals, a lookup over the few categories plus a gather by
+    code), so no per-row Python runs. Categories not seen in training encode
+    as ``UNKNOWN`` (an all-zero block in one-hot output); missing values map to
+    the ``"missing"`` category if training had one, otherwise to ``UNKNOWN``.
+
+    Numeric features with no missing values in training (e.g. the 0/1
+    mismatch flags) pass through as one column named after the feature, as
+    ``get_dummies`` left them. Their training values still get codes, so
+    ``ordinal`` and the compiled tables cover them; a value outside those
+    codes is written as itself by ``transform`` and as 0 by ``one_hot``.
+    """
+
+    # Encoders saved before numeric pass-through have none
+    numeric = ()
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.categories = {}
+        self.numeric = []
+
+    def fit(self, df: pd.DataFrame):
+        self.numeric = [
+            col for col in self.features
+            if not isinstance(df[col].dtype, pd.CategoricalDtype) and df[col].dtype.kind in "biuf"
+            and not df[col].isna().any()
+        ]
+        for col in self.features:
+            values = df[col]
+            if col in self.numeric:
+                self.categories[col] = pd.Index(np.unique(values.to_numpy()))
+                continue
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                observed = values.cat.categories[np.unique(values.cat.codes[values.cat.codes >= 0])]
+            else:
+                observed = values.dropna().unique()
+            cats = set(observed.tolist())
+            if values.isna().any():
+                cats.add(MISSING)
+            self.categories[col] = pd.Index(sorted(cats, key=str), dtype=object)
+        return self
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.array([len(self.categories[col]) for col in self.features], dtype=np.int64)
+
+    @property
+    def widths(self) -> np.ndarray:
+        """Output columns per feature: one per category, or one for a numeric feature."""
+        return np.array([1 if col in self.numeric else len(self.categories[col]) for col in self.features],
+                        dtype=np.int64)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(self.widths)[:-1]])
+
+    @property
+    def feature_names(self) -> pd.Index:
+        return pd.Index([
+            name for col in self.features
+            for name in ([col] if col in self.numeric else [f"{col}_{cat}" for cat in self.categories[col]])
+        ])
+
+    # The old encoder artifact was the get_dummies column index
+    columns = feature_names
+
+    @staticmethod
+    def _numbers(values: pd.Series) -> np.ndarray:
+        return pd.to_numeric(values.astype(object), errors="coerce").to_numpy(dtype=np.float64)
+
+    def _codes(self, values: pd.Series, categories: pd.Index, numeric: bool = False) -> np.ndarray:
+        if numeric:
+            return categories.get_indexer(self._numbers(values))
+        missing_code = categories.get_loc(MISSING) if MISSING in categories else UNKNOWN
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            lookup = np.append(categories.get_indexer(values.cat.categories), missing_code)
+            return lookup[values.cat.codes.to_numpy()]
+        codes = categories.get_indexer(values.to_numpy(dtype=object))
+        if missing_code != UNKNOWN:
+            codes[values.isna().to_numpy()] = missing_code
+        return codes
+
+    def ordinal(self, df: pd.DataFrame) -> np.ndarray:
+        """Compact ``(n_rows, n_features)`` code matrix; ``UNKNOWN`` (-1) for unseen values."""
+        dtype = np.int8 if self.sizes.max(initial=0) < 127 else np.int32
+        out = np.empty((len(df), len(self.features)), dtype=dtype)
+        for i, col in enumerate(self.features):
+            out[:, i] = self._codes(df[col], self.categories[col], col in self.numeric)
+        return out
+
+    def unseen_values(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows with a numeric value outside its training values, which codes cannot represent."""
+        unseen = np.zeros(len(df), dtype=bool)
+        for col in self.numeric:
+            values = self._numbers(df[col])
+            unseen |= ~np.isnan(values) & (self.categories[col].get_indexer(values) < 0)
+        return unseen
+
+    def transform(self, df: pd.DataFrame, sparse: bool = False):
+        """One-hot matrix in ``feature_names`` order: dense float32, or CSR when ``sparse``."""
+        values = {col: np.nan_to_num(self._numbers(df[col])) for col in self.numeric}
+        return self.one_hot(self.ordinal(df), sparse, values)
+
+    def one_hot(self, codes: np.ndarray, sparse: bool = False, values: dict = None):
+        """One-hot matrix for an ordinal code matrix (as returned by ``ordinal``).
+
+        Numeric features are written as ``values[col]`` when given, otherwise
+        as the training value of their code (0 for ``UNKNOWN``).
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = codes >= 0
+        cols = codes + self.offsets
+        data = {}
+        for i, col in enumerate(self.features):
+            if col in self.numeric:
+                if values is not None and col in values:
+                    data[i] = np.asarray(values[col], dtype=np.float32)
+                else:
+                    table = np.append(self.categories[col].to_numpy(dtype=np.float32), np.float32(0))
+                    data[i] = table[np.where(valid[:, i], codes[:, i], -1)]
+                cols[:, i] = self.offsets[i]
+                valid[:, i] = True
+        shape = (len(codes), int(self.widths.sum()))
+        if sparse:
+            import scipy.sparse as sp
+            ones = np.ones(codes.shape, dtype=np.float32)
+            for i, column in data.items():
+                ones[:, i] = column
+            # Row-major order already gives sorted CSR indices, so no COO sort is needed
+            indptr = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+            return sp.csr_matrix((ones[valid], cols[valid], indptr), shape=shape)
+        out = np.zeros(shape, dtype=np.float32)
+        flat = out.reshape(-1)
+        row_start = np.arange(shape[0], dtype=np.int64) * shape[1]
+        for i in range(len(self.features)):
+            if i in data:
+                flat[row_start + cols[:, i]] = data[i]
+            elif valid[:, i].all():
+                flat[row_start + cols[:, i]] = 1.0
+            else:
+                flat[row_start[valid[:, i]] + cols[valid[:, i], i]] = 1.0
+        return out
+
+    def fit_transform(self, df: pd.DataFrame, sparse: bool = False):
+        return self.fit(df).transform(df, sparse)
+
+    @classmethod
+    def from_dummy_columns(cls, columns, features):
+        """Rebuild an encoder from a legacy ``get_dummies`` column index.
+
+        Each column goes to the longest feature name it is prefixed with, so
+        ``role_code_AG`` belongs to ``role_code`` rather than ``role``.
+        Numeric features come first, as ``get_dummies`` placed them.
+        """
+        encoder = cls(features)
+        by_length = sorted(features, key=len, reverse=True)
+        cats = {col: [] for col in features}
+        for name in columns:
+            if name in cats:
+                # get_dummies left numeric features as they were; their training values are unknown
+                encoder.numeric.append(name)
+                continue
+            col = next(f for f in by_length if name.startswith(f + "_"))
+            cats[col].append(name[len(col) + 1:])
+        encoder.categories = {col: pd.Index(cats[col], dtype=object) for col in features}
+        encoder.features = encoder.numeric + [col for col in features if col not in encoder.numeric]
+        return encoder
+
+
+def load_encoder(path: str, features=None) -> CategoricalEncoder:
+    """Load a saved encoder; legacy column-index artifacts need ``features``."""
+    import joblib
+    encoder = joblib.load(path)
+    if isinstance(encoder, CategoricalEncoder):
+        return encoder
+    if features is None:
+        raise ValueError(f"{path} is a legacy get_dummies column index; pass the model's feature list")
+    return CategoricalEncoder.from_dummy_columns(encoder, features)
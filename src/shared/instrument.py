@@ -0,0 +1,241 @@
+# src/shared/instrument.py
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+# The span the current code runs in; copy the context into worker threads to nest under it
+_current = contextvars.ContextVar("instrument_span", default=None)
+_lock = threading.Lock()
+_state = {"spans": [], "profile_dir": None, "profilers": [], "origin": time.perf_counter(), "threaded": 0}
+
+
+# --- Memory ---
+def _proc_status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process image (VmHWM; ru_maxrss where /proc is unavailable)."""
+    peak = _proc_status_mb("VmHWM")
+    if peak is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak
+
+
+def rss_mb() -> float:
+    return _proc_status_mb("VmRSS") or 0.0
+
+
+def _reset_peak() -> bool:
+    # Linux lets a process reset its own VmHWM, which makes peaks per span.
+    # The mark is process-wide: only reset it when no other thread has a span open.
+    with _lock:
+        if threading.current_thread() is not threading.main_thread() or _state["threaded"]:
+            return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# --- Spans ---
+class Span:
+    def __init__(self, name: str, parent=None, rows: int = None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.path = f"{parent.path}/{name}" if parent else name
+        self.rows = rows
+        self.attrs = attrs
+        self.peak_mb = 0.0
+
+    def record(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "start_s": self.start - _state["origin"],
+            "wall_s": self.wall_s,
+            "rows": self.rows,
+            "rows_per_s": self.rows / self.wall_s if self.rows and self.wall_s > 0 else None,
+            "peak_rss_mb": self.peak_mb,
+            "rss_mb": self.end_rss_mb,
+            "thread": threading.current_thread().name,
+            **self.attrs,
+        }
+
+
+def _start_profile(path: str):
+    import cProfile
+    profilers = _state["profilers"]
+    if profilers:
+        # One profiler runs at a time; the enclosing stage resumes when this one ends
+        profilers[-1][1].disable()
+    profiler = cProfile.Profile()
+    profilers.append((path, profiler))
+    profiler.enable()
+
+
+def _stop_profile():
+    import pstats
+    path, profiler = _state["profilers"].pop()
+    profiler.disable()
+    base = os.path.join(_state["profile_dir"], path.replace("/", "__"))
+    profiler.dump_stats(base + ".prof")
+    with open(base + ".txt", "w") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+    logging.info(f"🔬 Profile for {path} saved to: {base}.prof")
+    if _state["profilers"]:
+        _state["profilers"][-1][1].enable()
+
+
+@contextmanager
+def span(name: str, rows: int = None, profile: bool = False, **attrs):
+    """Time a block and record its rows and peak RSS; yields the ``Span`` so ``rows`` can be set inside.
+
+    Spans nest by context, so a ``fit`` inside ``train_ipam`` is recorded as
+    ``train_ipam/fit``. With ``profile=True`` and profiling configured, the
+    block also runs under cProfile (excluding nested profiled spans).
+
+    Only main-thread spans reset the peak, and only while no worker thread
+    has a span open; a span in a worker thread reads the peak since the last
+    reset, which includes whatever ran alongside it.
+    """
+    parent = _current.get()
+    current = Span(name, parent, rows, **attrs)
+    token = _current.set(current)
+    threaded = threading.current_thread() is not threading.main_thread()
+    if threaded:
+        with _lock:
+            _state["threaded"] += 1
+
+    # A parent's peak so far must survive the reset below
+    if parent is not None:
+        parent.peak_mb = max(parent.peak_mb, peak_rss_mb())
+    _reset_peak()
+    profiling = profile and _state["profile_dir"] and threading.current_thread() is threading.main_thread()
+    if profiling:
+        _start_profile(current.path)
+
+    current.start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.wall_s = time.perf_counter() - current.start
+        if profiling:
+            _stop_profile()
+        current.peak_mb = max(current.peak_mb, peak_rss_mb())
+        current.end_rss_mb = rss_mb()
+        if parent is not None:
+            parent.peak_mb = max(parent.peak_mb, current.peak_mb)
+        _current.reset(token)
+        with _lock:
+            _state["threaded"] -= threaded
+            _state["spans"].append(current.record())
+
+
+def traced(iterable, name: str):
+    """Yield from ``iterable``, recording each ``next()`` as a span with the item's length as rows."""
+    items, end = iter(iterable), object()
+    while True:
+        with span(name) as current:
+            item = next(items, end)
+            if item is not end:
+                current.rows = len(item)
+        if item is end:
+            return
+        yield item
+
+
+def configure(profile_dir: str = None):
+    """Start a fresh trace; with ``profile_dir``, spans opened with ``profile=True`` are profiled."""
+    _state.update(spans=[], profile_dir=profile_dir, profilers=[], origin=time.perf_counter(), threaded=0)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+
+
+def spans() -> list:
+    return list(_state["spans"])
+
+
+def summary() -> dict:
+    """Per span path: calls, total wall time, rows, rows/s and the highest peak RSS."""
+    totals = {}
+    for s in _state["spans"]:
+        t = totals.setdefault(s["path"], {"calls": 0, "wall_s": 0.0, "rows": 0, "peak_rss_mb": 0.0})
+        t["calls"] += 1
+        t["wall_s"] += s["wall_s"]
+        t["rows"] += s["rows"] or 0
+        t["peak_rss_mb"] = max(t["peak_rss_mb"], s["peak_rss_mb"])
+    for t in totals.values():
+        t["rows_per_s"] = t["rows"] / t["wall_s"] if t["rows"] and t["wall_s"] > 0 else None
+    return totals
+
+
+# --- Export ---
+def write_trace(path: str):
+    """Write the spans and their summary as JSON.
+
+    ``traceEvents`` is the Chrome trace event format, so the file also opens
+    in Perfetto or chrome://tracing as a timeline.
+    """
+    threads = {name: i for i, name in enumerate(dict.fromkeys(s["thread"] for s in _state["spans"]))}
+    events = [
+        {"name": s["name"], "ph": "X", "ts": s["start_s"] * 1e6, "dur": s["wall_s"] * 1e6, "pid": os.getpid(),
+         "tid": threads[s["thread"]], "args": {k: v for k, v in s.items() if k not in ("name", "start_s", "wall_s")}}
+        for s in _state["spans"]
+    ]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"summary": summary(), "spans": _state["spans"], "traceEvents": events}, f, indent=2)
+    logging.info(f"📁 Trace saved to: {path}")
+
+
+def log_to_mlflow(trace_path: str = None, enabled: bool = False):
+    """Log every span path's totals as metrics on the active MLflow run (or the one ``mlflow run`` started).
+
+    mlflow is only imported when ``enabled``, under ``mlflow run`` or a
+    tracking URI, or when the command already imported it and may have a run open.
+    """
+    if not (enabled or "mlflow" in sys.modules or os.environ.get("MLFLOW_RUN_ID")
+            or os.environ.get("MLFLOW_TRACKING_URI")):
+        return False
+    try:
+        import mlflow
+    except ImportError:
+        return False
+    if mlflow.active_run() is None and not os.environ.get("MLFLOW_RUN_ID"):
+        return False
+    metrics = {}
+    for path, t in summary().items():
+        metrics[f"{path}/wall_s"] = t["wall_s"]
+        metrics[f"{path}/peak_rss_mb"] = t["peak_rss_mb"]
+        if t["rows"]:
+            metrics[f"{path}/rows"] = t["rows"]
+            metrics[f"{path}/rows_per_s"] = t["rows_per_s"]
+    mlflow.log_metrics(metrics)
+    if trace_path:
+        mlflow.log_artifact(trace_path, artifact_path="traces")
+    logging.info(f"📈 Logged {len(metrics)} span metrics to MLflow")
+    return True
+
+
+def log_summary():
+    for path, t in summary().items():
+        rate = f", {t['rows_per_s']:,.0f} rows/s" if t["rows_per_s"] else ""
+        logging.info(f"⏱️ {path}: {t['wall_s']:.2f}s over {t['calls']} call(s){rate}, peak {t['peak_rss_mb']:.0f} MB")
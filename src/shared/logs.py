@@ -0,0 +1,16 @@
+# src/shared/logs.py
+
+import logging
+
+
+def setup_logging(level: int = logging.INFO):
+    """Configure the root logger; called by command-line entry points, never at import.
+
+    Importing a module as a library leaves the caller's logging alone. Process
+    pools fork, so their workers inherit this configuration.
+    """
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S"
+    )
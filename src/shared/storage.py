@@ -0,0 +1,181 @@
+# src/shared/storage.py
+
+import os
+import pandas as pd
+
+from src.shared.compact import concat_compact, compact_frame, expand_frame
+from src.shared.constants import FORMAT_EXTENSIONS  # noqa: F401 (re-exported)
+
+# Table format is chosen by file extension (FORMAT_EXTENSIONS). CSV stays the
+# default and export format; Parquet/Feather keep types between stages and
+# dictionary-encode the low-cardinality columns.
+
+# Structured columns derived from the hostname (by ``prepare``, or directly by fused generation)
+ENRICHED_COLUMNS = ["site_code", "state_code", "role_code", "parsed_role", "parsed_region"]
+# Columns derived from the IP by the subnet index, after the hostname ones
+SUBNET_COLUMNS = ["ip_region", "ip_region_mismatch", "site_region_mismatch"]
+CATEGORICAL_COLUMNS = ["region", "status", "vendor", "model", "role"] + ENRICHED_COLUMNS + ["ip_region"]
+COMPACT_CHUNK_ROWS = 100_000
+
+
+def table_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMAT_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Unsupported table extension '{ext}' for {path} (expected one of {list(FORMAT_EXTENSIONS.values())})")
+
+
+def table_path(directory: str, stem: str, fmt: str = "csv") -> str:
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown table format: {fmt}")
+    return os.path.join(directory, stem + FORMAT_EXTENSIONS[fmt])
+
+
+def _require_pyarrow(fmt: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"{fmt} storage requires pyarrow: pip install pyarrow") from e
+
+
+def to_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _arrow_table(df: pd.DataFrame):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(to_categoricals(df), preserve_index=False)
+    # Fix dictionary index width so chunks with different category counts share a schema
+    fields = [
+        pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type)) if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+# --- Readers ---
+def read_table(path: str, columns=None, categorical: bool = True, compact: bool = False) -> pd.DataFrame:
+    """Load a table, reading only ``columns`` when given.
+
+    ``compact`` returns the compact in-memory form (see ``compact_frame``):
+    uint32 IPs, vocabulary-coded categoricals and no stored ``fqdn``.
+    """
+    fmt = table_format(path)
+    if fmt == "csv":
+        dtype = {col: "category" for col in CATEGORICAL_COLUMNS} if categorical else None
+        if compact:
+            # Compacted a chunk at a time, so the per-row string objects never exist for the whole table
+            chunks = pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=COMPACT_CHUNK_ROWS)
+            df = concat_compact([compact_frame(chunk) for chunk in chunks])
+            return df[columns] if columns else df
+        df = pd.read_csv(path, usecols=columns, dtype=dtype)
+    else:
+        _require_pyarrow(fmt)
+        reader = pd.read_parquet if fmt == "parquet" else pd.read_feather
+        df = reader(path, columns=columns)
+        if not categorical:
+            df = df.astype({c: "object" for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    df = df[columns] if columns else df
+    return compact_frame(df) if compact else df
+
+
+def iter_table(path: str, chunk_size: int, columns=None, compact: bool = False):
+    """Yield a table as DataFrames of about ``chunk_size`` rows."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        for df in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+            yield compact_frame(df) if compact else df
+        return
+
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+    else:
+        batches = _feather_batches(path, chunk_size, columns)
+    for batch in batches:
+        df = batch.to_pandas()
+        yield compact_frame(df) if compact else df
+
+
+def _feather_batches(path: str, chunk_size: int, columns=None):
+    """A Feather file as Arrow tables of ``chunk_size`` rows, projected to ``columns``.
+
+    The file keeps the batches it was written in; like ``ParquetFile.iter_batches``,
+    chunks run across their boundaries, and only the selected columns reach pandas.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    reader = ipc.open_file(path)
+    pending = []
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        pending.append(batch.select(columns) if columns else batch)
+        if sum(len(b) for b in pending) < chunk_size:
+            continue
+        table = pa.Table.from_batches(pending)
+        start = 0
+        while len(table) - start >= chunk_size:
+            yield table.slice(start, chunk_size)
+            start += chunk_size
+        pending = table.slice(start).to_batches()
+    if pending and sum(len(b) for b in pending):
+        yield pa.Table.from_batches(pending)
+
+
+# --- Writers ---
+def write_table(df: pd.DataFrame, path: str):
+    with TableWriter(path) as writer:
+        writer.write(df)
+
+
+class TableWriter:
+    """Append DataFrame chunks to one table file in any supported format."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = table_format(path)
+        self.rows = 0
+        # The file's columns, known after the first write
+        self.columns = []
+        self._writer = None
+        self._schema = None
+        if self.format != "csv":
+            _require_pyarrow(self.format)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, df: pd.DataFrame):
+        # Compact frames are written in the file schema: dotted-quad IPs, fqdn included
+        df = expand_frame(df)
+        if self.format == "csv":
+            df.to_csv(self.path, index=False, mode="w" if self.rows == 0 else "a", header=self.rows == 0)
+        else:
+            table = _arrow_table(df)
+            if self._writer is None:
+                self._schema = table.schema
+                if self.format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    import pyarrow.ipc as ipc
+                    self._writer = ipc.new_file(self.path, self._schema)
+            self._writer.write_table(table.cast(self._schema))
+        self.rows += len(df)
+        self.columns = list(df.columns)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
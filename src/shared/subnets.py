@@ -0,0 +1,82 @@
+# src/shared/subnets.py
+
+import logging
+import ipaddress
+
+import numpy as np
+import pandas as pd
+
+from src.shared.compact import VOCABULARIES, parse_ipv4_rows
+
+
+class SubnetIndex:
+    """Longest-prefix match of IPv4 addresses to labels as sorted uint32 ranges.
+
+    Prefixes are flattened once into disjoint ranges: the sorted start of
+    every range in ``bounds`` and the label code that owns it in ``owners``
+    (-1 where no prefix covers it). A whole column is then mapped with one
+    ``np.searchsorted``, so a lookup costs the same per row for seven
+    prefixes or several thousand. Nested prefixes resolve to the most
+    specific one, as routing does, and of identical prefixes the first listed.
+    """
+
+    def __init__(self, prefixes):
+        """``prefixes``: ``(cidr, label)`` pairs. IPv6 prefixes are skipped, since the index is IPv4."""
+        prefixes = list(prefixes)
+        networks, labels = [], []
+        for cidr, label in prefixes:
+            network = ipaddress.ip_network(str(cidr).strip(), strict=False)
+            if network.version == 4:
+                networks.append(network)
+                labels.append(label)
+        if len(networks) < len(prefixes):
+            logging.warning(f"⚠️ Skipped {len(prefixes) - len(networks)} IPv6 prefixes")
+
+        codes, self.labels = pd.factorize(pd.Series(labels, dtype=object))
+        starts = np.array([int(n.network_address) for n in networks], dtype=np.int64)
+        ends = np.array([int(n.broadcast_address) + 1 for n in networks], dtype=np.int64)
+        self.bounds = np.unique(np.concatenate([starts, ends]))
+        self.owners = np.full(len(self.bounds), -1, dtype=np.int32)
+        # Shortest prefixes first, so more specific ones overwrite the ranges they cover; among
+        # duplicates the first listed is painted last and wins
+        lengths = np.array([n.prefixlen for n in networks], dtype=np.int64)
+        for i in np.lexsort((-np.arange(len(networks)), lengths)):
+            lo, hi = np.searchsorted(self.bounds, [starts[i], ends[i]])
+            self.owners[lo:hi] = codes[i]
+
+    def __len__(self):
+        return int((self.owners >= 0).sum())
+
+    @classmethod
+    def from_map(cls, mapping: dict) -> "SubnetIndex":
+        """From ``{label: cidr or [cidrs]}``, e.g. ``REGION_SUBNET_MAP``."""
+        return cls([(cidr, label) for label, cidrs in mapping.items()
+                    for cidr in ([cidrs] if isinstance(cidrs, str) else cidrs)])
+
+    @classmethod
+    def from_file(cls, path: str, prefix_column: str = "prefix", label_column: str = "region") -> "SubnetIndex":
+        """From an IPAM prefix export (CSV, Parquet or Feather) with a CIDR and a label column."""
+        from src.shared.storage import read_table
+        df = read_table(path, columns=[prefix_column, label_column], categorical=False).dropna()
+        return cls(list(zip(df[prefix_column], df[label_column])))
+
+    def lookup(self, ips: np.ndarray) -> np.ndarray:
+        """Label code per uint32 address; -1 where no prefix covers it."""
+        ips = np.asarray(ips, dtype=np.int64)
+        if not len(self.owners):
+            # No IPv4 prefixes (e.g. an IPv6-only export): nothing is covered
+            return np.full(ips.shape, -1, dtype=np.int32)
+        idx = np.searchsorted(self.bounds, ips, side="right") - 1
+        return np.where(idx >= 0, self.owners[np.maximum(idx, 0)], -1)
+
+    def regions(self, values: pd.Series) -> pd.Categorical:
+        """Region of each address in a column (dotted strings or uint32) over the region vocabulary.
+
+        Missing, non-IPv4 and uncovered addresses are NaN.
+        """
+        ips, valid = parse_ipv4_rows(values)
+        codes = np.where(valid, self.lookup(ips), -1)
+        vocabulary = VOCABULARIES["ip_region"]
+        categories = list(vocabulary) + sorted((str(l) for l in self.labels if l not in set(vocabulary)), key=str)
+        remap = np.append(pd.Index(categories).get_indexer(self.labels.astype(str)), -1)
+        return pd.Categorical.from_codes(remap[codes], categories=categories)
@@ -0,0 +1,289 @@
+# src/train/cross_validate.py
+
+import os
+import math
+import time
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.shared.instrument import span
+
+CV_DEFAULTS = {
+    "folds": 5,
+    "repeats": 1,
+    "scoring": "average_precision",
+    "permutation_repeats": 5,
+    "time_budget_s": None,
+    "workers": 0,
+}
+# Rows fitted once to estimate how long a fold takes when a time budget is set
+CALIBRATION_ROWS = 2000
+
+
+def cv_settings(config: dict, time_budget_s: float = None, workers: int = None) -> dict:
+    """The config's ``cv`` block over ``CV_DEFAULTS``; arguments given here override both."""
+    settings = {**CV_DEFAULTS, **config.get("cv", {})}
+    if time_budget_s is not None:
+        settings["time_budget_s"] = time_budget_s
+    if workers is not None:
+        settings["workers"] = workers
+    return settings
+
+
+# --- Fold Metrics ---
+def _scores(y_true, proba) -> dict:
+    from sklearn.metrics import (
+        accuracy_score, average_precision_score, balanced_accuracy_score, precision_recall_fscore_support,
+        roc_auc_score
+    )
+    y_pred = (proba >= 0.5).astype(np.int64)
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, labels=[1], average="binary", zero_division=0
+    )
+    both = len(np.unique(y_true)) == 2
+    return {
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(f1),
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "balanced_accuracy": float(balanced_accuracy_score(y_true, y_pred)),
+        "roc_auc": float(roc_auc_score(y_true, proba)) if both else None,
+        "average_precision": float(average_precision_score(y_true, proba)) if both else None,
+    }
+
+
+def permutation_importance(clf, X, y, groups: list, scoring: str, n_repeats: int, seed: int) -> np.ndarray:
+    """Mean drop in ``scoring`` when each feature's one-hot block is shuffled across rows, per feature.
+
+    A whole block moves together, so this measures the original categorical
+    feature rather than each dummy column on its own.
+    """
+    positive = list(clf.classes_).index(1)
+    baseline = _scores(y, clf.predict_proba(X)[:, positive])[scoring]
+    rng = np.random.default_rng(seed)
+    drops = np.zeros((len(groups), n_repeats))
+    shuffled = np.array(X, copy=True)
+    for g, (start, stop) in enumerate(groups):
+        for r in range(n_repeats):
+            shuffled[:, start:stop] = X[rng.permutation(len(X)), start:stop]
+            drops[g, r] = baseline - _scores(y, clf.predict_proba(shuffled)[:, positive])[scoring]
+        shuffled[:, start:stop] = X[:, start:stop]
+    return drops.mean(axis=1)
+
+
+# --- Worker Processes ---
+_shared = None
+
+def _open_shared(paths: dict):
+    global _shared
+    _shared = {"X": np.load(paths["X"], mmap_mode="r"), "y": np.load(paths["y"], mmap_mode="r")}
+
+
+def run_fold(train_idx, test_idx, rf_params: dict, groups: list, settings: dict, seed: int) -> dict:
+    """Fit one fold on the shared matrix; score it and its permutation importance on the held-out rows."""
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = _shared["X"], _shared["y"]
+    start = time.perf_counter()
+    clf = RandomForestClassifier(**{**rf_params, "n_jobs": 1})
+    clf.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    X_test, y_test = np.asarray(X[test_idx]), np.asarray(y[test_idx])
+    proba = clf.predict_proba(X_test)[:, list(clf.classes_).index(1)]
+    importance = []
+    if settings["permutation_repeats"]:
+        importance = permutation_importance(clf, X_test, y_test, groups, settings["scoring"],
+                                            settings["permutation_repeats"], seed).tolist()
+    return {
+        **_scores(y_test, proba),
+        "n_train": len(train_idx),
+        "n_test": len(test_idx),
+        "fit_time_s": fit_time,
+        "wall_time_s": time.perf_counter() - start,
+        "importance": importance,
+    }
+
+
+class FoldPool:
+    """Runs folds in worker processes that share one memory-mapped matrix (in-process for one worker)."""
+
+    def __init__(self, paths: dict, workers: int):
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_open_shared, initargs=(paths,))
+        else:
+            _open_shared(paths)
+
+    def map(self, splits, *args) -> list:
+        if self.pool is None:
+            return [run_fold(train_idx, test_idx, *args) for train_idx, test_idx in splits]
+        futures = [self.pool.submit(run_fold, train_idx, test_idx, *args) for train_idx, test_idx in splits]
+        return [f.result() for f in futures]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+# --- Planning ---
+def estimate_fold_seconds(X, y, rf_params: dict, folds: int, n_predicts: int, seed: int) -> float:
+    """Seconds one fold should take: a fit on a small stratified sample, scaled to the fold's
+    training rows, plus ``n_predicts`` predictions over its held-out rows (permutation importance).
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    n_train = len(y) * (folds - 1) // folds
+    idx = np.arange(len(y))
+    if n_train > CALIBRATION_ROWS:
+        idx, _ = train_test_split(idx, train_size=CALIBRATION_ROWS, random_state=seed, stratify=y)
+    start = time.perf_counter()
+    clf = RandomForestClassifier(**{**rf_params, "n_jobs": 1}).fit(X[idx], y[idx])
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    clf.predict_proba(X[idx])
+    predict_s = time.perf_counter() - start
+    scale = n_train / len(idx)
+    return fit_s * max(1.0, scale) + predict_s * (len(y) - n_train) / len(idx) * n_predicts
+
+
+def plan_folds(settings: dict, min_class: int, fold_seconds, workers: int) -> tuple:
+    """``(folds, repeats, capped)`` that fit ``time_budget_s``; never fewer than 2 folds and 1 repeat.
+
+    ``fold_seconds(folds)`` estimates one fold's cost. Folds are cut before
+    repeats, since a single k-fold pass already scores every row once.
+    """
+    folds = max(2, min(settings["folds"], min_class))
+    repeats = max(1, settings["repeats"])
+    capped = folds < settings["folds"]
+    budget = settings["time_budget_s"]
+    if not budget:
+        return folds, repeats, capped
+
+    def round_seconds(k):
+        return math.ceil(k / workers) * fold_seconds(k)
+
+    while folds > 2 and round_seconds(folds) > budget:
+        folds -= 1
+        capped = True
+    affordable = max(1, int(budget // round_seconds(folds)))
+    if affordable < repeats:
+        repeats, capped = affordable, True
+    return folds, repeats, capped
+
+
+# --- Aggregation ---
+def summarize(values) -> dict:
+    values = np.array([v for v in values if v is not None], dtype=float)
+    if not len(values):
+        return {"mean": None, "std": None, "min": None, "max": None}
+    return {"mean": float(values.mean()), "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+            "min": float(values.min()), "max": float(values.max())}
+
+
+METRICS = ["precision", "recall", "f1", "accuracy", "balanced_accuracy", "roc_auc", "average_precision"]
+
+
+def aggregate(results: list, feature_names: list) -> dict:
+    """Mean, std, min and max of each metric across folds, and permutation importance sorted by mean drop."""
+    metrics = {name: summarize(r[name] for r in results) for name in METRICS}
+    importance = {}
+    if results and results[0]["importance"]:
+        drops = np.array([r["importance"] for r in results])
+        order = np.argsort(-drops.mean(axis=0))
+        importance = {feature_names[i]: summarize(drops[:, i]) for i in order}
+    return {"metrics": metrics, "permutation_importance": importance}
+
+
+# --- Cross-Validation ---
+def cross_validate(X: np.ndarray, y, encoder, config: dict, settings: dict) -> dict:
+    """Repeated stratified k-fold evaluation of the config's forest over one shared encoded matrix.
+
+    ``X`` is the encoder's one-hot matrix for all rows, written once to a
+    memory-mapped file that every worker reads, so folds never re-encode or
+    copy it between processes. Each fold task also computes permutation
+    importance on its held-out rows. With ``time_budget_s`` set, fold and
+    repeat counts are cut to what one calibration fit says will fit, and no
+    new repeat starts once the budget is spent.
+    """
+    from sklearn.model_selection import StratifiedKFold
+    from src.train.train_from_config import model_params
+
+    y = np.asarray(y)
+    seed = config.get("random_state", 42)
+    rf_params = {"random_state": seed, **model_params(config)}
+    workers = settings["workers"] or os.cpu_count() or 1
+    groups = [(int(o), int(o + s)) for o, s in zip(encoder.offsets, encoder.widths)]
+    min_class = int(np.bincount(y.astype(np.int64)).min()) if len(np.unique(y)) == 2 else 0
+    if min_class < 2:
+        raise ValueError(f"Cross-validation of {config['label']} needs at least 2 rows of each class")
+
+    start_time = time.time()
+    n_predicts = 1 + settings["permutation_repeats"] * len(groups)
+    estimate = {}
+
+    def fold_seconds(k):
+        if k not in estimate:
+            estimate[k] = estimate_fold_seconds(X, y, rf_params, k, n_predicts, seed)
+        return estimate[k]
+
+    with span("plan"):
+        folds, repeats, capped = plan_folds(settings, min_class, fold_seconds, min(workers, settings["folds"]))
+    workers = min(workers, folds)
+    logging.info(f"🔁 Cross-validating {config['label']}: {folds} folds x {repeats} repeat(s) on {workers} worker(s)"
+                 + (f" (capped from {settings['folds']} x {settings['repeats']})" if capped else ""))
+
+    results, round_time = [], 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"X": os.path.join(tmp, "X.npy"), "y": os.path.join(tmp, "y.npy")}
+        np.save(paths["X"], np.ascontiguousarray(X, dtype=np.float32))
+        np.save(paths["y"], y)
+        pool = FoldPool(paths, workers)
+        try:
+            for repeat in range(repeats):
+                elapsed = time.time() - start_time
+                if repeat and settings["time_budget_s"] and elapsed + round_time > settings["time_budget_s"]:
+                    logging.info(f"⏳ Time budget reached after {repeat} repeat(s)")
+                    capped = True
+                    break
+                round_start = time.time()
+                splits = list(StratifiedKFold(folds, shuffle=True, random_state=seed + repeat).split(X, y))
+                with span("folds", rows=len(y), repeat=repeat, folds=folds):
+                    fold_results = pool.map(splits, rf_params, groups, settings, seed + repeat)
+                for fold, result in enumerate(fold_results):
+                    results.append({"repeat": repeat, "fold": fold, **result})
+                round_time = time.time() - round_start
+        finally:
+            pool.close()
+    elapsed = time.time() - start_time
+
+    summary = aggregate(results, list(config["features"]))
+    main_metric = summary["metrics"][settings["scoring"]]
+    logging.info(f"📊 {config['label']} {settings['scoring']} {main_metric['mean']:.4f} ± {main_metric['std']:.4f} "
+                 f"over {len(results)} folds in {elapsed:.2f}s")
+    return {
+        "folds": folds,
+        "repeats": len(results) // folds,
+        "requested": {"folds": settings["folds"], "repeats": settings["repeats"]},
+        "time_budget_s": settings["time_budget_s"],
+        "capped": capped,
+        "workers": workers,
+        "scoring": settings["scoring"],
+        "wall_time_s": elapsed,
+        **summary,
+        "per_fold": [{k: v for k, v in r.items() if k != "importance"} for r in results],
+    }
+
+
+def plot_permutation_importance(cv_report: dict, output_plot: str):
+    import matplotlib.pyplot as plt
+    importance = cv_report["permutation_importance"]
+    names = list(importance)
+    plt.figure(figsize=(10, 6))
+    plt.title(f"Permutation Importance ({cv_report['scoring']} drop, {cv_report['folds']}-fold CV)")
+    plt.bar(range(len(names)), [importance[n]["mean"] for n in names], yerr=[importance[n]["std"] for n in names])
+    plt.xticks(range(len(names)), names, rotation=90)
+    plt.tight_layout()
+    plt.savefig(output_plot)
+    plt.close()
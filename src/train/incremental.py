@@ -0,0 +1,175 @@
+# src/train/incremental.py
+
+import os
+import math
+import json
+import time
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.shared.instrument import span
+from src.train.train_from_config import load_config, save_artifacts
+
+INCREMENTAL_DEFAULTS = {
+    # Trees grown per update; None scales the forest's size by the delta's share of all rows seen
+    "trees_per_update": None,
+    "min_trees": 10,
+    # Sliding window: beyond this many trees the oldest are retired
+    "max_trees": 1000,
+}
+
+
+# --- Data Versions ---
+def versions_path(config: dict) -> str:
+    model_output = config.get("output_model", "models/model.joblib")
+    return config.get("output_versions", os.path.splitext(model_output)[0] + "_versions.json")
+
+
+def load_versions(config: dict) -> dict:
+    path = versions_path(config)
+    if not os.path.exists(path):
+        return {"label": config["label"], "versions": []}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def data_version(path: str, version: str = None) -> str:
+    """``version`` if given, otherwise a digest of the file's bytes."""
+    if version:
+        return version
+    from src.pipeline.cache import file_digest
+    return file_digest(path)[:16]
+
+
+def frame_version(df) -> str:
+    """A digest of a frame's values, for models trained on data that never reached a file."""
+    import hashlib
+    import pandas as pd
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def record_version(config: dict, entry: dict, reset: bool = False):
+    """Append ``entry`` to the model's version log; a full refit (``reset``) starts a new log."""
+    versions = {"label": config["label"], "versions": []} if reset else load_versions(config)
+    versions["versions"].append({**entry, "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds")})
+    path = versions_path(config)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(versions, f, indent=2)
+    logging.info(f"🏷️ {config['label']} has seen {len(versions['versions'])} data version(s): {path}")
+
+
+# --- Warm-Start Forest ---
+def trees_for_delta(settings: dict, n_trees: int, delta_rows: int, rows_seen: int) -> int:
+    if settings["trees_per_update"]:
+        return int(settings["trees_per_update"])
+    if not rows_seen:
+        return settings["min_trees"]
+    return max(settings["min_trees"], math.ceil(n_trees * delta_rows / rows_seen))
+
+
+def grow_forest(clf, X, y, n_new: int, max_trees: int, n_jobs: int = None, trees_grown: int = None) -> int:
+    """Fit ``n_new`` more trees on ``X``/``y`` alongside the existing ones; returns how many old trees were retired.
+
+    Existing trees are kept as they are (``warm_start``), so the cost is that of
+    the new trees on the delta rows alone. Trees beyond ``max_trees`` are
+    dropped oldest first, so the forest is a sliding window over updates.
+
+    Warm start seeds new trees by skipping one draw per existing tree, which
+    repeats earlier seeds once trees have been retired. ``trees_grown`` (every
+    tree ever fitted, retired ones included) is skipped instead, so tree ``k``
+    gets the ``k``-th seed of ``random_state`` as in one forest that never
+    dropped a tree.
+    """
+    classes = np.unique(y)
+    if len(classes) != len(clf.classes_) or (classes != clf.classes_).any():
+        raise ValueError(f"Delta has classes {classes.tolist()}; the model needs all of {clf.classes_.tolist()}")
+    seed = clf.random_state
+    params = {"warm_start": True, "n_estimators": len(clf.estimators_) + n_new}
+    if n_jobs is not None:
+        params["n_jobs"] = n_jobs
+    skipped = (trees_grown or len(clf.estimators_)) - len(clf.estimators_)
+    if skipped > 0 and isinstance(seed, (int, np.integer)):
+        state = np.random.RandomState(seed)
+        state.randint(np.iinfo(np.int32).max, size=skipped)
+        params["random_state"] = state
+    clf.set_params(**params)
+    try:
+        clf.fit(X, y)
+    finally:
+        clf.set_params(warm_start=False, random_state=seed)
+
+    retired = max(0, len(clf.estimators_) - max_trees)
+    if retired:
+        del clf.estimators_[:retired]
+        clf.n_estimators = len(clf.estimators_)
+    return retired
+
+
+def update_from_config(config_path: str, delta_path: str, version: str = None, n_jobs: int = None):
+    """Update a saved model with the rows in ``delta_path`` (new or changed assets only).
+
+    The saved encoder is reused unchanged, so a delta's unseen categories
+    encode as unknown and the model keeps its feature layout; the count is
+    logged because many of them mean a full refit is due. The delta is split
+    like a full fit: new trees grow on its training part and the report
+    covers its held-out part. Versions already in the model's version log
+    are skipped, so rerunning a day's update is a no-op.
+    """
+    import joblib
+    from sklearn.model_selection import train_test_split
+    from src.shared.encoder import load_encoder
+    from src.shared.storage import read_table
+
+    config = load_config(config_path)
+    settings = {**INCREMENTAL_DEFAULTS, **config.get("incremental", {})}
+    model_output = config.get("output_model", "models/model.joblib")
+    if not os.path.exists(model_output):
+        raise FileNotFoundError(f"{model_output} does not exist; train {config['label']} in full first")
+
+    version = data_version(delta_path, version)
+    versions = load_versions(config)
+    if any(v["version"] == version for v in versions["versions"]):
+        logging.info(f"⏭️ {config['label']} has already seen data version {version}; nothing to do")
+        return joblib.load(model_output)
+
+    start = time.perf_counter()
+    with span("load") as load:
+        df = read_table(delta_path, columns=config["features"] + [config["label"]], compact=True)
+        load.rows = len(df)
+    clf = joblib.load(model_output)
+    encoder = load_encoder(config.get("output_encoder", "models/encoder.joblib"), config["features"])
+    with span("transform", rows=len(df)):
+        codes = encoder.ordinal(df)
+        X = encoder.transform(df)
+    unseen = int(((codes < 0).any(axis=1) | encoder.unseen_values(df)).sum())
+    if unseen:
+        logging.warning(f"⚠️ {unseen} of {len(df)} delta rows have categories the encoder has not seen")
+
+    y = df[config["label"]]
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=config.get("test_size", 0.2),
+        random_state=config.get("random_state", 42), stratify=y
+    )
+    rows_seen = sum(v["rows"] for v in versions["versions"])
+    trees_grown = len(clf.estimators_) + sum(v.get("trees_retired", 0) for v in versions["versions"])
+    n_new = trees_for_delta(settings, len(clf.estimators_), len(df), rows_seen)
+    with span("fit", rows=len(train_idx), label=config["label"]):
+        retired = grow_forest(clf, X[train_idx], y.iloc[train_idx].to_numpy(), n_new, settings["max_trees"], n_jobs,
+                              trees_grown)
+    y_test = y.iloc[test_idx]
+    with span("evaluate", rows=len(test_idx), label=config["label"]):
+        y_pred = clf.predict(X[test_idx])
+    save_artifacts(clf, encoder, y_test, y_pred, config)
+
+    elapsed = time.perf_counter() - start
+    record_version(config, {
+        "version": version, "mode": "incremental", "input": delta_path, "rows": len(df),
+        "unseen_rows": unseen, "trees_added": n_new, "trees_retired": retired,
+        "trees_grown": trees_grown + n_new, "n_estimators": len(clf.estimators_), "wall_time_s": elapsed,
+    })
+    logging.info(f"🌱 {config['label']}: +{n_new} trees on {len(train_idx)} delta training rows, {retired} retired, "
+                 f"{len(clf.estimators_)} total in {elapsed:.2f}s")
+    return clf
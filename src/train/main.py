@@ -1,19 +1,26 @@
 import argparse
-import subprocess
+import os
+import sys
 
-def run_inventory(config):
-    subprocess.run([
-        "python", "-m", "src.train.train_from_config", "--config", config
-    ], check=True)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-def run_ipam(config):
-    subprocess.run([
-        "python", "-m", "src.train.train_from_config", "--config", config
-    ], check=True)
+from src.shared.logs import setup_logging
 
-def run_both(inventory_config, ipam_config):
-    run_inventory(inventory_config)
-    run_ipam(ipam_config)
+def run_inventory(config, input_path=None, cv=False, cv_budget=None):
+    from src.train.train_from_config import train_from_config
+    train_from_config(config, input_path, cv, cv_budget)
+
+def run_ipam(config, input_path=None, cv=False, cv_budget=None):
+    from src.train.train_from_config import train_from_config
+    train_from_config(config, input_path, cv, cv_budget)
+
+def run_both(inventory_config, ipam_config, input_path=None, n_jobs=-1, cv=False, cv_budget=None):
+    from src.train.train_from_config import train_many
+    train_many([inventory_config, ipam_config], input_path, n_jobs, cv, cv_budget)
+
+def run_update(config, delta_path, version=None, n_jobs=None):
+    from src.train.incremental import update_from_config
+    update_from_config(config, delta_path, version, n_jobs)
 
 def main():
     parser = argparse.ArgumentParser(description="Train inventory and/or IPAM models")
@@ -21,22 +28,39 @@ def main():
 
     inv_parser = subparsers.add_parser("inventory", help="Train inventory model")
     inv_parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    inv_parser.add_argument("--input", type=str, default=None, help="Override the config's input table")
 
     ipam_parser = subparsers.add_parser("ipam", help="Train ipam model")
     ipam_parser.add_argument("--config", type=str, default="config/ipam_full.json")
+    ipam_parser.add_argument("--input", type=str, default=None, help="Override the config's input table")
 
     both_parser = subparsers.add_parser("both", help="Train both models")
     both_parser.add_argument("--inventory_config", type=str, default="config/inventory_full.json")
     both_parser.add_argument("--ipam_config", type=str, default="config/ipam_full.json")
+    both_parser.add_argument("--input", type=str, default=None, help="Override the configs' input table")
+    both_parser.add_argument("--n_jobs", type=int, default=-1, help="Cores shared by the concurrent fits (-1 = all)")
+
+    update_parser = subparsers.add_parser("update", help="Grow a saved model on new or changed assets")
+    update_parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    update_parser.add_argument("--delta", type=str, required=True, help="Table of only the new or changed assets")
+    update_parser.add_argument("--version", type=str, default=None, help="Data version label (default: file digest)")
+    update_parser.add_argument("--n_jobs", type=int, default=None)
+
+    for sub in [inv_parser, ipam_parser, both_parser]:
+        sub.add_argument("--cv", action="store_true", help="Add stratified k-fold metrics and permutation importance")
+        sub.add_argument("--cv_budget", type=float, default=None, help="Wall-clock seconds that cap folds and repeats")
 
     args = parser.parse_args()
+    setup_logging()
 
     if args.command == "inventory":
-        run_inventory(args.config)
+        run_inventory(args.config, args.input, args.cv, args.cv_budget)
     elif args.command == "ipam":
-        run_ipam(args.config)
+        run_ipam(args.config, args.input, args.cv, args.cv_budget)
     elif args.command == "both":
-        run_both(args.inventory_config, args.ipam_config)
+        run_both(args.inventory_config, args.ipam_config, args.input, args.n_jobs, args.cv, args.cv_budget)
+    elif args.command == "update":
+        run_update(args.config, args.delta, args.version, args.n_jobs)
     else:
         raise ValueError("Invalid train command.")
 
@@ -0,0 +1,249 @@
+# src/train/search.py
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.shared.instrument import span
+from src.shared.logs import setup_logging
+from src.train.train_from_config import encode_features, load_config, model_params, train_from_frame
+
+
+SEARCH_METHODS = ["grid", "random", "halving"]
+
+
+# --- Candidates ---
+def grid_candidates(space: dict) -> list:
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def sample_value(spec, rng: random.Random):
+    """A list is sampled uniformly; ``{"low", "high", "log", "int"}`` is a (log-)uniform range."""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    low, high = spec["low"], spec["high"]
+    if spec.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if spec.get("int") else value
+
+
+def random_candidates(space: dict, n_iter: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [{name: sample_value(space[name], rng) for name in sorted(space)} for _ in range(n_iter)]
+
+
+# --- Shared Data ---
+def write_memmap(X: np.ndarray, y: np.ndarray, test_size: float, validation_size: float, seed: int,
+                 directory: str) -> dict:
+    """Save X/y as .npy files ordered [train | validation], leaving out the test rows.
+
+    The test split is the one ``train_from_frame`` reports on, so candidates
+    are selected on a validation split carved from the training rows and
+    the refit model's report stays an unbiased estimate. Train rows are
+    stratified and shuffled, so every training prefix (the subsets
+    successive halving uses) is a contiguous slice: workers read views of
+    the memory map and never copy the matrix.
+    """
+    from sklearn.model_selection import train_test_split
+    fit_idx, test_idx = train_test_split(np.arange(len(y)), test_size=test_size, random_state=seed, stratify=y)
+    train_idx, val_idx = train_test_split(fit_idx, test_size=validation_size, random_state=seed, stratify=y[fit_idx])
+    order = np.concatenate([train_idx, val_idx])
+    paths = {"X": os.path.join(directory, "X.npy"), "y": os.path.join(directory, "y.npy")}
+    np.save(paths["X"], np.ascontiguousarray(X[order], dtype=np.float32))
+    np.save(paths["y"], y[order])
+    return {**paths, "n_train": len(train_idx), "n_validation": len(val_idx), "n_test": len(test_idx)}
+
+
+_data = None
+
+def _open_memmap(data: dict):
+    global _data
+    _data = {
+        "X": np.load(data["X"], mmap_mode="r"),
+        "y": np.load(data["y"], mmap_mode="r"),
+        "n_train": data["n_train"],
+    }
+
+
+def run_trial(params: dict, n_rows: int, base_params: dict, scoring: str, seed: int) -> dict:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import get_scorer
+    X, y, n_train = _data["X"], _data["y"], _data["n_train"]
+    clf = RandomForestClassifier(**{**base_params, **params, "n_jobs": 1, "random_state": seed})
+    start = time.perf_counter()
+    clf.fit(X[:n_rows], y[:n_rows])
+    fit_time = time.perf_counter() - start
+    score = get_scorer(scoring)(clf, X[n_train:], y[n_train:])
+    return {"params": params, "n_train": n_rows, "score": float(score), "fit_time_s": fit_time,
+            "wall_time_s": time.perf_counter() - start}
+
+
+# --- Search ---
+class TrialPool:
+    """Runs trials in worker processes that share one memory-mapped matrix (in-process for one worker)."""
+
+    def __init__(self, data: dict, workers: int):
+        self.workers = workers
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_open_memmap, initargs=(data,))
+        else:
+            _open_memmap(data)
+
+    def map(self, candidates, *args) -> list:
+        jobs = [(c, *args) for c in candidates]
+        if self.pool is None:
+            return [run_trial(*job) for job in jobs]
+        return list(self.pool.map(run_trial, *zip(*jobs)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def successive_halving(pool: TrialPool, candidates: list, n_train: int, eta: int, min_rows: int, run_args) -> list:
+    """Score all candidates on a small training prefix, keep the top 1/eta, grow the prefix eta-fold."""
+    n_rungs, survivors = 1, len(candidates)
+    while survivors > 1:
+        survivors = math.ceil(survivors / eta)
+        n_rungs += 1
+    rows = max(min_rows, n_train // eta ** (n_rungs - 1))
+    trials = []
+    for rung in range(n_rungs):
+        n_rows = n_train if rung == n_rungs - 1 else min(rows, n_train)
+        results = pool.map(candidates, n_rows, *run_args)
+        for result in results:
+            result["rung"] = rung
+        trials += results
+        logging.info(f"🪜 Rung {rung}: {len(candidates)} candidates on {n_rows} rows, best {max(r['score'] for r in results):.4f}")
+        if len(candidates) == 1 or n_rows == n_train:
+            break
+        keep = max(1, math.ceil(len(candidates) / eta))
+        candidates = [r["params"] for r in sorted(results, key=lambda r: -r["score"])[:keep]]
+        rows *= eta
+    return trials
+
+
+def log_to_mlflow(trials: list, config: dict, search: dict, best: dict, elapsed: float):
+    import mlflow
+    mlflow.set_experiment(search.get("experiment", "d502-hyperparameter-search"))
+    with mlflow.start_run(run_name=f"search-{config['label']}"):
+        mlflow.log_params({"label": config["label"], "method": search.get("method", "grid"),
+                           "scoring": search.get("scoring", "roc_auc"), "trials": len(trials)})
+        mlflow.log_metrics({"best_score": best["score"], "search_wall_time_s": elapsed})
+        for i, trial in enumerate(trials):
+            with mlflow.start_run(run_name=f"trial-{i:04d}", nested=True):
+                mlflow.log_params({**trial["params"], "n_train": trial["n_train"], "rung": trial.get("rung", 0)})
+                mlflow.log_metrics({"score": trial["score"], "fit_time_s": trial["fit_time_s"],
+                                    "wall_time_s": trial["wall_time_s"]})
+
+
+def search_from_config(config_path: str, input_path: str = None, workers: int = 0, use_mlflow: bool = False,
+                       refit: bool = True) -> dict:
+    """Tune the config's random forest over its ``search`` block.
+
+    ``search`` holds ``method`` (grid, random or halving), ``space``
+    (parameter -> list or range), ``scoring`` (an sklearn scorer name),
+    ``validation_size`` (share of the training rows trials are scored on)
+    and, per method, ``n_iter`` (random/halving candidates), ``eta`` and
+    ``min_rows`` (halving). The test rows are never seen by the search.
+    """
+    config = load_config(config_path)
+    search = config.get("search")
+    if not search:
+        raise ValueError(f"{config_path} has no 'search' block")
+    method = search.get("method", "grid")
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method '{method}' (expected one of {SEARCH_METHODS})")
+    seed = config.get("random_state", 42)
+    scoring = search.get("scoring", "roc_auc")
+    workers = workers or os.cpu_count() or 1
+
+    input_path = input_path or config.get("input", config["input_csv"])
+    from src.shared.storage import read_table
+    with span("load") as load:
+        df = read_table(input_path, columns=config["features"] + [config["label"]], compact=True)
+        load.rows = len(df)
+    _, X = encode_features(df, config["features"])
+    y = df[config["label"]].to_numpy()
+
+    space = search["space"]
+    if method == "grid" or (method == "halving" and "n_iter" not in search):
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, search.get("n_iter", 20), seed)
+
+    start_time = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        data = write_memmap(X, y, config.get("test_size", 0.2), search.get("validation_size", 0.2), seed, tmp)
+        del X
+        logging.info(f"🔍 {method} search: {len(candidates)} candidates on {workers} worker(s), scoring {scoring} "
+                     f"on {data['n_validation']} validation rows ({data['n_test']} test rows held out)")
+        pool = TrialPool(data, workers)
+        try:
+            with span("trials", method=method, candidates=len(candidates)):
+                run_args = (model_params(config), scoring, seed)
+                if method == "halving":
+                    trials = successive_halving(pool, candidates, data["n_train"], search.get("eta", 3),
+                                                search.get("min_rows", 500), run_args)
+                else:
+                    trials = pool.map(candidates, data["n_train"], *run_args)
+        finally:
+            pool.close()
+    elapsed = time.time() - start_time
+
+    final = [t for t in trials if t["n_train"] == max(t["n_train"] for t in trials)]
+    best = max(final, key=lambda t: t["score"])
+    logging.info(f"🏆 Best validation {scoring} {best['score']:.4f} with {best['params']} "
+                 f"({len(trials)} trials in {elapsed:.2f}s)")
+
+    output = config.get("output_search", os.path.join("reports", f"{config['label']}_search.json"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"method": method, "scoring": scoring,
+                   "rows": {k: data[k] for k in ("n_train", "n_validation", "n_test")},
+                   # Selected on this score, so it is optimistic; the refit model's report is the unbiased one
+                   "best": best, "trials": trials, "wall_time_s": elapsed}, f, indent=2)
+    logging.info(f"📁 Search results saved to: {output}")
+
+    if use_mlflow:
+        log_to_mlflow(trials, config, search, best, elapsed)
+
+    if refit:
+        # Retrain with the winning parameters so the usual model artifacts reflect them
+        train_from_frame(df, {**config, "model_params": {**model_params(config), **best["params"]}},
+                         input_path=input_path)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter search over a config's 'search' space")
+    parser.add_argument("--config", type=str, default="config/inventory_full.json")
+    parser.add_argument("--input", type=str, default=None, help="Override the config's input table")
+    parser.add_argument("--workers", type=int, default=0, help="Trial processes (0 = all cores)")
+    parser.add_argument("--mlflow", type=int, choices=[0, 1], default=0, help="Log every trial to MLflow")
+    parser.add_argument("--refit", type=int, choices=[0, 1], default=1,
+                        help="Retrain and save the model with the best parameters")
+    args = parser.parse_args()
+    setup_logging()
+
+    search_from_config(args.config, args.input, args.workers, bool(args.mlflow), bool(args.refit))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,222 @@
 # src/train/train_from_config.py
 
-import pandas as pd
+import numpy as np
 import json
-import joblib
 import os
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-def train_from_config(config_path):
+from src.shared.instrument import span
+
+# sklearn, joblib, pandas and the encoder are imported by the functions that
+# use them: scoring and serving import this module for ``load_config`` alone,
+# and --help should not pay for them either.
+
+def load_config(config_path):
     with open(config_path, 'r') as f:
-        config = json.load(f)
+        return json.load(f)
 
-    df = pd.read_csv(config["input_csv"])
-    X = df[config["features"]]
-    y = df[config["label"]]
-    X = X.fillna("missing")
-    X = pd.get_dummies(X)
+def train_from_config(config_path, input_path=None, cv=False, cv_budget=None):
+    config = load_config(config_path)
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=config.get("test_size", 0.2), 
-        random_state=config.get("random_state", 42), stratify=y
-    )
+    # Only the feature and label columns are read; input may be CSV, Parquet or Feather
+    input_path = input_path or config.get("input", config["input_csv"])
+    from src.shared.storage import read_table
+    with span("load") as load:
+        df = read_table(input_path, columns=config["features"] + [config["label"]], compact=True)
+        load.rows = len(df)
+    return train_from_frame(df, config, cv, cv_budget, input_path)
+
+def record_full_fit(config, df, clf, input_path=None):
+    """Start the model's data-version log, which incremental updates then extend.
+
+    The version is a digest of ``input_path``, or of ``df`` when it was not read from a file.
+    """
+    from src.train.incremental import data_version, frame_version, record_version
+    version = data_version(input_path) if input_path else frame_version(df)
+    record_version(config, {"version": version, "mode": "full", "input": input_path,
+                            "rows": len(df), "n_estimators": len(clf.estimators_)}, reset=True)
+
+def encode_features(df, features):
+    """Fit the model's encoder; returns ``(encoder, X)`` with X a dense one-hot matrix.
 
+    Dense float32 rather than sparse: random forests fit several times faster
+    on it, and it is the dtype they convert to anyway.
+    """
+    from src.shared.encoder import CategoricalEncoder
+    encoder = CategoricalEncoder(features)
+    with span("transform", rows=len(df)):
+        return encoder, encoder.fit_transform(df)
+
+def model_params(config):
     # Build model params from config
     rf_params = {}
     if "model_params" in config:
-        rf_params = config["model_params"]
+        rf_params = dict(config["model_params"])
     else:
         # Legacy support for n_estimators etc at top-level
         for k in ["n_estimators", "max_depth", "min_samples_split", "min_samples_leaf"]:
             if k in config:
                 rf_params[k] = config[k]
+    return rf_params
+
+def fit_model(X, y, config, n_jobs=None):
+    """Split, fit and predict; returns ``(clf, y_test, y_pred)``.
+
+    The split is drawn over row positions, so it is the same whether ``X`` is
+    private to this model or shared with others.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=config.get("test_size", 0.2),
+        random_state=config.get("random_state", 42), stratify=y
+    )
+    rf_params = model_params(config)
+    if n_jobs is not None:
+        rf_params.setdefault("n_jobs", n_jobs)
 
     clf = RandomForestClassifier(**rf_params)
-    clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_test)
-    print("--- Model Report ---")
-    print(classification_report(y_test, y_pred))
-
-    # Save classification report as JSON if specified
-    output_report = config.get("output_report", None)
-    if output_report:
-        os.makedirs(os.path.dirname(output_report), exist_ok=True)
+    with span("fit", rows=len(train_idx), label=y.name):
+        clf.fit(X[train_idx], y.iloc[train_idx])
+    y_test = y.iloc[test_idx]
+    with span("evaluate", rows=len(test_idx), label=y.name):
+        return clf, y_test, clf.predict(X[test_idx])
+
+def run_cross_validation(X, y, encoder, config, cv_budget=None):
+    from src.train.cross_validate import cross_validate, cv_settings
+    with span("cv", rows=len(y), label=config["label"]):
+        return cross_validate(X, y, encoder, config, cv_settings(config, cv_budget))
+
+def format_report(report_dict, digits=2):
+    """The text layout of ``classification_report``, rendered from its ``output_dict`` form."""
+    width = max(len("weighted avg"), *(len(str(name)) for name in report_dict))
+    lines = [f"{'':>{width}} " + "".join(f" {h:>9}" for h in ("precision", "recall", "f1-score", "support")), ""]
+    for name, row in report_dict.items():
+        if name == "accuracy":
+            lines += ["", f"{name:>{width}} " + " " * 20 + f" {row:>9.{digits}f} {report_dict['macro avg']['support']:>9.0f}"]
+        else:
+            lines.append(f"{name:>{width}} " + "".join(f" {row[k]:>9.{digits}f}" for k in ("precision", "recall", "f1-score"))
+                         + f" {row['support']:>9.0f}")
+    return "\n".join(lines)
+
+def save_artifacts(clf, encoder, y_test, y_pred, config, cv_report=None):
+    """Write the report, model, encoder and plot.
+
+    With ``cv_report`` the report gains a ``cross_validation`` section and the
+    plot shows permutation importance across folds instead of impurity importance.
+    """
+    import joblib
+    from sklearn.metrics import classification_report
+
+    with span("evaluate", rows=len(y_test), label=config["label"]):
         report_dict = classification_report(y_test, y_pred, output_dict=True)
-        with open(output_report, "w") as f:
-            json.dump(report_dict, f, indent=2)
+        print("--- Model Report ---")
+        print(format_report(report_dict))
+        if cv_report:
+            report_dict["cross_validation"] = cv_report
 
-    # Save model and encoder
-    model_output = config.get("output_model", "models/model.joblib")
-    encoder_output = config.get("output_encoder", "models/encoder.joblib")
-    os.makedirs(os.path.dirname(model_output), exist_ok=True)
-    os.makedirs(os.path.dirname(encoder_output), exist_ok=True)
-    joblib.dump(clf, model_output)
-    joblib.dump(X.columns, encoder_output)
+    with span("save", label=config["label"]):
+        # Save classification report as JSON if specified
+        output_report = config.get("output_report", None)
+        if output_report:
+            os.makedirs(os.path.dirname(output_report), exist_ok=True)
+            with open(output_report, "w") as f:
+                json.dump(report_dict, f, indent=2)
+
+        # Save model and encoder
+        model_output = config.get("output_model", "models/model.joblib")
+        encoder_output = config.get("output_encoder", "models/encoder.joblib")
+        os.makedirs(os.path.dirname(model_output), exist_ok=True)
+        os.makedirs(os.path.dirname(encoder_output), exist_ok=True)
+        joblib.dump(clf, model_output)
+        joblib.dump(encoder, encoder_output)
 
     # Save feature importance plot if specified
     output_plot = config.get("output_plot", None)
     if output_plot:
-        os.makedirs(os.path.dirname(output_plot), exist_ok=True)
-        import matplotlib.pyplot as plt
-        importances = clf.feature_importances_
-        indices = importances.argsort()[::-1]
-        top_n = config.get("top_n_features", 20)
-        plt.figure(figsize=(10, 6))
-        plt.title("Feature Importances")
-        plt.bar(range(min(top_n, len(indices))), importances[indices[:top_n]])
-        plt.xticks(range(min(top_n, len(indices))), X.columns[indices[:top_n]], rotation=90)
-        plt.tight_layout()
-        plt.savefig(output_plot)
-        plt.close()
+        with span("plot", label=config["label"]):
+            os.makedirs(os.path.dirname(output_plot), exist_ok=True)
+            if cv_report and cv_report["permutation_importance"]:
+                from src.train.cross_validate import plot_permutation_importance
+                plot_permutation_importance(cv_report, output_plot)
+                return
+            import matplotlib.pyplot as plt
+            importances = clf.feature_importances_
+            indices = importances.argsort()[::-1]
+            top_n = config.get("top_n_features", 20)
+            plt.figure(figsize=(10, 6))
+            plt.title("Feature Importances")
+            plt.bar(range(min(top_n, len(indices))), importances[indices[:top_n]])
+            plt.xticks(range(min(top_n, len(indices))), encoder.feature_names[indices[:top_n]], rotation=90)
+            plt.tight_layout()
+            plt.savefig(output_plot)
+            plt.close()
+
+def train_from_frame(df, config, cv=False, cv_budget=None, input_path=None):
+    """Fit, save and record a full fit on ``df``; ``input_path`` names the file it was read from, if any."""
+    encoder, X = encode_features(df, config["features"])
+    clf, y_test, y_pred = fit_model(X, df[config["label"]], config)
+    cv_report = run_cross_validation(X, df[config["label"]], encoder, config, cv_budget) if cv else None
+    save_artifacts(clf, encoder, y_test, y_pred, config, cv_report)
+    record_full_fit(config, df, clf, input_path)
+    return clf
+
+def train_many(config_paths, input_path=None, n_jobs=-1, cv=False, cv_budget=None):
+    """Train several models from one load of the data.
+
+    Configs that read the same input share one read of the union of their
+    columns, and configs with the same feature list share one encoded matrix.
+    All models are fitted concurrently, splitting ``n_jobs`` cores between
+    them. Each config still writes its own model, encoder, report and plot.
+    With ``cv``, each model is then cross-validated in turn on all cores,
+    reusing the matrix its fit was encoded into.
+    """
+    import joblib
+    from src.shared.storage import read_table
+
+    configs = [load_config(path) for path in config_paths]
+    inputs = [input_path or c.get("input", c["input_csv"]) for c in configs]
+
+    frames = {}
+    for path in dict.fromkeys(inputs):
+        columns = [col for c, i in zip(configs, inputs) if i == path for col in c["features"] + [c["label"]]]
+        with span("load") as load:
+            frames[path] = read_table(path, columns=list(dict.fromkeys(columns)), compact=True)
+            load.rows = len(frames[path])
+
+    matrices = {}
+    for config, path in zip(configs, inputs):
+        key = (path, tuple(config["features"]))
+        if key not in matrices:
+            matrices[key] = encode_features(frames[path], config["features"])
+    jobs = [
+        (*matrices[path, tuple(c["features"])], frames[path][c["label"]], c) for c, path in zip(configs, inputs)
+    ]
+
+    cores = joblib.cpu_count() if n_jobs == -1 else n_jobs
+    per_model = max(1, cores // len(jobs))
+    # Each thread runs in a copy of this context so its spans nest under the caller's
+    contexts = [contextvars.copy_context() for _ in jobs]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        fits = list(pool.map(lambda ctx, job: ctx.run(fit_model, *job[1:], n_jobs=per_model), contexts, jobs))
+
+    # Reports and plots are written one at a time (matplotlib is not thread-safe)
+    for (encoder, X, y, config), path, (clf, y_test, y_pred) in zip(jobs, inputs, fits):
+        cv_report = run_cross_validation(X, y, encoder, config, cv_budget) if cv else None
+        save_artifacts(clf, encoder, y_test, y_pred, config, cv_report)
+        record_full_fit(config, frames[path], clf, path)
+    return [clf for clf, _, _ in fits]
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', required=True)
+    parser.add_argument('--input', default=None, help="Override the config's input table")
+    parser.add_argument('--cv', action='store_true', help="Add stratified k-fold metrics and permutation importance")
+    parser.add_argument('--cv_budget', type=float, default=None, help="Wall-clock seconds that cap folds and repeats")
     args = parser.parse_args()
-    train_from_config(args.config)
\ No newline at end of file
+    from src.shared.logs import setup_logging
+    setup_logging()
+    train_from_config(args.config, args.input, args.cv, args.cv_budget)
\ No newline at end of file
@@ -0,0 +1,40 @@
+# tests/test_allocators.py
+
+import numpy as np
+import pytest
+
+from src.generate.allocators import CapacityError, HostnameAllocator, IPAllocator
+
+
+def test_hostname_numbers_are_unique_until_full():
+    hosts = HostnameAllocator(["A", "B"], np.random.default_rng(0), num_width=1)
+    batch = hosts.allocate([0, 1, 0, 0, 1])
+    singles = [hosts.allocate_one(0) for _ in range(6)]
+    cell_a = list(batch[[0, 2, 3]]) + singles
+    assert sorted(cell_a) == list(range(1, 10))
+    with pytest.raises(CapacityError):
+        hosts.allocate_one(0)
+    with pytest.raises(CapacityError):
+        hosts.allocate([1] * 8)
+    assert hosts.remaining.tolist() == [0, 7]
+
+
+def test_ip_offsets_are_unique_and_skip_reserved_addresses():
+    ips = IPAllocator(["lab"], ["192.168.0.0/28"], np.random.default_rng(0))
+    ips.reserve(0, ["192.168.0.1", "192.168.0.5"])
+    offsets = list(ips.allocate(np.zeros(8, dtype=np.int64))) + [ips.allocate_one(0) for _ in range(4)]
+    addresses = set(ips.format(np.zeros(len(offsets), dtype=np.int64), offsets))
+    assert len(addresses) == 12
+    assert not addresses & {"192.168.0.1", "192.168.0.5"}
+    assert ips.remaining.tolist() == [0]
+    with pytest.raises(CapacityError):
+        ips.allocate([0])
+
+
+def test_partitions_never_collide():
+    draws = []
+    for phase in range(3):
+        ips = IPAllocator(["lab"], ["10.0.0.0/24"], np.random.default_rng(phase), partition=(phase, 3))
+        draws.append(ips.allocate(np.zeros(int(ips.remaining[0]), dtype=np.int64)))
+    merged = np.concatenate(draws)
+    assert len(merged) == 254 and len(np.unique(merged)) == 254
@@ -0,0 +1,11 @@
+from src.bench.benchmark import measure_stage
+
+
+def test_a_stage_past_its_timeout_is_stopped_and_reported(tmp_path):
+    result = measure_stage("generate", str(tmp_path), 10, "batch", "csv", 0, timeout=0.01)
+    assert result["error"].startswith("timed out") and result["exitcode"] is not None
+
+
+def test_a_failing_stage_is_reported_with_its_exit_code(tmp_path):
+    result = measure_stage("no-such-stage", str(tmp_path), 10, "batch", "csv", 0)
+    assert "Unknown stage" in result["error"] and result["exitcode"] == 0
@@ -0,0 +1,47 @@
+# tests/test_compact.py
+
+import numpy as np
+import pandas as pd
+
+from src.prepare.generate_lightspeed_assets import enrich_frame
+from src.shared.compact import expand_frame, fqdn
+from src.shared.storage import read_table, write_table
+
+ROWS = pd.DataFrame({
+    "ip_address": ["10.30.0.1", "10.30.0.2", "10.10.0.3"],
+    "hostname": ["SEAWASW12", None, "PITPART07"],
+    "fqdn": ["SEAWASW12.west.lightspeed.net", None, "PITPART07.east.lightspeed.net"],
+    "region": ["west", "west", "east"],
+    "status": ["active", "active", "active"],
+    "vendor": ["Cisco", "Cisco", "Cisco"],
+    "model": ["Catalyst9300", "Catalyst9300", "ISR4431"],
+    "missing_in_inventory": [0, 1, 0],
+    "missing_in_ipam": [0, 0, 1],
+})
+
+
+def test_fqdn_is_nan_without_hostname():
+    out = fqdn(ROWS)
+    assert out.iloc[0] == "SEAWASW12.west.lightspeed.net"
+    assert pd.isna(out.iloc[1])
+
+
+def test_blank_hostname_round_trips(tmp_path):
+    path = str(tmp_path / "assets.csv")
+    write_table(ROWS, path)
+    df = read_table(path, compact=True)
+    assert "fqdn" not in df.columns
+    assert pd.isna(df["hostname"].iloc[1])
+    restored = expand_frame(df)
+    assert restored["fqdn"].iloc[0] == ROWS["fqdn"].iloc[0]
+    assert pd.isna(restored["fqdn"].iloc[1])
+
+
+def test_blank_hostname_enriches_to_nan(tmp_path):
+    path = str(tmp_path / "assets.csv")
+    write_table(ROWS, path)
+    df = enrich_frame(read_table(path, compact=True))
+    assert len(df) == len(ROWS)
+    assert pd.isna(df["site_code"].iloc[1])
+    assert df["site_code"].iloc[0] == "SEA"
+    assert np.isin(df["ip_region_mismatch"], [0, 1]).all()
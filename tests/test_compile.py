@@ -0,0 +1,44 @@
+# tests/test_compile.py
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.generate.generate_base_assets import generate_asset_frame
+from src.generate.inject_presence_noise import label_presence, load_prob_config
+from src.prepare.generate_lightspeed_assets import enrich_frame
+from src.score.compile_model import check_equivalence, compile_model
+from src.shared.encoder import CategoricalEncoder
+
+FEATURES = ["region", "status", "vendor", "model", "role", "ip_region_mismatch"]
+LABEL = "missing_in_inventory"
+
+
+def fitted(n=4000):
+    df = generate_asset_frame(n, mode="batch", seed=3)
+    df = enrich_frame(label_presence(df, load_prob_config("config/generation_params.json"), seed=3))
+    encoder = CategoricalEncoder(FEATURES).fit(df)
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(encoder.transform(df), df[LABEL])
+    return df, encoder, model
+
+
+def test_compiled_table_scores_like_the_forest():
+    df, encoder, model = fitted()
+    compiled = compile_model(model, encoder)
+    expected = model.predict_proba(encoder.transform(df))
+    assert np.array_equal(compiled.predict_proba(df), expected)
+    # Unseen and missing values of every feature land in the table's last slots
+    assert check_equivalence(compiled, model, df) == 0.0
+
+
+def test_compiled_table_covers_unseen_and_missing_rows():
+    df, encoder, model = fitted(2000)
+    compiled = compile_model(model, encoder)
+    rows = df[FEATURES].head(4).astype(object).copy()
+    rows.loc[0, "region"] = "atlantis"
+    rows.loc[1, "vendor"] = np.nan
+    rows.loc[2, "ip_region_mismatch"] = np.nan
+    expected = model.predict_proba(encoder.transform(rows))
+    assert np.array_equal(compiled.predict_proba(rows), expected)
+    assert not encoder.unseen_values(rows).any()
+    assert encoder.unseen_values(pd.DataFrame({**rows.to_dict("list"), "ip_region_mismatch": [5, 0, 1, 0]}))[0]
@@ -0,0 +1,37 @@
+# tests/test_encoder.py
+
+import numpy as np
+import pandas as pd
+
+from src.shared.encoder import CategoricalEncoder
+
+FEATURES = ["region", "status", "ip_region_mismatch"]
+TRAIN = pd.DataFrame({
+    "region": ["east", "west", None, "east"],
+    "status": pd.Categorical(["active", "retired", "active", "active"]),
+    "ip_region_mismatch": np.array([0, 1, 0, 0], dtype=np.int8),
+})
+
+
+def test_layout_matches_get_dummies():
+    encoder = CategoricalEncoder(FEATURES).fit(TRAIN)
+    dummies = pd.get_dummies(TRAIN[FEATURES].astype({"region": object, "status": object}).fillna("missing"), dtype=np.float32)
+    assert sorted(encoder.feature_names) == sorted(dummies.columns)
+    assert np.array_equal(encoder.transform(TRAIN), dummies[encoder.feature_names].to_numpy())
+
+    legacy = CategoricalEncoder.from_dummy_columns(dummies.columns, FEATURES)
+    assert list(legacy.feature_names) == list(dummies.columns)
+    assert np.array_equal(legacy.transform(TRAIN), dummies.to_numpy())
+
+
+def test_numeric_features_pass_through():
+    encoder = CategoricalEncoder(FEATURES).fit(TRAIN)
+    assert encoder.numeric == ["ip_region_mismatch"]
+    assert list(encoder.widths) == [3, 2, 1]
+    rows = pd.DataFrame({"region": ["east", "north"], "status": ["active", "active"], "ip_region_mismatch": [1, 7]})
+    X = encoder.transform(rows)
+    assert X[:, -1].tolist() == [1.0, 7.0]
+    assert encoder.unseen_values(rows).tolist() == [False, True]
+    # Codes only know training values: an unseen number is written as 0
+    assert encoder.one_hot(encoder.ordinal(rows))[:, -1].tolist() == [1.0, 0.0]
+    assert np.array_equal(encoder.transform(rows, sparse=True).toarray(), X)
@@ -0,0 +1,46 @@
+# tests/test_generate.py
+
+import pytest
+
+from src.generate.allocators import CapacityError
+from src.generate.generate_base_assets import generate_assets
+from src.shared.storage import read_table
+
+
+def generated_bytes(tmp_path, name, **kwargs):
+    path = tmp_path / name
+    generate_assets(output_file=str(path), seed=11, **kwargs)
+    return path.read_bytes()
+
+
+def test_sharded_output_does_not_depend_on_workers(tmp_path):
+    outputs = {generated_bytes(tmp_path, f"w{workers}.csv", num_assets=4000, mode="sharded", workers=workers)
+               for workers in (1, 2, 4)}
+    assert len(outputs) == 1
+
+
+@pytest.mark.parametrize("mode", ["batch", "rowwise"])
+def test_output_does_not_depend_on_chunk_size(tmp_path, mode):
+    outputs = {generated_bytes(tmp_path, f"c{chunk}.csv", num_assets=1500, mode=mode, chunk_size=chunk)
+               for chunk in (0, 400, 1499)}
+    assert len(outputs) == 1
+
+
+@pytest.mark.parametrize("mode", ["batch", "rowwise", "sharded"])
+def test_generated_assets_are_unique(tmp_path, mode):
+    generate_assets(2000, str(tmp_path / "a.csv"), mode=mode, seed=5, workers=2)
+    df = read_table(str(tmp_path / "a.csv"))
+    assert len(df) == 2000
+    assert df["hostname"].is_unique and df["ip_address"].is_unique and df["fqdn"].is_unique
+
+
+@pytest.mark.parametrize("mode", ["batch", "rowwise", "sharded"])
+def test_no_assets_still_writes_a_header(tmp_path, mode):
+    path = tmp_path / "empty.csv"
+    generate_assets(0, str(path), mode=mode, seed=5, workers=2)
+    assert path.read_text().strip() == "ip_address,hostname,fqdn,region,status,vendor,model,role"
+
+
+def test_more_assets_than_fit_raise(tmp_path):
+    with pytest.raises(CapacityError):
+        generate_assets(20_000, str(tmp_path / "full.csv"), mode="batch", seed=5, num_width=2)
@@ -0,0 +1,42 @@
+# tests/test_incremental.py
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.train.incremental import grow_forest
+
+
+def data(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((200, 4))
+    return X, (X[:, 0] > 0.5).astype(int)
+
+
+def test_retired_trees_do_not_repeat_seeds():
+    clf = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(*data(0))
+    grown, retired = 5, 0
+    for update in range(1, 5):
+        retired += grow_forest(clf, *data(update), n_new=3, max_trees=6, trees_grown=grown)
+        grown += 3
+    seeds = [tree.random_state for tree in clf.estimators_]
+    assert retired == grown - 6 and len(seeds) == 6
+    # The same seeds as the last six trees of one 17-tree forest
+    reference = RandomForestClassifier(n_estimators=grown, max_depth=3, random_state=0).fit(*data(0))
+    assert seeds == [tree.random_state for tree in reference.estimators_[-6:]]
+    assert clf.random_state == 0 and not clf.warm_start
+
+
+def test_every_full_fit_restarts_the_version_log(tmp_path):
+    from src.generate.generate_base_assets import generate_asset_frame
+    from src.generate.inject_presence_noise import label_presence, load_prob_config
+    from src.train.incremental import load_versions, record_version
+    from src.train.train_from_config import train_from_frame
+
+    df = label_presence(generate_asset_frame(2000, "batch", 3), load_prob_config("config/generation_params.json"), 3)
+    config = {"features": ["region", "status", "role"], "label": "missing_in_inventory", "n_estimators": 5,
+              "output_model": str(tmp_path / "model.joblib"), "output_encoder": str(tmp_path / "encoder.joblib")}
+    train_from_frame(df, config)
+    record_version(config, {"version": "delta", "mode": "incremental", "rows": 10})
+    train_from_frame(df, config)
+    versions = load_versions(config)["versions"]
+    assert [v["mode"] for v in versions] == ["full"] and versions[0]["rows"] == len(df)
@@ -0,0 +1,40 @@
+# tests/test_inject_noise.py
+
+import pandas as pd
+import pytest
+
+from src.generate.generate_base_assets import generate_asset_frame
+from src.generate.inject_presence_noise import inject_noise, label_presence_hashed, load_prob_config
+from src.shared.storage import iter_table, read_table, write_table
+
+PARAMS = "config/generation_params.json"
+
+
+def test_hashed_labels_do_not_depend_on_chunking(tmp_path):
+    base = str(tmp_path / "base.csv")
+    write_table(generate_asset_frame(3000, mode="batch", seed=1), base)
+    params = load_prob_config(PARAMS)
+    whole = label_presence_hashed(read_table(base, compact=True), params, seed=9)
+    chunks = [label_presence_hashed(chunk, params, seed=9) for chunk in iter_table(base, 700, compact=True)]
+    chunks = pd.concat(chunks, ignore_index=True)
+    assert whole["missing_in_inventory"].tolist() == chunks["missing_in_inventory"].tolist()
+    assert whole["missing_in_ipam"].tolist() == chunks["missing_in_ipam"].tolist()
+
+
+def test_streaming_without_a_seed(tmp_path):
+    base, labeled = str(tmp_path / "base.csv"), str(tmp_path / "labeled.csv")
+    write_table(generate_asset_frame(500, mode="batch", seed=1), base)
+    inject_noise(base, labeled, seed=None, config_path=PARAMS, chunk_size=200, labeling="hashed")
+    df = read_table(labeled)
+    assert len(df) == 500
+    assert set(df["missing_in_inventory"].unique()) <= {0, 1}
+
+
+def test_labeling_mode_is_explicit(tmp_path):
+    base = str(tmp_path / "base.csv")
+    write_table(generate_asset_frame(500, mode="batch", seed=1), base)
+    with pytest.raises(ValueError, match="hashed"):
+        inject_noise(base, str(tmp_path / "exact.csv"), seed=4, config_path=PARAMS, chunk_size=200)
+    for name, chunk_size in [("whole.csv", 0), ("chunked.csv", 200)]:
+        inject_noise(base, str(tmp_path / name), seed=4, config_path=PARAMS, chunk_size=chunk_size, labeling="hashed")
+    assert open(tmp_path / "whole.csv", "rb").read() == open(tmp_path / "chunked.csv", "rb").read()
@@ -0,0 +1,51 @@
+# tests/test_instrument.py
+
+import sys
+import threading
+
+import numpy as np
+
+from src.shared import instrument
+from src.shared.instrument import peak_rss_mb, span
+
+
+def test_main_thread_spans_keep_a_worker_threads_peak():
+    instrument.configure()
+    allocated, measured = threading.Event(), threading.Event()
+    recorded = {}
+
+    def worker():
+        with span("fit") as current:
+            block = np.ones(16_000_000)  # 128 MB
+            del block
+            allocated.set()
+            measured.wait()
+        recorded["peak"] = current.peak_mb
+
+    with span("outer"):
+        before = peak_rss_mb()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        allocated.wait()
+        # A span opened before the worker's ends must not reset the mark it is measured against
+        with span("evaluate"):
+            pass
+        measured.set()
+        thread.join()
+    assert recorded["peak"] >= before + 100
+
+
+def test_mlflow_is_not_imported_without_a_run_or_tracking_uri(monkeypatch):
+    imported = []
+
+    class Finder:
+        def find_spec(self, name, path=None, target=None):
+            imported.append(name)
+            return None
+
+    for var in ("MLFLOW_RUN_ID", "MLFLOW_TRACKING_URI"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.delitem(sys.modules, "mlflow", raising=False)
+    monkeypatch.setattr(sys, "meta_path", [Finder()] + sys.meta_path)
+    assert instrument.log_to_mlflow() is False
+    assert "mlflow" not in imported
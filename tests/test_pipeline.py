@@ -0,0 +1,36 @@
+# tests/test_pipeline.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.generate.generate_base_assets import generate_assets
+from src.generate.inject_presence_noise import inject_noise
+from src.pipeline.runner import build_pipeline
+from src.prepare.generate_lightspeed_assets import enrich_assets
+from src.shared.storage import table_path, write_table
+
+
+def context(tmp_path, mode):
+    return SimpleNamespace(num_assets=3000, seed=21, mode=mode, num_width=2, chunk_size=0, workers=2, format="csv",
+                           config="config/generation_params.json", raw_dir=str(tmp_path / "raw"),
+                           processed_dir=str(tmp_path / "processed"))
+
+
+@pytest.mark.parametrize("mode", ["batch", "sharded"])
+def test_fused_staged_and_standalone_prepare_agree(tmp_path, mode):
+    ctx = context(tmp_path, mode)
+    outputs = {}
+    for fused in (False, True):
+        enriched = build_pipeline(spill=False, fused=fused).run(ctx, targets=["prepare"])["prepare"]
+        outputs["fused" if fused else "staged"] = path = str(tmp_path / f"{'fused' if fused else 'staged'}.csv")
+        write_table(enriched, path)
+
+    base, labeled = table_path(ctx.raw_dir, "base_asset_dataset"), table_path(ctx.raw_dir, "labeled_asset_dataset")
+    generate_assets(ctx.num_assets, base, mode, ctx.seed, ctx.num_width, workers=ctx.workers)
+    inject_noise(base, labeled, ctx.seed, ctx.config)
+    enrich_assets(ctx.raw_dir, ctx.processed_dir)
+    outputs["standalone"] = table_path(ctx.processed_dir, "labeled_asset_dataset_enriched")
+
+    contents = {name: open(path, "rb").read() for name, path in outputs.items()}
+    assert contents["fused"] == contents["staged"] == contents["standalone"]
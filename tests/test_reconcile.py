@@ -0,0 +1,52 @@
+# tests/test_reconcile.py
+
+import json
+
+import pandas as pd
+
+from src.generate.generate_base_assets import generate_asset_frame
+from src.generate.inject_presence_noise import label_presence, load_prob_config
+from src.reconcile.fixtures import write_fixtures
+from src.reconcile.reconcile import reconcile
+from src.shared.compact import LABEL_COLUMNS
+from src.shared.storage import read_table, write_table
+
+
+def test_reconcile_recovers_the_injected_labels(tmp_path):
+    labeled = str(tmp_path / "labeled.csv")
+    df = label_presence(generate_asset_frame(5000, mode="batch", seed=8),
+                        load_prob_config("config/generation_params.json"), seed=8)
+    write_table(df, labeled)
+    paths = write_fixtures(labeled, str(tmp_path / "fixtures"), seed=8, chunk_size=1200)
+
+    with open("config/reconcile.json") as f:
+        config = json.load(f)
+    for source, path in paths.items():
+        config[source]["path"] = path
+    config["chunk_size"] = 1000
+    report = reconcile(config, str(tmp_path / "reconciled.csv"))
+
+    expected, recovered = read_table(labeled), read_table(str(tmp_path / "reconciled.csv"))
+    assert report["rows"]["discovered"] == len(expected)
+    pd.testing.assert_frame_equal(recovered[LABEL_COLUMNS], expected[LABEL_COLUMNS])
+    assert recovered.drop(columns=LABEL_COLUMNS).equals(expected.drop(columns=LABEL_COLUMNS))
+    assert 0 < report["missing"]["missing_in_inventory"] < len(expected)
+
+
+def test_reconcile_accepts_a_blank_hostname(tmp_path):
+    labeled = str(tmp_path / "labeled.csv")
+    write_table(label_presence(generate_asset_frame(300, mode="batch", seed=2),
+                               load_prob_config("config/generation_params.json"), seed=2), labeled)
+    paths = write_fixtures(labeled, str(tmp_path / "fixtures"), seed=2)
+    discovered = read_table(paths["discovered"], categorical=False)
+    discovered.loc[0, ["hostname", "fqdn"]] = None
+    write_table(discovered, paths["discovered"])
+
+    with open("config/reconcile.json") as f:
+        config = json.load(f)
+    for source, path in paths.items():
+        config[source]["path"] = path
+    report = reconcile(config, str(tmp_path / "reconciled.csv"))
+    recovered = read_table(str(tmp_path / "reconciled.csv"))
+    assert report["rows"]["discovered"] == len(recovered) == 300
+    assert pd.isna(recovered.loc[0, "hostname"])
@@ -0,0 +1,76 @@
+# tests/test_server.py
+
+import asyncio
+import json
+
+import numpy as np
+
+from src.serve.server import ScoringService
+
+
+class FakeScorer:
+    """Scores 0.5 per row and fails the whole call on a ``region`` of ``"boom"``, as a bad row would."""
+
+    label = "missing_in_inventory"
+    features = ["region"]
+
+    def score(self, df):
+        if (df["region"] == "boom").any():
+            raise TypeError("unscorable row")
+        return np.full(len(df), 0.5)
+
+
+def post(service, payloads):
+    async def run():
+        batcher = asyncio.create_task(service.batcher.run())
+        try:
+            return await asyncio.gather(*(service.route("POST", "/score", json.dumps(p).encode()) for p in payloads),
+                                        return_exceptions=True)
+        finally:
+            batcher.cancel()
+    return asyncio.run(run())
+
+
+def test_non_scalar_record_is_rejected():
+    (status, result), = post(ScoringService([FakeScorer()]), [{"region": ["east"]}])
+    assert status == 400
+    assert "region" in result["error"]
+
+
+def test_bad_request_does_not_fail_its_batch():
+    service = ScoringService([FakeScorer()], max_wait_ms=50)
+    responses = post(service, [{"hostname": "a", "region": "east"}, {"region": "boom"}, [{"region": "west"}]])
+    assert responses[0] == (200, {"hostname": "a", "missing_in_inventory_score": 0.5})
+    assert isinstance(responses[1], TypeError)
+    assert responses[2] == (200, [{"missing_in_inventory_score": 0.5}])
+
+
+def exchange(service, request: bytes) -> bytes:
+    """Send raw bytes to ``service.handle`` over a socket and return everything it answers."""
+    async def run():
+        batcher = asyncio.create_task(service.batcher.run())
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        response = await reader.read()
+        writer.close()
+        server.close()
+        batcher.cancel()
+        return response
+    return asyncio.run(run())
+
+
+def test_handler_answers_500_on_unexpected_errors():
+    body = json.dumps({"region": "boom"}).encode()
+    response = exchange(ScoringService([FakeScorer()], max_wait_ms=1),
+                        b"POST /score HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+    assert response.startswith(b"HTTP/1.1 500")
+    assert b"TypeError" in response
+
+
+def test_handler_answers_400_on_a_malformed_request():
+    service = ScoringService([FakeScorer()], max_wait_ms=1)
+    assert exchange(service, b"garbage\r\n\r\n").startswith(b"HTTP/1.1 400")
+    response = exchange(service, b"POST /score HTTP/1.1\r\nContent-Length: lots\r\n\r\n{}")
+    assert response.startswith(b"HTTP/1.1 400") and b"Bad request" in response
@@ -0,0 +1,24 @@
+# tests/test_storage.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.shared.storage import TableWriter, iter_table
+
+
+@pytest.mark.parametrize("columns", [None, ["hostname", "row"]])
+def test_feather_chunks_match_parquet_chunks(tmp_path, columns):
+    chunks = {}
+    for fmt in ("parquet", "feather"):
+        path = str(tmp_path / f"assets.{fmt}")
+        with TableWriter(path) as writer:
+            start = 0
+            for rows in (300, 450, 250):
+                writer.write(pd.DataFrame({"row": np.arange(start, start + rows), "hostname": [f"h{start}"] * rows,
+                                           "score": np.zeros(rows)}))
+                start += rows
+        chunks[fmt] = list(iter_table(path, 200, columns=columns))
+    assert [len(chunk) for chunk in chunks["feather"]] == [len(chunk) for chunk in chunks["parquet"]] == [200] * 5
+    pd.testing.assert_frame_equal(pd.concat(chunks["feather"]), pd.concat(chunks["parquet"]))
+    assert list(chunks["feather"][0].columns) == (columns or ["row", "hostname", "score"])
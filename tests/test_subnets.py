@@ -0,0 +1,26 @@
+# tests/test_subnets.py
+
+import numpy as np
+import pandas as pd
+
+from src.shared.compact import parse_ipv4
+from src.shared.subnets import SubnetIndex
+
+
+def test_most_specific_prefix_wins():
+    index = SubnetIndex([("10.0.0.0/8", "wide"), ("10.1.0.0/16", "narrow"), ("10.1.0.0/16", "duplicate")])
+    ips = parse_ipv4(pd.Series(["10.1.2.3", "10.2.0.1", "11.0.0.1"]))
+    labels = [index.labels[c] if c >= 0 else None for c in index.lookup(ips)]
+    assert labels == ["narrow", "wide", None]
+
+
+def test_index_without_ipv4_prefixes_covers_nothing():
+    index = SubnetIndex([("2001:db8::/32", "east")])
+    assert len(index) == 0
+    ips = parse_ipv4(pd.Series(["10.10.0.1", "10.30.0.1"]))
+    assert (index.lookup(ips) == -1).all()
+    assert pd.isna(index.regions(pd.Series(["10.10.0.1", None]))).all()
+
+
+def test_empty_index_lookup_of_no_rows():
+    assert SubnetIndex([]).lookup(np.empty(0, dtype=np.uint32)).shape == (0,)
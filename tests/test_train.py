@@ -0,0 +1,11 @@
+# tests/test_train.py
+
+from sklearn.metrics import classification_report
+
+from src.train.train_from_config import format_report
+
+
+def test_report_text_matches_classification_report():
+    y_true, y_pred = [0, 1, 1, 0, 1, 0, 0, 1, 1], [0, 1, 0, 0, 1, 1, 0, 1, 1]
+    text = classification_report(y_true, y_pred)
+    assert format_report(classification_report(y_true, y_pred, output_dict=True)) == text.rstrip("\n")